@@ -0,0 +1,116 @@
+# Sampling jitter benchmark for PymodbusV3Final.py
+# Runs the acquisition & logging loop against the simulated PLC (PlcSimulator.py) while the main process
+# keeps matplotlib busy redrawing a multi-parameter dashboard, once with acquisition in a thread of the
+# GUI process and once in its own process (ACQUISITION_PROCESS mode), and compares the sampling jitter
+# Usage: python PlcJitterBenchmark.py [parameter csv] [seconds per mode] [interval ms]
+
+# ---------- Code Starts ----------
+# ----- Importing Libraries -----
+import sys  # For command line arguments
+import os  # For temporary working folder and silencing per-sample prints
+import time  # For benchmark duration
+import queue  # For command queue of the acquisition thread
+import tempfile  # For log files of the benchmark
+import threading  # For acquisition thread mode
+import multiprocessing as mp  # For running the simulator in its own process
+import numpy as np  # For jitter statistics
+import matplotlib
+matplotlib.use('Agg')  # Off-screen rendering, same drawing cost without a window
+import matplotlib.pyplot as plt  # For render load
+import PymodbusV3Final as v3  # Acquisition core under test
+import PlcSimulator  # Simulated PLC (Modbus TCP server)
+
+# ---------- Configuration Information ----------
+SIM_PORT = 5021  # Port of the simulator started by the benchmark
+RENDER_PARAMS = 30  # Lines drawn by the render load
+RENDER_POINTS = 900  # Points per line (15-minute window at 1 Hz)
+
+# ----- Render load: full redraw of a dashboard, as plot_current_data() does every update -----
+def make_render_load():
+    fig, axes = plt.subplots(3, 2, figsize=(14, 8))
+    x = np.arange(RENDER_POINTS)
+    lines = [axes.flat[i % len(axes.flat)].plot(x, np.zeros(RENDER_POINTS))[0] for i in range(RENDER_PARAMS)]
+
+    def render():
+        for i, line in enumerate(lines):
+            line.set_ydata(np.sin(x / 50 + time.monotonic() + i))
+        for ax in axes.flat:
+            ax.relim()
+            ax.autoscale_view()
+        fig.canvas.draw()
+    return render
+
+# ----- Jitter statistics (ms) from the cycle times of the received samples -----
+def jitter_summary(row_times_ns, interval_ms):
+    periods = np.diff(np.asarray(row_times_ns, dtype=np.int64)) / 1e6
+    if len(periods) == 0:
+        return None
+    jitter = np.abs(periods - interval_ms)
+    return {'samples': len(row_times_ns), 'mean': jitter.mean(), 'p99': np.percentile(jitter, 99),
+            'max': jitter.max(), 'std': periods.std()}
+
+# ----- Running one mode for a number of seconds and collecting the sample times -----
+def run_mode(mode, csv_path, seconds, interval_ms, render_load):
+    # The acquisition process keeps its own journal / statistics, the simulator runs as a TCP server
+    PlcSimulator.setup_v3(csv_path, mode, analysis=mode != "process", simulated=False)
+    if mode == "process":
+        v3.start_acquisition_process(csv_path, interval_ms)
+        ring, commands = v3.acquisition_ring, v3.acquisition_commands
+    else:
+        ring, commands = v3.SharedSampleRing(v3.df_params['Parameter']), queue.Queue()
+        worker = threading.Thread(target=v3.run_acquisition_loop, args=(ring, commands, interval_ms), daemon=True)
+        worker.start()
+    commands.put(('connect', PlcSimulator.SIM_IP, SIM_PORT, "TCP"))
+    time.sleep(1)  # Let the connection settle before measuring
+    ring.read_new()
+    row_times = []
+    end_time = time.monotonic() + seconds
+    while time.monotonic() < end_time:
+        if render_load:
+            render_load()
+        else:
+            time.sleep(interval_ms / 1000 / 4)
+        row_times.extend(int(stamps.min()) for values, stamps, _ in ring.read_new() if values)
+    if mode == "process":
+        v3.stop_acquisition_process()
+    else:
+        commands.put(('stop',))
+        worker.join()
+        ring.close()
+    return jitter_summary(row_times, interval_ms)
+
+if __name__ == "__main__":
+    csv_path = os.path.abspath(sys.argv[1] if len(sys.argv) > 1 else "Variables.csv")
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 30
+    interval_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 100
+    simulator = mp.Process(target=PlcSimulator.serve_csv, args=(csv_path, PlcSimulator.SIM_IP, SIM_PORT), daemon=True)
+    simulator.start()
+    time.sleep(2)
+    os.chdir(tempfile.mkdtemp(prefix="plc_jitter_"))
+    render_load = make_render_load()
+
+    results = []
+    stdout_fd = os.dup(1)
+    for label, mode, load in [("thread, no render load", "thread", None),
+                              ("thread, render load", "thread", render_load),
+                              ("process, render load", "process", render_load)]:
+        print(f"[INFO] Measuring {label} for {seconds:.0f} s ...", flush=True)
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)  # Per-sample prints would dominate the measurement
+        try:
+            results.append((label, run_mode(mode, csv_path, seconds, interval_ms, load)))
+        finally:
+            sys.stdout.flush()
+            os.dup2(stdout_fd, 1)
+            os.close(devnull)
+    simulator.terminate()
+
+    print(f"\nSampling jitter at {interval_ms:.0f} ms interval, {RENDER_PARAMS} lines x {RENDER_POINTS} points render load")
+    print(f"{'Mode':<26}{'Samples':>9}{'Mean ms':>10}{'P99 ms':>10}{'Max ms':>10}{'Period SD':>11}")
+    for label, summary in results:
+        if summary is None:
+            print(f"{label:<26}{'no samples':>9}")
+            continue
+        print(f"{label:<26}{summary['samples']:>9}{summary['mean']:>10.2f}{summary['p99']:>10.2f}"
+              f"{summary['max']:>10.2f}{summary['std']:>11.2f}")
+    print(f"[INFO] Logs written to {os.getcwd()}")
@@ -0,0 +1,188 @@
+# Viewer scaling test of the browser live view of PymodbusV3Final.py (LIVEVIEW_ENABLED)
+# Publishes samples of the simulated PLC (PlcSimulator.py) to the live view server while 0, 1, 10, ... WebSocket
+# viewers (a separate process, so their work is not counted) decode the initial window and every delta.
+# Prints the CPU time of the server process per viewer count, checks every viewer ends with exactly the state of the
+# server, and compares with one matplotlib redraw per viewer and second (the desktop GUI per operator).
+# Usage: python PlcLiveViewTest.py [parameter csv] [seconds per step] [samples per second] [viewers,viewers,...]
+
+# ---------- Code Starts ----------
+# ----- Importing Libraries -----
+import sys  # For command line arguments and exit code
+import os  # For the viewer process
+import time  # For publish rate
+import json  # For the parameter list message
+import base64  # For the WebSocket handshake
+import socket  # For the WebSocket viewers
+import struct  # For frame headers
+import resource  # For CPU time of the server process (POSIX)
+import selectors  # For reading all viewers in one thread
+import multiprocessing as mp  # For running the viewers in their own process
+import numpy as np  # For decoding the frames
+import matplotlib
+matplotlib.use('Agg')  # Off-screen rendering for the redraw comparison
+import matplotlib.pyplot as plt  # For the redraw comparison
+import PymodbusV3Final as v3  # Live view under test
+import PlcSimulator  # Simulated PLC (in-process client)
+
+# ---------- Configuration Information ----------
+TEST_PORT = 8091  # Port of the live view server started by the test
+VIEWER_COUNTS = [0, 1, 10, 50]
+CPU_GROWTH_LIMIT = 100  # Allowed server CPU per extra viewer and sample (us), a matplotlib redraw costs ~50 ms
+
+# ----- Minimal WebSocket viewer: decodes frames the same way as PlcLiveView.html -----
+class Viewer:
+    def __init__(self, port):
+        self.sock = socket.create_connection(('127.0.0.1', port))
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.sock.sendall(f"GET /ws HTTP/1.1\r\nHost: 127.0.0.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                          f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+        response = b""
+        while b"\r\n\r\n" not in response:
+            response += self.sock.recv(4096)
+        if b" 101 " not in response.split(b"\r\n")[0]:
+            raise ConnectionError(response.split(b"\r\n")[0].decode())
+        self.buffer = response.split(b"\r\n\r\n", 1)[1]
+        self.sock.setblocking(False)
+        self.width = 0
+        self.sequence = 0
+        self.last = None  # (epoch ms, float32 values, quality) of the newest sample
+
+    def on_readable(self):
+        data = self.sock.recv(1 << 20)
+        if not data:
+            raise ConnectionError("server closed the connection")
+        self.buffer += data
+        while len(self.buffer) >= 2:
+            length, start = self.buffer[1] & 0x7F, 2
+            if length == 126:
+                if len(self.buffer) < 4:
+                    return
+                length, start = struct.unpack_from('!H', self.buffer, 2)[0], 4
+            elif length == 127:
+                if len(self.buffer) < 10:
+                    return
+                length, start = struct.unpack_from('!Q', self.buffer, 2)[0], 10
+            if len(self.buffer) < start + length:
+                return
+            opcode, payload = self.buffer[0] & 0x0F, self.buffer[start:start + length]
+            self.buffer = self.buffer[start + length:]
+            if opcode == 0x1:
+                self.width = len(json.loads(payload)['parameters'])
+            elif payload[0] == 2:
+                self.apply_window(payload)
+            else:
+                self.apply_delta(payload)
+
+    def apply_window(self, payload):
+        _, self.sequence, rows, width = v3.LIVEVIEW_WINDOW_HEADER.unpack_from(payload)
+        if rows:
+            offset = v3.LIVEVIEW_WINDOW_HEADER.size
+            times = np.frombuffer(payload, np.float64, rows, offset)
+            values = np.frombuffer(payload, np.float32, rows * width, offset + 8 * rows).reshape(rows, width)
+            quality = np.frombuffer(payload, np.uint8, rows * width, offset + 8 * rows + 4 * rows * width)
+            self.last = (times[-1], values[-1].copy(), quality.reshape(rows, width)[-1].copy())
+
+    def apply_delta(self, payload):
+        _, self.sequence, timestamp_ms = v3.LIVEVIEW_DELTA_HEADER.unpack_from(payload)
+        offset = v3.LIVEVIEW_DELTA_HEADER.size
+        mask_bytes = (self.width + 7) // 8
+        changed = np.unpackbits(np.frombuffer(payload, np.uint8, mask_bytes, offset), bitorder='little')[:self.width]
+        changed = changed.astype(bool)
+        count = int(changed.sum())
+        values, quality = (self.last[1].copy(), self.last[2].copy()) if self.last else (
+            np.full(self.width, np.nan, np.float32), np.full(self.width, v3.QUALITY_COMM_FAIL, np.uint8))
+        values[changed] = np.frombuffer(payload, np.float32, count, offset + mask_bytes)
+        quality[changed] = np.frombuffer(payload, np.uint8, count, offset + mask_bytes + 4 * count)
+        self.last = (timestamp_ms, values, quality)
+
+# ----- Viewer process: connects, reads until told to stop, reports (sequence, last sample) of every viewer -----
+def run_viewers(port, count, stop, results):
+    selector = selectors.DefaultSelector()
+    viewers = [Viewer(port) for _ in range(count)]
+    for viewer in viewers:
+        selector.register(viewer.sock, selectors.EVENT_READ, viewer)
+    while not stop.is_set():
+        for key, _ in selector.select(timeout=0.1):
+            key.data.on_readable()
+    for _ in range(5):  # Frames still in flight
+        for key, _ in selector.select(timeout=0.1):
+            key.data.on_readable()
+    results.put([(viewer.sequence, viewer.last) for viewer in viewers])
+    for viewer in viewers:
+        viewer.sock.close()
+
+# ----- Server CPU (ms per second) while publishing with a number of viewers connected -----
+def measure(server, plc, viewers, seconds, rate):
+    stop, results = mp.Event(), mp.Queue()
+    process = mp.Process(target=run_viewers, args=(TEST_PORT, viewers, stop, results), daemon=True)
+    process.start()
+    while server.viewers < viewers:
+        time.sleep(0.05)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_start = usage.ru_utime + usage.ru_stime
+    start = time.monotonic()
+    next_sample = start
+    published = 0
+    while time.monotonic() - start < seconds:
+        plc.update(time.monotonic() - start)
+        values, stamps, quality = v3.read_plc_data()
+        server.publish(stamps, values, quality)
+        published += 1
+        next_sample += 1 / rate
+        time.sleep(max(next_sample - time.monotonic(), 0))
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_ms = (usage.ru_utime + usage.ru_stime - cpu_start) * 1000 / (time.monotonic() - start)
+    time.sleep(0.5)
+    stop.set()
+    states = results.get(timeout=30)
+    process.join()
+    while server.viewers:
+        time.sleep(0.05)
+    # Every viewer must end on the server's last sample
+    row = (server.count - 1) % server.window
+    exact = all(sequence == server.count and last is not None and last[0] == server.times[row] and
+                np.array_equal(last[1], server.values[row], equal_nan=True) and np.array_equal(last[2], server.quality[row])
+                for sequence, last in states)
+    return cpu_ms, published, exact
+
+# ----- Cost of one full matplotlib redraw of the parameters over the window (the desktop GUI per viewer) -----
+def redraw_ms(param_count, points):
+    fig, ax = plt.subplots(figsize=(14, 8))
+    x = np.arange(points)
+    lines = [ax.plot(x, np.zeros(points))[0] for _ in range(param_count)]
+    start = time.perf_counter()
+    for i in range(5):
+        for k, line in enumerate(lines):
+            line.set_ydata(np.sin(x / 50 + i + k))
+        ax.relim()
+        ax.autoscale_view()
+        fig.canvas.draw()
+    plt.close(fig)
+    return (time.perf_counter() - start) * 1000 / 5
+
+if __name__ == "__main__":
+    csv_path = os.path.abspath(sys.argv[1] if len(sys.argv) > 1 else "Variables.csv")
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    counts = [int(n) for n in sys.argv[4].split(",")] if len(sys.argv) > 4 else VIEWER_COUNTS
+    plc = PlcSimulator.setup_v3(csv_path)  # No log files, only the live view is measured
+    server = v3.LiveViewServer(v3.df_params, '127.0.0.1', TEST_PORT)
+    sys.stdout = open(os.devnull, 'w')  # Per-sample prints of the reader
+    rows = [(viewers, *measure(server, plc, viewers, seconds, rate)) for viewers in counts]
+    sys.stdout = sys.__stdout__
+    server.close()
+
+    print(f"Live view server, {len(v3.df_params)} parameters, {rate:g} samples/s, {seconds:g} s per step")
+    print(f"{'Viewers':>8}{'Samples':>9}{'CPU ms/s':>10}{'Exact':>7}")
+    for viewers, cpu_ms, published, exact in rows:
+        print(f"{viewers:>8}{published:>9}{cpu_ms:>10.2f}{'yes' if exact else 'NO':>7}")
+    growth = (rows[-1][1] - rows[0][1]) * 1000 / rate / max(rows[-1][0] - rows[0][0], 1)
+    flat = growth <= CPU_GROWTH_LIMIT
+    exact = all(row[3] for row in rows)
+    draw = redraw_ms(len(v3.df_params), v3.MAX_POINTS)
+    print(f"[INFO] For comparison one matplotlib redraw of the window costs {draw:.1f} ms, "
+          f"i.e. {draw:.0f} ms/s per desktop viewer at 1 update per second")
+    print(f"[{'INFO' if flat else 'ERROR'}] Server CPU per extra viewer and sample {growth:.1f} us "
+          f"(limit {CPU_GROWTH_LIMIT}): {'PASS' if flat else 'FAIL'}")
+    print(f"[{'INFO' if exact else 'ERROR'}] Every viewer ends with the server state: {'PASS' if exact else 'FAIL'}")
+    sys.exit(0 if flat and exact else 1)
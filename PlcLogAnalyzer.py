@@ -0,0 +1,323 @@
+# Offline analysis of *_PLC_Data_log.csv files written by PymodbusV3Final.py
+# Logs are streamed in chunks (bounded memory), several files are processed in parallel by a process pool
+# Commands:
+#   stats       per-parameter count / mean / min / max / stddev
+#   gaps        disconnect periods (empty rows) and missing rows (time steps longer than expected)
+#   violations  values outside the Range of the parameter csv
+#   resample    write logs again at a new interval (e.g. 1min, 15s) using mean / min / max / last
+#   quality     per-parameter count of every quality code (GOOD, STALE, COMM_FAIL, OUT_OF_RANGE, EXCEPTION_n)
+#   derive      (re)compute the calculated tags of the parameter csv (Formula column) for older logs
+# --good-only masks every value whose quality column (<parameter>_Q) is not GOOD (stats, violations, resample)
+# Usage examples:
+#   python PlcLogAnalyzer.py stats logs/*_PLC_Data_log.csv --jobs 4
+#   python PlcLogAnalyzer.py violations logs/*.csv --params Variables.csv
+#   python PlcLogAnalyzer.py resample 2025-06-18_10-00_PLC_Data_log.csv --interval 1min --how mean
+#   python PlcLogAnalyzer.py stats logs/*.csv --good-only
+#   python PlcLogAnalyzer.py derive logs/*.csv --params Variables.csv
+
+# ---------- Code Starts ----------
+# ----- Importing Libraries -----
+import argparse  # For command line interface
+import glob  # For expanding file patterns on Windows shells
+import os  # For output file names
+from concurrent.futures import ProcessPoolExecutor  # For processing several log files in parallel
+import numpy as np  # For streaming sums
+import pandas as pd  # For chunked csv reading
+
+# ---------- Configuration Information ----------
+CHUNK_ROWS = 100_000  # Rows read per chunk (about 100 MB of RAM for 500 parameters)
+RANGE_PATTERN = r'^\s*(-?\d+(?:\.\d+)?)\s*-\s*(-?\d+(?:\.\d+)?)\s*$'  # Same as PymodbusV3Final.py
+LONG_COLUMNS = ['Timestamp', 'Parameter', 'Value', 'Quality']  # Header of long layout logs
+QUALITY_SUFFIX = "_Q"  # Quality column after every value column (same as PymodbusV3Final.py)
+QUALITY_NAMES = {0: "GOOD", 1: "STALE", 2: "COMM_FAIL", 3: "OUT_OF_RANGE"}  # Codes >= 0x80: Modbus exception
+DEFAULT_GAP_SECONDS = 2.0  # Time step (seconds) above which rows are considered missing (logging interval is 1 s)
+
+# ----- Reading one log in chunks with parsed timestamps (long layout logs are turned into wide chunks) -----
+def read_log_chunks(path, chunk_rows=CHUNK_ROWS):
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        if pd.api.types.is_integer_dtype(chunk['Timestamp']):  # epoch_ms timestamps
+            chunk['Timestamp'] = pd.to_datetime(chunk['Timestamp'], unit='ms')
+        else:  # Local (seconds or milliseconds) or ISO 8601
+            chunk['Timestamp'] = pd.to_datetime(chunk['Timestamp'], format='mixed')
+        if list(chunk.columns) == LONG_COLUMNS:
+            chunk = long_to_wide(chunk)
+        yield chunk
+
+# ----- Timestamp,Parameter,Value,Quality rows -> one row per timestamp with <parameter> and <parameter>_Q columns -----
+def long_to_wide(chunk):
+    wide = chunk.pivot_table(index='Timestamp', columns='Parameter', values=['Value', 'Quality'],
+                             aggfunc='last', sort=False, dropna=False)
+    names = list(dict.fromkeys(chunk['Parameter']))
+    result = pd.DataFrame({'Timestamp': wide.index})
+    for name in names:
+        result[name] = wide['Value'][name].to_numpy()
+        result[name + QUALITY_SUFFIX] = wide['Quality'][name].to_numpy()
+    return result
+
+# ----- Numeric value columns of a chunk (quality columns left out), optionally only GOOD samples -----
+def value_columns(chunk, good_only=False):
+    names = [column for column in chunk.columns if column != 'Timestamp' and not column.endswith(QUALITY_SUFFIX)]
+    values = chunk[names].apply(pd.to_numeric, errors='coerce')
+    quality_names = [name + QUALITY_SUFFIX for name in names]
+    if good_only and all(name in chunk.columns for name in quality_names):  # Logs before quality codes have none
+        values = values.where(chunk[quality_names].to_numpy() == 0)
+    return values
+
+def quality_name(code):
+    return f"EXCEPTION_{code & 0x7F}" if code & 0x80 else QUALITY_NAMES.get(code, str(code))
+
+# ----- Parameter ranges (Min, Max) from the input csv used for logging -----
+def load_ranges(csv_path):
+    df = pd.read_csv(csv_path, dtype={'Range': str})  # Text even when every Range is empty (bits only)
+    df = df[df['Range'].notna()]
+    limits = df['Range'].str.extract(RANGE_PATTERN).astype(float)  # Min-Max, negative limits allowed
+    return {name: (low, high) for name, low, high in zip(df['Parameter'], limits[0], limits[1])}
+
+# ----- Statistics of one file: per parameter [count, sum, sum of squares, min, max] -----
+def file_stats(path, good_only=False):
+    totals = {}
+    for chunk in read_log_chunks(path):
+        values = value_columns(chunk, good_only)
+        data = values.to_numpy(dtype=float)
+        valid = ~np.isnan(data)
+        counts = valid.sum(axis=0)
+        sums = np.where(valid, data, 0.0).sum(axis=0)
+        squares = np.where(valid, data * data, 0.0).sum(axis=0)
+        with np.errstate(invalid='ignore'):
+            mins = np.nanmin(np.where(valid, data, np.inf), axis=0)
+            maxs = np.nanmax(np.where(valid, data, -np.inf), axis=0)
+        for i, name in enumerate(values.columns):
+            merge_stats(totals, name, [counts[i], sums[i], squares[i], mins[i], maxs[i]])
+    return totals
+
+def merge_stats(totals, name, part):
+    if name not in totals:
+        totals[name] = list(part)
+        return
+    total = totals[name]
+    total[0] += part[0]
+    total[1] += part[1]
+    total[2] += part[2]
+    total[3] = min(total[3], part[3])
+    total[4] = max(total[4], part[4])
+
+# ----- Gaps of one file: (start, end, seconds, kind) -----
+def file_gaps(path, gap_seconds=DEFAULT_GAP_SECONDS):
+    gaps = []
+    previous_time = None
+    empty_start = None  # Start of a running block of empty (disconnected) rows
+    empty_last = None
+    for chunk in read_log_chunks(path):
+        times = chunk['Timestamp']
+        empty = value_columns(chunk).isna().all(axis=1).to_numpy()
+        # Missing rows: time step longer than the expected interval (also across chunk boundaries)
+        steps = times.diff()
+        if previous_time is not None and len(times):
+            steps.iloc[0] = times.iloc[0] - previous_time
+        for index in np.flatnonzero(steps.dt.total_seconds().to_numpy() > gap_seconds):
+            start = times.iloc[index - 1] if index > 0 else previous_time
+            gaps.append((start, times.iloc[index], (times.iloc[index] - start).total_seconds(), "missing rows"))
+        # Empty rows: consecutive runs of rows without any value
+        for is_empty, timestamp in zip(empty, times):
+            if is_empty:
+                if empty_start is None:
+                    empty_start = timestamp
+                empty_last = timestamp
+            elif empty_start is not None:
+                gaps.append((empty_start, empty_last, (empty_last - empty_start).total_seconds(), "empty rows"))
+                empty_start = None
+        if len(times):
+            previous_time = times.iloc[-1]
+    if empty_start is not None:
+        gaps.append((empty_start, empty_last, (empty_last - empty_start).total_seconds(), "empty rows"))
+    return sorted(gaps)
+
+# ----- Range violations of one file: per parameter [count, first time, last time, worst value] -----
+def file_violations(path, ranges, good_only=False):
+    found = {}
+    for chunk in read_log_chunks(path):
+        chunk_values = value_columns(chunk, good_only)
+        for name in chunk_values.columns.intersection(list(ranges)):
+            low, high = ranges[name]
+            values = chunk_values[name]
+            outside = (values < low) | (values > high)
+            if not outside.any():
+                continue
+            bad = values[outside]
+            worst = bad.iloc[np.argmax(np.maximum(low - bad, bad - high).to_numpy())]
+            times = chunk['Timestamp'][outside]
+            merge_violation(found, name, [int(outside.sum()), times.iloc[0], times.iloc[-1], worst], ranges[name])
+    return found
+
+def merge_violation(found, name, part, limits):
+    if name not in found:
+        found[name] = list(part)
+        return
+    total = found[name]
+    total[0] += part[0]
+    total[1] = min(total[1], part[1])
+    total[2] = max(total[2], part[2])
+    low, high = limits
+    if max(low - part[3], part[3] - high) > max(low - total[3], total[3] - high):
+        total[3] = part[3]
+
+# ----- Resampling one file to a new interval, streaming buckets to the output csv -----
+def resample_file(path, interval, how, output_path, good_only=False):
+    carry = None  # Rows of the last (maybe incomplete) bucket, finished with the next chunk
+    header = True
+    rows_written = 0
+    with open(output_path, 'w', newline='') as f:
+        for chunk in read_log_chunks(path):
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            buckets = chunk['Timestamp'].dt.floor(interval)
+            last_bucket = buckets.iloc[-1]
+            carry = chunk[buckets == last_bucket]
+            done = chunk[buckets != last_bucket]
+            if len(done):
+                result = value_columns(done, good_only).set_index(done['Timestamp']).resample(interval).agg(how)
+                result.to_csv(f, header=header, float_format='%.4f')
+                header = False
+                rows_written += len(result)
+        if carry is not None and len(carry):
+            result = value_columns(carry, good_only).set_index(carry['Timestamp']).resample(interval).agg(how)
+            result.to_csv(f, header=header, float_format='%.4f')
+            rows_written += len(result)
+    return output_path, rows_written
+
+# ----- Quality codes of one file: per parameter {code: count} (np.bincount over the uint8 columns) -----
+def file_quality(path):
+    counts = {}
+    for chunk in read_log_chunks(path):
+        for column in [column for column in chunk.columns if column.endswith(QUALITY_SUFFIX)]:
+            codes = chunk[column].dropna().to_numpy(dtype=np.uint8)
+            total = counts.setdefault(column[:-len(QUALITY_SUFFIX)], np.zeros(256, dtype=np.int64))
+            total += np.bincount(codes, minlength=256)
+    return counts
+
+# ----- Calculated tags of one file -> <log>_derived.csv (same FormulaEvaluator as the live reader, one matrix per chunk) -----
+def derive_file(path, csv_path):
+    from PymodbusV3Final import load_parameter_info, FormulaEvaluator, QUALITY_COMM_FAIL  # Only needed here
+    df = load_parameter_info(csv_path)
+    if df is None:
+        raise ValueError(f"Failed to load parameter csv {csv_path}")
+    evaluator = FormulaEvaluator(df)
+    names = df['Parameter'].tolist()
+    header = True
+    rows_written = 0
+    output_path = path.replace('.csv', '_derived.csv')
+    with open(output_path, 'w', newline='') as f:
+        for chunk in read_log_chunks(path):
+            values = value_columns(chunk).reindex(columns=names).to_numpy(dtype=np.float64, copy=True)  # Filled in place
+            quality_names = [name + QUALITY_SUFFIX for name in names]
+            if any(name in chunk.columns for name in quality_names):
+                quality = chunk.reindex(columns=quality_names).fillna(QUALITY_COMM_FAIL).to_numpy(dtype=np.uint8, copy=True)
+            else:  # Logs before quality codes: every logged value counts as GOOD, empty cells as COMM_FAIL
+                quality = np.where(np.isnan(values), QUALITY_COMM_FAIL, 0).astype(np.uint8)
+            evaluator.apply(values, quality)
+            for name, column in zip(evaluator.names, evaluator.columns):
+                chunk[name] = values[:, column]
+                chunk[name + QUALITY_SUFFIX] = quality[:, column]
+            chunk.to_csv(f, header=header, index=False, float_format='%.4f')
+            header = False
+            rows_written += len(chunk)
+    return output_path, rows_written
+
+# ----- Running a per-file function over all files (process pool when jobs > 1) -----
+def map_files(function, paths, jobs, *args):
+    if jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            return list(pool.map(function, paths, *[[arg] * len(paths) for arg in args]))
+    return [function(path, *args) for path in paths]
+
+def print_stats(results):
+    totals = {}
+    for file_totals in results:
+        for name, part in file_totals.items():
+            merge_stats(totals, name, part)
+    print(f"{'Parameter':<28}{'Count':>10}{'Mean':>12}{'Min':>12}{'Max':>12}{'StdDev':>12}")
+    for name, (count, total, squares, low, high) in totals.items():
+        if count == 0:
+            print(f"{name:<28}{0:>10}")
+            continue
+        mean = total / count
+        std = np.sqrt(max(0.0, squares / count - mean * mean))
+        print(f"{name:<28}{int(count):>10}{mean:>12.4f}{low:>12.4f}{high:>12.4f}{std:>12.4f}")
+
+def print_gaps(paths, results):
+    print(f"{'File':<36}{'Start':<26}{'End':<26}{'Seconds':>10}  Kind")
+    for path, gaps in zip(paths, results):
+        for start, end, seconds, kind in gaps:
+            print(f"{os.path.basename(path):<36}{str(start):<26}{str(end):<26}{seconds:>10.1f}  {kind}")
+    print(f"[INFO] {sum(len(gaps) for gaps in results)} gaps found")
+
+def print_violations(results, ranges):
+    found = {}
+    for file_found in results:
+        for name, part in file_found.items():
+            merge_violation(found, name, part, ranges[name])
+    print(f"{'Parameter':<28}{'Range':>14}{'Count':>10}  {'First':<26}{'Last':<26}{'Worst':>10}")
+    for name, (count, first, last, worst) in sorted(found.items()):
+        low, high = ranges[name]
+        print(f"{name:<28}{f'{low:g}-{high:g}':>14}{count:>10}  {str(first):<26}{str(last):<26}{worst:>10.4f}")
+    if not found:
+        print("[INFO] No range violations")
+
+def print_quality(results):
+    totals = {}
+    for file_counts in results:
+        for name, counts in file_counts.items():
+            totals[name] = totals.get(name, 0) + counts
+    if not totals:
+        print("[INFO] No quality columns in these logs")
+        return
+    print(f"{'Parameter':<28}{'Samples':>10}{'Good %':>9}  Other codes")
+    for name, counts in totals.items():
+        samples = int(counts.sum())
+        other = ", ".join(f"{quality_name(code)} {counts[code]}" for code in np.flatnonzero(counts) if code != 0)
+        print(f"{name:<28}{samples:>10}{100 * counts[0] / max(samples, 1):>9.2f}  {other}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline analysis of PLC data logs (chunked, bounded memory)")
+    parser.add_argument('command', choices=['stats', 'gaps', 'violations', 'resample', 'quality', 'derive'])
+    parser.add_argument('logs', nargs='+', help="*_PLC_Data_log.csv files (patterns allowed)")
+    parser.add_argument('--jobs', type=int, default=1, help="Files processed in parallel")
+    parser.add_argument('--params', help="Parameter csv with Range column (violations) or Formula column (derive)")
+    parser.add_argument('--gap', type=float, default=DEFAULT_GAP_SECONDS, help="Seconds between rows counted as a gap")
+    parser.add_argument('--interval', default='1min', help="New interval for resample (pandas offset, e.g. 15s, 1min, 1h)")
+    parser.add_argument('--how', default='mean', choices=['mean', 'min', 'max', 'last'], help="Resample aggregation")
+    parser.add_argument('--good-only', action='store_true', help="Ignore values whose quality code is not GOOD")
+    args = parser.parse_args()
+
+    paths = sorted(path for pattern in args.logs for path in (glob.glob(pattern) or [pattern]))
+    print(f"[INFO] {args.command}: {len(paths)} log files, {args.jobs} jobs")
+    if args.command == 'stats':
+        print_stats(map_files(file_stats, paths, args.jobs, args.good_only))
+    elif args.command == 'gaps':
+        print_gaps(paths, map_files(file_gaps, paths, args.jobs, args.gap))
+    elif args.command == 'violations':
+        if not args.params:
+            parser.error("violations needs --params <parameter csv>")
+        ranges = load_ranges(args.params)
+        print_violations(map_files(file_violations, paths, args.jobs, ranges, args.good_only), ranges)
+    elif args.command == 'quality':
+        print_quality(map_files(file_quality, paths, args.jobs))
+    elif args.command == 'derive':
+        if not args.params:
+            parser.error("derive needs --params <parameter csv>")
+        for output, rows in map_files(derive_file, paths, args.jobs, args.params):
+            print(f"[INFO] Wrote {rows} rows to {output}")
+    else:
+        outputs = [path.replace('.csv', f'_{args.interval}_{args.how}.csv') for path in paths]
+        if args.jobs > 1 and len(paths) > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+                written = list(pool.map(resample_file, paths, [args.interval] * len(paths),
+                                        [args.how] * len(paths), outputs, [args.good_only] * len(paths)))
+        else:
+            written = [resample_file(path, args.interval, args.how, output, args.good_only)
+                       for path, output in zip(paths, outputs)]
+        for output, rows in written:
+            print(f"[INFO] Wrote {rows} rows to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# Back-pressure test of the acquisition pipeline of PymodbusV3Final.py (PIPELINE_ENABLED)
+# Polls the simulated PLC (PlcSimulator.py) at a fast rate with a csv sink that stalls now and then (like a slow
+# disk / network share) and a GUI consumer that draws slowly and freezes once (like a busy Tk main loop).
+# Runs the old serial loop (read, then log in the same cycle) and the pipeline with the same stalls and compares
+# the read cycle timing. Checks that pipeline reads stay on time, that the "block" log queue loses nothing and that
+# the "drop-oldest" analyze and GUI queues account for every sample they did not deliver. Prints the per-stage
+# statistics.
+# Usage: python PlcPipelineTest.py [parameter csv] [seconds per run]
+
+# ---------- Code Starts ----------
+# ----- Importing Libraries -----
+import sys  # For command line arguments and exit code
+import os  # For temporary working folder
+import time  # For cycle times and stalls
+import tempfile  # For log files of the test
+import numpy as np  # For lateness statistics
+import PymodbusV3Final as v3  # Pipeline under test
+import PlcSimulator  # Simulated PLC (in-process client)
+
+# ---------- Configuration Information ----------
+POLL_INTERVAL_MS = 20  # Read cycle of the test (50 Hz)
+LOG_STALL_EVERY = 25  # The csv sink stalls on every n-th sample...
+LOG_STALL_SECONDS = 0.3  # ...for this long (60% of the sink's time at 50 Hz)
+GUI_FRAME_INTERVAL = 0.2  # Seconds between GUI frames
+GUI_DRAW_SECONDS = 0.1  # Time one GUI frame takes to draw
+GUI_FREEZE_SECONDS = 3.0  # One long GUI freeze in the middle of the run
+GUI_QUEUE = 50  # Small GUI queue so the freeze overflows it
+LATENESS_LIMIT_MS = 20.0  # Worst delay of a pipeline read start against its schedule
+
+# ----- Stand-ins for the slow parts -----
+class SlowLogSink:
+    def __init__(self, log_sample):
+        self.log_sample = log_sample
+        self.count = 0
+
+    def __call__(self, stamps, values, quality):
+        self.count += 1
+        if self.count % LOG_STALL_EVERY == 0:
+            time.sleep(LOG_STALL_SECONDS)
+        self.log_sample(stamps, values, quality)
+
+# Records the start of every read (and moves the simulated waveforms)
+class TimedReader:
+    def __init__(self, acquire_sample, plc):
+        self.acquire_sample = acquire_sample
+        self.plc = plc
+        self.starts = []
+
+    def __call__(self):
+        now = time.monotonic()
+        self.starts.append(now)
+        self.plc.update(now)
+        return self.acquire_sample()
+
+# Delay of every read start against its schedule (no catch-up after an overrun, like the loops under test)
+def lateness_ms(starts):
+    starts = np.asarray(starts)
+    return np.maximum(np.diff(starts) * 1000 - POLL_INTERVAL_MS, 0)
+
+def lateness_summary(lateness):
+    return f"{len(lateness) + 1:>7}{np.median(lateness):>9.2f}{np.percentile(lateness, 99):>9.2f}{lateness.max():>9.2f}"
+
+# ----- Old serial loop: the stalls of the sink land directly in the read cycle -----
+def run_serial(reader, seconds):
+    start = time.monotonic()
+    next_cycle = start
+    while time.monotonic() - start < seconds:
+        values, stamps, quality = reader()
+        v3.log_sample(stamps, values, quality)
+        next_cycle += POLL_INTERVAL_MS / 1000
+        if next_cycle < time.monotonic():
+            next_cycle = time.monotonic()
+        time.sleep(max(next_cycle - time.monotonic(), 0))
+
+# ----- Pipeline: the test plays the GUI, drawing slowly from the GUI queue and freezing once -----
+def run_pipeline(seconds):
+    v3.start_acquisition_pipeline(POLL_INTERVAL_MS)
+    received = 0
+    start = time.monotonic()
+    frozen = False
+    while time.monotonic() - start < seconds:
+        time.sleep(GUI_FRAME_INTERVAL)
+        received += len(v3.gui_samples.get_all())
+        time.sleep(GUI_DRAW_SECONDS)
+        if not frozen and time.monotonic() - start > seconds / 2:
+            time.sleep(GUI_FREEZE_SECONDS)
+            frozen = True
+    pipeline, gui = v3.acquisition_pipeline, v3.gui_samples
+    v3.stop_acquisition_pipeline()
+    received += len(gui.get_all())
+    return pipeline, received
+
+def csv_rows(path):
+    with open(path) as f:
+        return sum(1 for _ in f) - 1  # Header
+
+# ----- Runs both loops with the same stalls; returns True if every check passed -----
+def run_test(csv_path, seconds):
+    v3.PIPELINE_GUI_QUEUE, v3.PIPELINE_RATE_WINDOW, v3.PIPELINE_STATS_INTERVAL = GUI_QUEUE, 1, 3600
+    plc = PlcSimulator.setup_v3(csv_path, "pipeline")
+    sink = SlowLogSink(v3.log_sample)
+    v3.log_sample = sink
+    print(f"[INFO] Polling {len(v3.df_params)} parameters every {POLL_INTERVAL_MS} ms for {seconds:g} s per run, "
+          f"csv sink stalls {LOG_STALL_SECONDS * 1000:.0f} ms every {LOG_STALL_EVERY} samples, GUI draws "
+          f"{GUI_DRAW_SECONDS * 1000:.0f} ms per frame and freezes {GUI_FREEZE_SECONDS:g} s once")
+
+    sys.stdout = open(os.devnull, 'w')  # Per-sample prints of the reader
+    try:
+        serial_reader = TimedReader(v3.acquire_sample, plc)
+        run_serial(serial_reader, seconds)
+        logged_serial = sink.count
+        pipeline_reader = TimedReader(serial_reader.acquire_sample, plc)
+        v3.acquire_sample = pipeline_reader
+        pipeline, received = run_pipeline(seconds)
+        v3.flush_csv_buffer()
+        v3.sample_journal.close()
+    finally:
+        sys.stdout = sys.__stdout__
+
+    serial, piped = lateness_ms(serial_reader.starts), lateness_ms(pipeline_reader.starts)
+    print(f"{'Loop':<10}{'Reads':>7}{'P50 ms':>9}{'P99 ms':>9}{'Max ms':>9}   (read start later than scheduled)")
+    print(f"{'serial':<10}{lateness_summary(serial)}")
+    print(f"{'pipeline':<10}{lateness_summary(piped)}")
+    print("[INFO] Pipeline stages:")
+    for row in pipeline.stats():
+        queue_text = (f"queue {row['policy']:<15} max {row['max_depth']:>4}/{row['size']:<5} dropped {row['dropped']:>5}"
+                      if 'depth' in row else f"{'source':<21}{'':>20}")
+        rate = f"{row['rate']:>7.1f}/s {row['busy_ms']:>7.3f} ms/item" if row['rate'] is not None else f"{'':>23}"
+        print(f"    {row['name']:<8}{row['processed']:>7}{rate}  {queue_text}  waited {row['blocked_s']:.2f} s")
+
+    reads = pipeline.stages['read'].processed
+    gui = next(row for row in pipeline.stats() if row['name'] == 'gui')
+    analyze = next(row for row in pipeline.stats() if row['name'] == 'analyze')
+    on_time = piped.max() <= LATENESS_LIMIT_MS
+    complete = (sink.count - logged_serial == reads == analyze['processed'] + analyze['dropped']
+                and csv_rows(v3.log_file_path) == sink.count)
+    accounted = received + gui['dropped'] == gui['processed'] == reads and gui['dropped'] > 0
+    print(f"[{'INFO' if on_time else 'ERROR'}] Worst pipeline read start {piped.max():.2f} ms late "
+          f"(limit {LATENESS_LIMIT_MS}), serial loop {serial.max():.2f} ms: {'PASS' if on_time else 'FAIL'}")
+    print(f"[{'INFO' if complete else 'ERROR'}] Every pipeline read logged once and analysed or dropped ({reads} reads, "
+          f"{analyze['processed']} analysed + {analyze['dropped']} dropped, {csv_rows(v3.log_file_path)} csv rows "
+          f"in total): {'PASS' if complete else 'FAIL'}")
+    print(f"[{'INFO' if accounted else 'ERROR'}] GUI got {received} samples + {gui['dropped']} dropped by its queue = "
+          f"{gui['processed']} queued: {'PASS' if accounted else 'FAIL'}")
+    return on_time and complete and accounted
+
+if __name__ == "__main__":
+    csv_path = os.path.abspath(sys.argv[1] if len(sys.argv) > 1 else "Variables.csv")
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    os.chdir(tempfile.mkdtemp(prefix="plc_pipeline_"))
+    ok = run_test(csv_path, seconds)
+    print(f"[INFO] Logs written to {os.getcwd()}")
+    sys.exit(0 if ok else 1)
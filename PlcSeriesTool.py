@@ -0,0 +1,109 @@
+# Compressed series tool for PymodbusV3Final.py (HISTORY_BACKEND = "series")
+# bench:  compression ratio and encode / decode throughput of the Gorilla-style codec on a recorded data log
+# info:   blocks, time range and size of a <date>_PLC_Series.series file
+# export: .series file -> csv in the data log layout (value + quality column per parameter), e.g. for PlcLogAnalyzer.py
+# Usage: python PlcSeriesTool.py bench <data log csv> [block rows]
+#        python PlcSeriesTool.py info <file.series>
+#        python PlcSeriesTool.py export <file.series> <out.csv> [parameter,parameter,...]
+
+# ---------- Code Starts ----------
+# ----- Importing Libraries -----
+import sys  # For command line arguments
+import os  # For file sizes
+import time  # For throughput measurement
+import numpy as np  # For value matrices
+import PymodbusV3Final as v3  # Codec and series file format
+from PlcLogAnalyzer import read_log_chunks, value_columns  # Reading data logs of every layout
+
+# ---------- Configuration Information ----------
+QUALITY_SUFFIX = v3.QUALITY_SUFFIX
+
+# ----- Whole data log -> (timestamps ns, parameter names, values matrix, quality matrix) -----
+def load_data_log(path):
+    chunks = list(read_log_chunks(path))
+    log = chunks[0] if len(chunks) == 1 else v3.pd.concat(chunks, ignore_index=True)
+    values = value_columns(log)
+    names = list(values.columns)
+    quality_names = [name + QUALITY_SUFFIX for name in names]
+    if all(name in log.columns for name in quality_names):
+        quality = log[quality_names].fillna(v3.QUALITY_COMM_FAIL).to_numpy(dtype=np.uint8)
+    else:  # Logs before quality codes
+        quality = np.zeros(values.shape, dtype=np.uint8)
+    timestamps = log['Timestamp'].to_numpy(dtype='datetime64[ms]').astype(np.int64) * 1_000_000
+    return timestamps, names, values.to_numpy(dtype=np.float64), quality
+
+# ----- Ratio & throughput on recorded data, with a lossless round-trip check -----
+def bench(path, block_rows=v3.SERIES_BLOCK_ROWS):
+    timestamps, names, values, quality = load_data_log(path)
+    rows, count = values.shape
+    print(f"[INFO] {rows} samples x {count} parameters from {path}")
+    payloads = []
+    start = time.perf_counter()
+    for first in range(0, rows, block_rows):
+        last = first + block_rows
+        payloads.append((min(block_rows, rows - first),
+                         v3.encode_series_block(timestamps[first:last], values[first:last], quality[first:last])))
+    encode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoded = [v3.decode_series_block(payload, block, range(count)) for block, payload in payloads]
+    decode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for block, payload in payloads:
+        v3.decode_series_block(payload, block, [0])
+    column_seconds = time.perf_counter() - start
+
+    lossless = (np.array_equal(np.concatenate([d[0] for d in decoded]), timestamps // 1_000_000 * 1_000_000) and
+                all(np.array_equal(np.concatenate([d[1][c] for d in decoded]), values[:, c], equal_nan=True) and
+                    np.array_equal(np.concatenate([d[2][c] for d in decoded]), quality[:, c]) for c in range(count)))
+    compressed = sum(len(payload) for _, payload in payloads)
+    samples = rows * count
+    print(f"{'Encoding':<34}{'Bytes':>12}{'Bytes/sample':>14}{'Ratio':>8}")
+    for label, size in [("float64 + int64 time + u1 quality", rows * 8 + samples * 9),
+                        ("float32 columns (mmap history)", rows * 8 + samples * 5),
+                        ("csv data log", os.path.getsize(path)),
+                        ("compressed series", compressed)]:
+        print(f"{label:<34}{size:>12}{size / samples:>14.2f}{(rows * 8 + samples * 9) / size:>8.1f}")
+    print(f"[INFO] Encode {samples / encode_seconds / 1e6:.2f} M values/s, "
+          f"decode {samples / decode_seconds / 1e6:.2f} M values/s, "
+          f"one column of one block {column_seconds / len(payloads) * 1e3:.2f} ms ({block_rows} rows)")
+    print(f"[INFO] Round trip {'lossless' if lossless else 'NOT lossless'}")
+    return lossless
+
+def info(path):
+    names, blocks = v3.read_series_file(path)
+    rows = sum(block[2] for block in blocks)
+    print(f"[INFO] {path}: {len(names)} parameters, {len(blocks)} blocks, {rows} samples, "
+          f"{os.path.getsize(path)} bytes ({os.path.getsize(path) / max(rows * len(names), 1):.2f} bytes/sample)")
+    if blocks:
+        print(f"[INFO] {v3.format_timestamp(blocks[0][0])} -> {v3.format_timestamp(blocks[-1][1])}")
+
+# ----- Decoding block by block and writing csv rows in the data log layout -----
+def export(path, out_path, selected=None):
+    names, blocks = v3.read_series_file(path)
+    selected = selected or names
+    columns = [names.index(name) for name in selected]
+    schema = v3.CsvSchema(selected, [v3.DEFAULT_DECIMALS] * len(selected), "wide", "local")
+    with open(out_path, 'w', newline='') as f:
+        f.write(schema.header)
+        for _, _, rows, payload in blocks:
+            timestamps, values, quality = v3.decode_series_block(payload, rows, columns)
+            value_matrix = np.column_stack([values[c] for c in columns])
+            quality_matrix = np.column_stack([quality[c] for c in columns])
+            f.write("".join(schema.format_row(int(t), value_matrix[i], quality_matrix[i])
+                            for i, t in enumerate(timestamps.tolist())))
+    print(f"[INFO] Exported {sum(block[2] for block in blocks)} samples of {len(selected)} parameters to {out_path}")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("bench", "info", "export"):
+        print("Usage: python PlcSeriesTool.py bench <data log csv> [block rows] | info <file.series> | "
+              "export <file.series> <out.csv> [parameter,...]")
+        sys.exit(1)
+    if sys.argv[1] == "bench":
+        ok = bench(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else v3.SERIES_BLOCK_ROWS)
+        sys.exit(0 if ok else 1)
+    elif sys.argv[1] == "info":
+        info(sys.argv[2])
+    else:
+        export(sys.argv[2], sys.argv[3], sys.argv[4].split(",") if len(sys.argv) > 4 else None)
@@ -0,0 +1,263 @@
+# Simulated PLC for testing the V3 reader without real hardware
+# Register image is built from the same input csv as PymodbusV3Final.py (Parameter, Address, Range)
+# Analog parameters follow slow sine waves inside their Range, bits toggle with different periods
+# Can be used in-process (SimulatedModbusClient) or as a real Modbus server (python PlcSimulator.py)
+# Server transports: tcp (Modbus TCP), rtu-tcp (RTU frames over TCP, like a serial gateway) and
+# rtu (serial RTU on a virtual serial port pair, POSIX only, no parity)
+# Usage: python PlcSimulator.py [parameter csv] [port] [tcp|rtu-tcp|rtu]
+
+# ---------- Code Starts ----------
+# ----- Importing Libraries -----
+import os  # For virtual serial port pair (pseudo terminals)
+import sys  # For command line arguments
+import select  # For bridging the virtual serial port pair
+import time  # For simulated time and update interval
+import threading  # For updating the register image in background
+import numpy as np  # For register image and waveforms
+import PymodbusV3Final as v3  # For setting up the reader in the test tools (setup_v3)
+from pymodbus.datastore import ModbusSequentialDataBlock, ModbusSlaveContext, ModbusServerContext  # For TCP server
+from pymodbus.server import StartTcpServer, StartSerialServer  # For Modbus TCP and RTU servers
+from pymodbus import FramerType  # For RTU framing
+from PymodbusV3Final import (load_parameter_info, FC_READ_COILS, FC_READ_DISCRETE_INPUTS,
+                             FC_READ_HOLDING_REGISTERS, FC_READ_INPUT_REGISTERS, BIT_FUNCTIONS, DATA_TYPES,
+                             FC_VIRTUAL)
+
+# ---------- Configuration Information ----------
+SIM_IP = '127.0.0.1'  # Address the simulator listens on
+SIM_PORT = 5020  # Non-privileged port (502 needs admin rights)
+UPDATE_INTERVAL = 0.1  # Seconds between waveform updates of the TCP server
+ADDRESS_SPACE = 65536  # Size of every Modbus data area
+UNMAPPED_RANGES = []  # (function, first address, last address) answering illegal data address, e.g. [(3, 1410, 1419)]
+
+# ----- Register image of the simulated PLC -----
+class SimulatedPlc:
+    def __init__(self, df_params, seed=0, unmapped=UNMAPPED_RANGES):
+        rng = np.random.default_rng(seed)
+        self.unmapped = list(unmapped)
+        self.memory = {FC_READ_COILS: np.zeros(ADDRESS_SPACE, dtype=bool),
+                       FC_READ_DISCRETE_INPUTS: np.zeros(ADDRESS_SPACE, dtype=bool),
+                       FC_READ_HOLDING_REGISTERS: np.zeros(ADDRESS_SPACE, dtype=np.uint16),
+                       FC_READ_INPUT_REGISTERS: np.zeros(ADDRESS_SPACE, dtype=np.uint16)}
+        self.lock = threading.Lock()
+        analog = df_params[~df_params['Function'].isin(BIT_FUNCTIONS + (FC_VIRTUAL,))]  # Calculated tags have no registers
+        bits = df_params[df_params['Function'].isin(BIT_FUNCTIONS)]
+        self.analog_functions = analog['Function'].to_numpy()
+        self.analog_addresses = analog['Address'].to_numpy()
+        self.analog_types = analog['Type'].to_numpy()
+        self.scale = analog['Scale'].to_numpy(dtype=float)
+        self.offset = analog['Offset'].to_numpy(dtype=float)
+        self.centre = ((analog['Min'] + analog['Max']) / 2).to_numpy()
+        self.amplitude = ((analog['Max'] - analog['Min']) * 0.4).to_numpy()
+        self.noise = ((analog['Max'] - analog['Min']) * 0.005).to_numpy()
+        self.periods = rng.uniform(30, 600, len(analog))  # Seconds per sine period of each parameter
+        self.phases = rng.uniform(0, 2 * np.pi, len(analog))
+        self.bit_functions = bits['Function'].to_numpy()
+        self.bit_addresses = bits['Address'].to_numpy()
+        self.bit_periods = rng.uniform(5, 120, len(bits))
+        self.rng = rng
+        self.update(0.0)
+
+    # Writing the waveform values for simulated time t (seconds) into the register image
+    def update(self, t):
+        values = self.centre + self.amplitude * np.sin(2 * np.pi * t / self.periods + self.phases)
+        values += self.rng.normal(0, 1, len(values)) * self.noise
+        raw = (values - self.offset) / self.scale  # Engineering units -> raw value of the Type
+        bit_values = (t // self.bit_periods) % 2 == 1
+        with self.lock:
+            for data_type, (registers, raw_type, _) in DATA_TYPES.items():
+                typed = self.analog_types == data_type
+                if not typed.any():
+                    continue
+                raw_values = raw[typed] if raw_type == np.float32 else np.rint(raw[typed])
+                words = raw_values.astype(raw_type).astype(raw_type().dtype.newbyteorder('>')).view('>u2')
+                words = words.reshape(-1, registers)  # High word first
+                for function in (FC_READ_HOLDING_REGISTERS, FC_READ_INPUT_REGISTERS):
+                    selected = self.analog_functions[typed] == function
+                    addresses = self.analog_addresses[typed][selected]
+                    for word in range(registers):
+                        self.memory[function][addresses + word] = words[selected, word]
+            for function in BIT_FUNCTIONS:
+                selected = self.bit_functions == function
+                self.memory[function][self.bit_addresses[selected]] = bit_values[selected]
+
+    # False if the request touches an unmapped range (a real PLC answers with exception 2)
+    def is_mapped(self, function, address, count):
+        return not any(f == function and address <= last and first < address + count
+                       for f, first, last in self.unmapped)
+
+    def read(self, function, address, count):
+        with self.lock:
+            return self.memory[function][address:address + count].tolist()
+
+    def write(self, function, address, values):
+        with self.lock:
+            self.memory[function][address:address + len(values)] = values
+
+# ----- Response object with the attributes the reader uses from pymodbus responses -----
+class SimulatedResponse:
+    def __init__(self, registers=None, bits=None, exception_code=None):
+        self.registers = registers or []
+        self.bits = bits or []
+        self.exception_code = exception_code
+
+    def isError(self):
+        return self.exception_code is not None
+
+# ----- In-process stand-in for ModbusTcpClient (no network, optional delay per request and per register / bit) -----
+class SimulatedModbusClient:
+    def __init__(self, plc, request_delay=0.0, item_delay=0.0):
+        self.plc = plc
+        self.request_delay = request_delay
+        self.item_delay = item_delay
+        self.request_count = 0
+
+    def connect(self):
+        return True
+
+    def close(self):
+        pass
+
+    def _read(self, function, address, count):
+        self.request_count += 1
+        if self.request_delay or self.item_delay:
+            time.sleep(self.request_delay + self.item_delay * count)
+        if not self.plc.is_mapped(function, address, count):
+            return SimulatedResponse(exception_code=2)  # Illegal data address
+        values = self.plc.read(function, address, count)
+        if function in BIT_FUNCTIONS:
+            return SimulatedResponse(bits=values + [False] * (-count % 8))  # Padded to full bytes like pymodbus
+        return SimulatedResponse(registers=values)
+
+    def read_coils(self, address, count=1, **kwargs):
+        return self._read(FC_READ_COILS, address, count)
+
+    def read_discrete_inputs(self, address, count=1, **kwargs):
+        return self._read(FC_READ_DISCRETE_INPUTS, address, count)
+
+    def read_holding_registers(self, address, count=1, **kwargs):
+        return self._read(FC_READ_HOLDING_REGISTERS, address, count)
+
+    def read_input_registers(self, address, count=1, **kwargs):
+        return self._read(FC_READ_INPUT_REGISTERS, address, count)
+
+    def write_registers(self, address, values, **kwargs):
+        self.request_count += 1
+        self.plc.write(FC_READ_HOLDING_REGISTERS, address, values)
+        return SimulatedResponse()
+
+# ----- Setting up PymodbusV3Final like its main block does, for the test tools (files go to the working folder) -----
+# log_name: "<log_name>_PLC_Data_log.csv" is created, with sample journal, statistics and rollups when analysis is True
+# (log_name None = no log files); simulated: the in-process SimulatedModbusClient is connected (False = the tool
+# connects to a simulator server itself). Returns the SimulatedPlc, whose update(t) moves the waveforms
+def setup_v3(csv_path, log_name=None, analysis=True, simulated=True):
+    v3.df_params = load_parameter_info(csv_path)
+    if log_name:
+        v3.log_file_path = f"{log_name}_PLC_Data_log.csv"
+        v3.create_log_file(v3.log_file_path, v3.df_params['Parameter'].tolist())
+    v3.initialize_parameter_data()
+    if log_name and analysis:
+        v3.sample_journal = v3.SampleJournal(v3.JOURNAL_FILE, v3.log_file_path)
+        v3.initialize_statistics(v3.log_file_path)
+        v3.initialize_rollups(v3.log_file_path)
+    if not simulated:
+        return None
+    plc = SimulatedPlc(v3.df_params)
+    v3.plc_client = SimulatedModbusClient(plc)
+    v3.is_connected, v3.connection_status = True, "Connected"
+    return plc
+
+# ----- pymodbus data block reading from / writing to the SimulatedPlc image -----
+class SimulatedDataBlock(ModbusSequentialDataBlock):
+    def __init__(self, plc, function):
+        super().__init__(0, [0])
+        self.plc = plc
+        self.function = function
+
+    def validate(self, address, count=1):
+        return 1 <= address and address - 1 + count <= ADDRESS_SPACE
+
+    def getValues(self, address, count=1):
+        if not self.plc.is_mapped(self.function, address - 1, count):
+            return 2  # pymodbus answers an int with that exception code (illegal data address)
+        return self.plc.read(self.function, address - 1, count)  # Slave context adds 1 to every address
+
+    def setValues(self, address, values):
+        if not isinstance(values, list):
+            values = [values]
+        self.plc.write(self.function, address - 1, values)
+
+# ----- Server context on top of the SimulatedPlc, with the waveforms updated in background -----
+def start_server_context(plc):
+    def update_worker():
+        start = time.monotonic()
+        while True:
+            plc.update(time.monotonic() - start)
+            time.sleep(UPDATE_INTERVAL)
+
+    threading.Thread(target=update_worker, daemon=True).start()
+    slave = ModbusSlaveContext(di=SimulatedDataBlock(plc, FC_READ_DISCRETE_INPUTS),
+                               co=SimulatedDataBlock(plc, FC_READ_COILS),
+                               hr=SimulatedDataBlock(plc, FC_READ_HOLDING_REGISTERS),
+                               ir=SimulatedDataBlock(plc, FC_READ_INPUT_REGISTERS))
+    return ModbusServerContext(slaves=slave, single=True)
+
+# ----- Real Modbus TCP server on top of the SimulatedPlc (blocking), rtu=True frames it like a RTU gateway -----
+def run_tcp_server(plc, host=SIM_IP, port=SIM_PORT, rtu=False):
+    context = start_server_context(plc)
+    print(f"[INFO] Simulated PLC listening on {host}:{port}" + (" (RTU over TCP)" if rtu else ""))
+    StartTcpServer(context=context, address=(host, port), framer=FramerType.RTU if rtu else FramerType.SOCKET)
+
+# ----- Modbus RTU server on a serial port (blocking) -----
+def run_serial_server(plc, port_name, baudrate=19200, parity='E', stopbits=1):
+    context = start_server_context(plc)
+    print(f"[INFO] Simulated PLC answering RTU requests on {port_name} @ {baudrate} baud")
+    StartSerialServer(context=context, framer=FramerType.RTU, port=port_name, baudrate=baudrate,
+                      bytesize=8, parity=parity, stopbits=stopbits)
+
+# ----- Virtual serial cable: two pseudo terminals with the bytes copied between them (POSIX only) -----
+# Returns (server port, client port), e.g. ('/dev/pts/3', '/dev/pts/4')
+def create_virtual_serial_pair():
+    import tty  # POSIX only, imported here so the simulator still runs on Windows
+    ends = []
+    for _ in range(2):
+        master, slave = os.openpty()
+        tty.setraw(slave)  # No echo / line editing, binary frames pass unchanged
+        ends.append((master, slave, os.ttyname(slave)))
+
+    def bridge_worker():
+        masters = [ends[0][0], ends[1][0]]
+        while True:
+            readable, _, _ = select.select(masters, [], [])
+            for fd in readable:
+                try:
+                    data = os.read(fd, 1024)
+                except OSError:  # Other side not opened yet / closed
+                    time.sleep(0.01)
+                    continue
+                os.write(masters[1] if fd == masters[0] else masters[0], data)
+
+    threading.Thread(target=bridge_worker, daemon=True).start()
+    return ends[0][2], ends[1][2]
+
+# ----- Process entry point for tools that start the simulator in the background -----
+def serve_csv(csv_path, host=SIM_IP, port=SIM_PORT, rtu=False):
+    run_tcp_server(SimulatedPlc(load_parameter_info(csv_path)), host, port, rtu)
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "Variables.csv"
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else SIM_PORT
+    transport = sys.argv[3] if len(sys.argv) > 3 else "tcp"
+    df_params = load_parameter_info(csv_path)
+    if df_params is None:
+        print("[ERROR] Failed to load parameter configuration. Exiting.")
+        sys.exit(1)
+    print(f"[INFO] Simulating {len(df_params)} parameters from {csv_path}")
+    try:
+        if transport == "rtu":
+            server_port, client_port = create_virtual_serial_pair()
+            print(f"[INFO] Connect the reader with transport RTU to serial port {client_port} (set PARITY = 'N')")
+            run_serial_server(SimulatedPlc(df_params), server_port, parity='N')  # Pseudo terminals reject parity bits
+        else:
+            run_tcp_server(SimulatedPlc(df_params), SIM_IP, port, rtu=transport == "rtu-tcp")
+    except KeyboardInterrupt:
+        print("\n[INFO] Simulator stopped by user.")
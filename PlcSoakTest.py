@@ -0,0 +1,203 @@
+# Long-duration soak test for PymodbusV3Final.py
+# Drives the full acquisition -> csv / journal / statistics / rollups / history -> live plot pipeline against the
+# simulated PLC (PlcSimulator.py) on an accelerated virtual clock, so a week of 1 Hz sampling runs in minutes.
+# Parameters are switched on and off the plot every virtual hour to exercise the plot segments.
+# Every virtual hour it samples anonymous RSS, tracemalloc and the wall time per cycle; over the second half of the
+# run (at least after the warm-up) it fits a trend line through them and fails (exit code 1) if memory or cycle time
+# keeps growing. One-off allocations early in the run are left out, so the verdict does not depend on run length.
+# Before the run it checks that NaN / Inf values do not poison the rolling statistics windows.
+# Usage: python PlcSoakTest.py [parameter csv] [days] [cycles per plot]
+
+# ---------- Code Starts ----------
+# ----- Importing Libraries -----
+import sys  # For command line arguments and exit code
+import os  # For temporary working folder
+import time  # For wall time per cycle
+import tempfile  # For log files of the soak run
+import tracemalloc  # For Python allocations and their top growth sites
+import contextlib  # For silencing the per-window prints of V3
+from datetime import timedelta  # For virtual wall clock
+import numpy as np  # For trend lines
+import matplotlib
+matplotlib.use('Agg')  # Off-screen rendering, same drawing cost without a window
+import matplotlib.pyplot as plt  # For the live plot axes
+import PymodbusV3Final as v3  # Pipeline under test
+import PlcSimulator  # Simulated PLC (in-process client)
+
+# ---------- Configuration Information ----------
+REPORT_INTERVAL = 3600  # Virtual seconds between memory / cycle time samples
+WARMUP_HOURS = 6  # Rolling windows, rollups, plot window and matplotlib caches fill up first (not part of the trend)
+TREND_FRACTION = 0.5  # Trend lines are fitted over this last fraction of the run (never before WARMUP_HOURS)
+MEMORY_GROWTH_LIMIT = 2.0  # MB per virtual day of anonymous RSS or traced Python memory
+CYCLE_GROWTH_LIMIT = 0.25  # Allowed rise of cycle time over the run (fraction of its mean)
+TOP_ALLOCATORS = 5  # Growth sites printed per report
+
+# ----- Virtual clock: stands still until the soak loop advances it by one sample interval -----
+class VirtualClock:
+    def __init__(self):
+        self.start_ns = time.monotonic_ns()
+        self.start_wall = v3.datetime.now()
+        self.ns = self.start_ns
+
+    def advance(self, seconds):
+        self.ns += int(seconds * 1e9)
+
+    def monotonic_ns(self):
+        return self.ns
+
+    def monotonic(self):
+        return self.ns / 1e9
+
+    def now(self):
+        return self.start_wall + timedelta(microseconds=(self.ns - self.start_ns) // 1000)
+
+    def elapsed(self):
+        return (self.ns - self.start_ns) / 1e9
+
+# ----- Stand-in for the Tk checkbox variables of the parameter list -----
+class CheckboxState:
+    def __init__(self):
+        self.value = False
+
+    def get(self):
+        return self.value
+
+# ----- Anonymous resident memory in MB (heap, NumPy buffers; not the file-backed history pages) -----
+def anonymous_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None  # Not Linux: the trend uses tracemalloc only
+
+# ----- Slope of a trend line in units per virtual day -----
+def trend_per_day(hours, values):
+    if len(values) < 3:
+        return 0.0
+    return np.polyfit(np.asarray(hours), np.asarray(values), 1)[0] * 24
+
+# ----- Setting up V3 like the main block does, with the simulated PLC already connected -----
+def setup_pipeline(csv_path):
+    plc = PlcSimulator.setup_v3(csv_path, "soak")
+    if v3.HISTORY_BACKEND == "series":
+        v3.history_store = v3.SeriesHistoryStore("soak_PLC_Series.series", v3.df_params['Parameter'])
+    else:
+        v3.history_store = v3.HistoryStore("soak_PLC_History", v3.df_params['Parameter'])
+    v3.acquisition_ring = v3.SharedSampleRing(v3.df_params['Parameter'])  # Acquisition and plot steps meet here
+    fig, v3.ax_left = plt.subplots(figsize=(14, 8))
+    v3.ax_right = v3.ax_left.twinx()
+    v3.canvas = fig.canvas
+    v3.left_checkboxes = {name: CheckboxState() for name in v3.parameter_data}
+    return plc
+
+def toggle_parameter(name):
+    v3.left_checkboxes[name].value = not v3.left_checkboxes[name].value
+    v3.on_left_checkbox_change(name)
+
+# ----- NaN / Inf fed into the statistics must not stay in the windows (mean, min, max and count against NumPy) -----
+def check_statistics_non_finite():
+    values = [1.0, 2.0, np.nan, 3.0, np.inf, -np.inf, 4.0, 8.0, np.nan, 0.5]
+    stats = v3.TagStatistics("check", 0.0, 10.0)
+    short = v3.RollingWindow(3.0)  # Samples leave this window again while the test runs
+    ok = True
+    for second, value in enumerate(values):
+        stats.update(float(second), value)
+        short.add(float(second), value)
+        for window, inside in [(stats.windows[0], values[:second + 1]), (short, values[max(0, second - 2):second + 1])]:
+            inside = np.array(inside)[np.isfinite(inside)]
+            snap = window.snapshot()
+            if not len(inside):
+                ok &= snap is None
+            else:
+                ok &= snap is not None and np.allclose([snap['mean'], snap['min'], snap['max'], snap['count']],
+                                                       [inside.mean(), inside.min(), inside.max(), len(inside)])
+    ok &= stats.alarm == "NORMAL"
+    print(f"[{'INFO' if ok else 'ERROR'}] Statistics windows skip NaN / Inf values: {'PASS' if ok else 'FAIL'}")
+    return ok
+
+# ----- Running the soak for a number of virtual days; returns True if no upward trend was found -----
+def run_soak(csv_path, days, plot_every):
+    clock = VirtualClock()
+    v3.clock = clock
+    plc = setup_pipeline(csv_path)
+    names = list(v3.parameter_data)
+    for name in names[:len(names) // 2 + 1]:
+        toggle_parameter(name)
+    period = v3.INTERVAL / 1000
+    cycles = int(days * 86400 / period)
+    report_cycles = int(REPORT_INTERVAL / period)
+    trend_start = max(WARMUP_HOURS, days * 24 * (1 - TREND_FRACTION))
+    tracemalloc.start()
+    baseline = None
+    hours, rss, traced, cycle_ms = [], [], [], []
+    window_start = time.perf_counter()
+    print(f"[INFO] Soak: {days:g} virtual days, {cycles} cycles of {period:g} s, plot every {plot_every} cycles, "
+          f"{len(names)} parameters, history backend {v3.HISTORY_BACKEND}")
+    print(f"{'Hour':>6}{'Cycle ms':>10}{'RSS anon MB':>13}{'Traced MB':>11}{'Log MB':>9}")
+    with open(os.devnull, 'w') as devnull:
+        for cycle in range(1, cycles + 1):
+            clock.advance(period)
+            plc.update(clock.elapsed())
+            with contextlib.redirect_stdout(devnull):
+                # Acquisition step (as in run_acquisition_loop), then the GUI step consuming the ring
+                values, stamps, quality = v3.read_plc_data()
+                v3.acquisition_ring.push(values, stamps, quality, v3.is_connected, v3.connection_status)
+                v3.execute_pending_writes()
+                if cycle % plot_every == 0:
+                    v3.update_plot(cycle)
+                if cycle % report_cycles == 0 and (cycle // report_cycles) % 2 == 0:
+                    toggle_parameter(names[(cycle // report_cycles) % len(names)])
+            if cycle % report_cycles:
+                continue
+            hour = clock.elapsed() / 3600
+            elapsed_ms = (time.perf_counter() - window_start) * 1000 / report_cycles
+            if hour >= trend_start and baseline is None:  # Before measuring, the snapshot itself holds ~10 MB
+                baseline = tracemalloc.take_snapshot()
+            current_rss = anonymous_rss_mb()
+            current_traced = tracemalloc.get_traced_memory()[0] / 2**20
+            print(f"{hour:>6.0f}{elapsed_ms:>10.3f}{current_rss or 0:>13.1f}{current_traced:>11.2f}"
+                  f"{os.path.getsize(v3.log_file_path) / 2**20:>9.1f}", flush=True)
+            if hour >= trend_start:
+                hours.append(hour)
+                rss.append(current_rss)
+                traced.append(current_traced)
+                cycle_ms.append(elapsed_ms)
+            window_start = time.perf_counter()
+
+    # ----- Trend verdicts -----
+    growth = tracemalloc.take_snapshot().compare_to(baseline, 'lineno') if baseline else []
+    tracemalloc.stop()
+    print(f"[INFO] Top {TOP_ALLOCATORS} allocation growth sites since hour {trend_start:g} (start of the trend fit):")
+    for stat in growth[:TOP_ALLOCATORS]:
+        print(f"    {stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} blocks  {stat.traceback}")
+    ok = True
+    checks = [("Traced Python memory", trend_per_day(hours, traced), "MB/day", MEMORY_GROWTH_LIMIT)]
+    if all(value is not None for value in rss):
+        checks.append(("Anonymous RSS", trend_per_day(hours, rss), "MB/day", MEMORY_GROWTH_LIMIT))
+    if cycle_ms:
+        rise = trend_per_day(hours, cycle_ms) * (hours[-1] - hours[0]) / 24 / np.mean(cycle_ms)
+        checks.append(("Cycle time rise over the run", rise * 100, "%", CYCLE_GROWTH_LIMIT * 100))
+    for label, value, unit, limit in checks:
+        passed = value <= limit
+        ok &= passed
+        print(f"[{'INFO' if passed else 'ERROR'}] {label}: {value:+.3f} {unit} (limit {limit:g}) -> "
+              f"{'PASS' if passed else 'FAIL'}")
+    v3.history_store.flush()
+    v3.flush_csv_buffer()
+    v3.flush_rollups()
+    v3.sample_journal.close()
+    v3.acquisition_ring.close()
+    return ok
+
+if __name__ == "__main__":
+    csv_path = os.path.abspath(sys.argv[1] if len(sys.argv) > 1 else "Variables.csv")
+    days = float(sys.argv[2]) if len(sys.argv) > 2 else 7
+    plot_every = int(sys.argv[3]) if len(sys.argv) > 3 else 600
+    os.chdir(tempfile.mkdtemp(prefix="plc_soak_"))
+    ok = check_statistics_non_finite()
+    ok &= run_soak(csv_path, days, plot_every)
+    print(f"[INFO] Logs written to {os.getcwd()}")
+    sys.exit(0 if ok else 1)
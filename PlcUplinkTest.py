@@ -0,0 +1,167 @@
+# Store-and-forward test of the MQTT uplink of PymodbusV3Final.py
+# Polls the simulated PLC (PlcSimulator.py) at a fast rate with the uplink sink attached and takes the broker away
+# on purpose: an outage (broker unreachable), then a stall (broker accepts the connection but never acknowledges).
+# Checks that polling keeps its cycle time in every phase, that batches are spooled during the problems and drained
+# at the configured rate afterwards, and that every sample reaches the broker exactly once and in order.
+# By default the broker is an in-process stand-in; give host:port to publish to a real broker (paho-mqtt) instead,
+# then only the poll side is checked.
+# Usage: python PlcUplinkTest.py [parameter csv] [seconds] [host:port]
+
+# ---------- Code Starts ----------
+# ----- Importing Libraries -----
+import sys  # For command line arguments and exit code
+import os  # For temporary working folder
+import time  # For phases and cycle times
+import tempfile  # For log files and spool of the test
+import threading  # For the stand-in broker state
+import contextlib  # For silencing the per-sample prints of V3
+import numpy as np  # For cycle time statistics and payload checks
+import PymodbusV3Final as v3  # Uplink under test
+import PlcSimulator  # Simulated PLC (in-process client)
+
+# ---------- Configuration Information ----------
+POLL_INTERVAL = 0.02  # Seconds per poll cycle (50 Hz, a batch of 50 samples per second)
+BATCH_SAMPLES = 50
+BATCH_LATENCY = 2.0
+DRAIN_RATE = 4  # Batches per second, low so the drain is visible
+PHASES = [("normal", 0.2), ("outage", 0.25), ("recovering", 0.15), ("stall", 0.1), ("drain", 0.3)]  # Fractions of the run
+CYCLE_LIMIT_MS = 20.0  # Worst poll cycle allowed in any phase (waiting on the broker would cost >= 1 s)
+
+# ----- In-process stand-in for the broker: records acknowledged messages, can be taken offline or stalled -----
+class SimulatedBroker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.messages = []  # (receive time, topic, payload) of acknowledged batches
+        self.retained = {}
+        self.online = True
+        self.stall = False
+        self.connected = False
+
+    def connect(self):
+        self.connected = self.online and not self.stall
+        return self.connected
+
+    def is_connected(self):
+        return self.connected
+
+    def publish(self, topic, payload, retain=False):
+        if self.stall:
+            time.sleep(v3.UPLINK_PUBLISH_TIMEOUT)  # No acknowledgement until the publish timeout
+        if not self.online or self.stall:
+            self.connected = False
+            return False
+        with self.lock:
+            if retain:
+                self.retained[topic] = payload
+            else:
+                self.messages.append((time.monotonic(), topic, payload))
+        return True
+
+    def close(self):
+        self.connected = False
+
+def cycle_summary(cycle_ms):
+    cycle_ms = np.asarray(cycle_ms)
+    return f"{len(cycle_ms):>8}{np.median(cycle_ms):>9.3f}{np.percentile(cycle_ms, 99):>9.3f}{cycle_ms.max():>9.3f}"
+
+# ----- Polling with the uplink attached through all phases; returns True if every check passed -----
+def run_test(csv_path, seconds, broker_address=None):
+    v3.UPLINK_BATCH_SAMPLES, v3.UPLINK_BATCH_LATENCY, v3.UPLINK_DRAIN_RATE = BATCH_SAMPLES, BATCH_LATENCY, DRAIN_RATE
+    v3.UPLINK_RETRY_INTERVAL, v3.UPLINK_PUBLISH_TIMEOUT = 1, 1
+    plc = PlcSimulator.setup_v3(csv_path, "uplink")
+    if broker_address:
+        host, port = broker_address.rsplit(':', 1)
+        broker = None
+        v3.start_uplink(v3.MqttPublisher(host, int(port)))
+    else:
+        broker = SimulatedBroker()
+        v3.start_uplink(broker)
+    if v3.uplink is None:
+        return False
+
+    sent_rows = []  # (row ns, value vector) of every sample handed to the uplink
+    phase_cycles = {name: [] for name, _ in PHASES}
+    phase_ends, elapsed = [], 0.0
+    for name, fraction in PHASES:
+        elapsed += fraction * seconds
+        phase_ends.append((name, elapsed))
+    drain_started = None
+    start = time.monotonic()
+    next_cycle = start
+    print(f"[INFO] Polling {len(v3.df_params)} parameters every {POLL_INTERVAL * 1000:.0f} ms for {seconds:g} s, "
+          f"batches of {BATCH_SAMPLES} samples, drain {DRAIN_RATE} batches/s")
+    with open(os.devnull, 'w') as devnull:
+        for name, end in phase_ends:
+            if broker is not None:
+                broker.online = name not in ("outage",)
+                broker.stall = name == "stall"
+            if name in ("recovering", "drain"):
+                drain_started = time.monotonic()
+            while time.monotonic() - start < end:
+                plc.update(time.monotonic() - start)
+                cycle_start = time.perf_counter()
+                with contextlib.redirect_stdout(devnull):
+                    values, stamps, quality = v3.read_plc_data()
+                phase_cycles[name].append((time.perf_counter() - cycle_start) * 1000)
+                sent_rows.append((int(stamps.min()), np.array([np.nan if values[p] is None else values[p]
+                                                               for p in v3.df_params['Parameter']])))
+                next_cycle += POLL_INTERVAL
+                time.sleep(max(next_cycle - time.monotonic(), 0))
+        spooled_at_end = len(v3.uplink.spool_files)
+        deadline = time.monotonic() + spooled_at_end / DRAIN_RATE + 10
+        while broker is not None and v3.uplink.spool_files and time.monotonic() < deadline:
+            time.sleep(0.1)  # Let the drain finish before closing
+        stats = dict(v3.uplink.stats)
+        v3.stop_uplink()
+        v3.flush_csv_buffer()
+        v3.sample_journal.close()
+
+    print(f"{'Phase':<12}{'Cycles':>8}{'P50 ms':>9}{'P99 ms':>9}{'Max ms':>9}")
+    ok = True
+    for name, _ in PHASES:
+        if phase_cycles[name]:
+            print(f"{name:<12}{cycle_summary(phase_cycles[name])}")
+            ok &= max(phase_cycles[name]) <= CYCLE_LIMIT_MS
+    print(f"[INFO] {stats['samples']} samples in {stats['sent']} live + {stats['drained']} drained batches, "
+          f"{stats['spooled']} spooled, {stats['dropped']} dropped, {spooled_at_end} still spooled when polling stopped")
+    print(f"[INFO] Payload {stats['payload_bytes'] / max(stats['samples'], 1):.0f} bytes per sample "
+          f"({stats['payload_bytes'] / max(stats['raw_bytes'], 1) * 100:.0f}% of float64 + int64 time + uint8 quality)")
+    print(f"[{'INFO' if ok else 'ERROR'}] Worst poll cycle within {CYCLE_LIMIT_MS} ms in every phase: "
+          f"{'PASS' if ok else 'FAIL'}")
+    alive = stats['sender_alive'] and not stats['errors']
+    print(f"[{'INFO' if alive else 'ERROR'}] Sender thread alive with {stats['errors']} errors: "
+          f"{'PASS' if alive else 'FAIL'}")
+    ok &= alive
+    if broker is None:
+        return ok
+
+    # ----- Delivery checks on the stand-in broker -----
+    decoded = [v3.decode_uplink_batch(payload) for _, _, payload in broker.messages]
+    received_ns = np.concatenate([timestamps for timestamps, _, _ in decoded])
+    received_values = np.concatenate([values for _, values, _ in decoded])
+    expected_ns = np.array([row_ns // 1_000_000 * 1_000_000 for row_ns, _ in sent_rows])
+    expected_values = np.array([vector for _, vector in sent_rows], dtype=np.float32)
+    complete = np.array_equal(received_ns, expected_ns) and np.array_equal(received_values, expected_values,
+                                                                           equal_nan=True)
+    print(f"[{'INFO' if complete else 'ERROR'}] {len(received_ns)} of {len(expected_ns)} samples received exactly once "
+          f"and in order: {'PASS' if complete else 'FAIL'}")
+    received_times = np.array([received for received, _, _ in broker.messages
+                               if drain_started is not None and received >= drain_started])
+    if len(received_times):
+        peak = max(np.searchsorted(received_times, t + 1.0) - i for i, t in enumerate(received_times))
+        bounded = peak <= DRAIN_RATE + 1  # Drain budget plus the live batch of that second
+        print(f"[{'INFO' if bounded else 'ERROR'}] Most batches in one second after the outage: {peak} "
+              f"(drain {DRAIN_RATE} + live): {'PASS' if bounded else 'FAIL'}")
+        ok &= bounded
+    schema = v3.UPLINK_TOPIC + "/schema" in broker.retained
+    print(f"[{'INFO' if schema else 'ERROR'}] Retained schema message: {'PASS' if schema else 'FAIL'}")
+    return ok and complete and schema
+
+if __name__ == "__main__":
+    csv_path = os.path.abspath(sys.argv[1] if len(sys.argv) > 1 else "Variables.csv")
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 40
+    broker_address = sys.argv[3] if len(sys.argv) > 3 else None
+    os.chdir(tempfile.mkdtemp(prefix="plc_uplink_"))
+    ok = run_test(csv_path, seconds, broker_address)
+    print(f"[INFO] Logs written to {os.getcwd()}")
+    sys.exit(0 if ok else 1)
@@ -19,6 +19,7 @@ PORT = 502  # Default port for Modbus TCP
 REGISTER_ADDR = 10  # %MW10
 REGISTER_COUNT = 2  # Reading two consecutive register for REAL data type
 CSV_FILE = "pressure_log.csv"  # File name
+UNIT = "mbar"  # Engineering unit of the parameter (shown in labels)
 Y_MIN = 0  # Min limit of parameter
 Y_MAX = 250  # Max limit of parameter
 Y_TICKS = 20  # Uniform gap between Y-axis points
@@ -54,7 +55,7 @@ line, = ax.plot([], [], 'o-', color='lime')
 
 ax.set_ylim(Y_MIN, Y_MAX)
 ax.set_yticks([Y_MIN + i * (Y_MAX - Y_MIN) / (Y_TICKS - 1) for i in range(Y_TICKS)])
-ax.set_ylabel("Pressure", color='white', weight='bold')
+ax.set_ylabel(f"Pressure ({UNIT})", color='white', weight='bold')
 ax.set_xlabel("Time (HH:MM:SS)", color='white', weight='bold')
 ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
 ax.xaxis.set_major_locator(mdates.SecondLocator(interval=X_INTERVAL))
@@ -107,7 +108,7 @@ try:
             ax.set_facecolor('darkblue')
             ax.set_ylim(Y_MIN, Y_MAX)
             ax.set_yticks([Y_MIN + i * (Y_MAX - Y_MIN) / (Y_TICKS - 1) for i in range(Y_TICKS)])
-            ax.set_ylabel("Pressure", color='white', weight='bold')
+            ax.set_ylabel(f"Pressure ({UNIT})", color='white', weight='bold')
             ax.set_xlabel("Time (HH:MM:SS)", color='white', weight='bold')
             ax.grid(True, color='white', alpha=0.3)
             ax.tick_params(axis='x', colors='white')
@@ -126,7 +127,7 @@ try:
         ax.relim()
         ax.autoscale_view(scalex=False, scaley=False)
         title_text.set_text(f"Real-Time Data plotting [{now.strftime('%Y-%m-%d')}]")
-        info_text.set_text(f"Pressure: {pressure:.2f} mbar  |  Time: {now.strftime('%H:%M:%S')}")
+        info_text.set_text(f"Pressure: {pressure:.2f} {UNIT}  |  Time: {now.strftime('%H:%M:%S')}")
 
         fig.autofmt_xdate()
         plt.draw()
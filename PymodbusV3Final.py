@@ -19,15 +19,33 @@ import time  # For 1 sec delay in reading data
 import easygui  # For input csv file GUI
 import traceback  # For tracing errors
 import os  # For ensuring the logging csv file exist's
-import struct  # For REAL to Float conversion
-from pymodbus.client import ModbusTcpClient  # For Modbus TCP communication
+import struct  # For REAL to Float conversion and journal records
+import ast  # For parsing the Formula column of calculated tags
+import zlib  # For CRC of journal records
+from pymodbus.client import ModbusTcpClient, ModbusSerialClient  # For Modbus TCP and RTU (serial) communication
+from pymodbus import FramerType  # For RTU framing over TCP gateways
 import threading  # For parallely reconnecting with PLC
+import math  # For standard deviation of rolling statistics
+from collections import deque  # For pre-trigger ring buffer of event capture
+import multiprocessing as mp  # For running acquisition & logging in a separate process
+from multiprocessing import shared_memory  # For the shared sample ring between processes
+import queue  # For command queue timeouts of the acquisition loop
+import json  # For the parameter schema message of the MQTT uplink
+import http.server  # For the browser live view (page + WebSocket upgrade)
+import base64  # For the WebSocket handshake
+import hashlib  # For the WebSocket handshake
+import select  # For noticing live view viewers that went away
+try:
+    import paho.mqtt.client as mqtt  # Optional, only needed for the MQTT uplink
+except ImportError:
+    mqtt = None
 
 # ---------- Configuration Information ----------
 MAX_POINTS = 900  # 15 minutes × 60 seconds = 900 data points in single graph window
 INTERVAL = 1000   # 1 second delay between reading the data from PLC
 REFRESH_MINUTES = 15  # 15-minute sliding window
 RECONNECT_INTERVAL = 5  # Seconds between reconnection attempts if connection with PLC lost
+EPOCH_OFFSET_NS = time.time_ns() - time.monotonic_ns()  # Monotonic clock -> epoch nanoseconds (fixed at start)
 
 # ------------- UI Configuration(Font Style and Font size) --------------------
 LABEL_FONT = ("Arial", 10, "bold")  # Other labels
@@ -45,6 +63,160 @@ PLC_IP = '10.10.68.20'  # PLC IP address
 PORT = 502  # Default port
 REGISTER_COUNT = 2  # For REAL (float32): occupies 2 registers
 
+# ------- Data Types / Engineering Units (optional Type, Scale, Offset, Unit csv columns) ----------------
+# Type -> (registers, numpy type of the raw value, struct format for writes); 2-register types: high word first
+DATA_TYPES = {'REAL': (REGISTER_COUNT, np.float32, '>f'), 'DINT': (2, np.int32, '>i'), 'UDINT': (2, np.uint32, '>I'),
+              'INT': (1, np.int16, '>h'), 'UINT': (1, np.uint16, '>H')}
+DEFAULT_TYPE = 'REAL'  # Registers without Type column (same as before)
+BIT_TYPE = 'BOOL'  # Coils and discrete inputs
+RANGE_PATTERN = r'^\s*(-?\d+(?:\.\d+)?)\s*-\s*(-?\d+(?:\.\d+)?)\s*$'  # Min-Max, e.g. 0-100 or -50-150
+
+# ------- Calculated Tags (Formula column, e.g. LEFT_PORT_A_PRESSURE - LEFT_PORT_B_PRESSURE) ----------------
+FC_VIRTUAL = 0  # Function code of calculated tags (no Modbus request, Address left empty)
+VIRTUAL_TYPE = 'CALC'
+FORMULA_FUNCTIONS = {'abs': 'np.abs', 'min': 'np.minimum', 'max': 'np.maximum', 'sqrt': 'np.sqrt', 'exp': 'np.exp',
+                     'log': 'np.log', 'log10': 'np.log10', 'sin': 'np.sin', 'cos': 'np.cos', 'where': 'np.where'}
+FORMULA_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Constant, ast.Load,
+                 ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.USub, ast.UAdd,
+                 ast.Gt, ast.GtE, ast.Lt, ast.LtE, ast.Eq, ast.NotEq,
+                 ast.BitAnd, ast.BitOr)  # & / | combine comparisons; everything else is rejected
+
+# ------- Data Quality (one uint8 code per parameter and sample, logged next to every value) ----------------
+QUALITY_GOOD = 0
+QUALITY_STALE = 1  # Analog value bit-identical for STALE_SECONDS (frozen source)
+QUALITY_COMM_FAIL = 2  # No answer: disconnected, timeout or broken frame
+QUALITY_OUT_OF_RANGE = 3  # Value read but outside the csv Range
+QUALITY_EXCEPTION = 0x80  # Modbus exception response, low bits = exception code (0x82 = illegal data address)
+QUALITY_NAMES = {QUALITY_GOOD: "GOOD", QUALITY_STALE: "STALE", QUALITY_COMM_FAIL: "COMM_FAIL",
+                 QUALITY_OUT_OF_RANGE: "OUT_OF_RANGE"}
+QUALITY_SEVERITY = np.full(256, 3, dtype=np.uint8)  # Worst input wins: no value (COMM_FAIL / exception) > STALE
+QUALITY_SEVERITY[[QUALITY_GOOD, QUALITY_OUT_OF_RANGE, QUALITY_STALE]] = [0, 1, 2]  # > OUT_OF_RANGE > GOOD
+QUALITY_SUFFIX = "_Q"  # Csv column holding the quality code of the parameter column before it
+STALE_SECONDS = 0  # Seconds an unchanged analog value is trusted before it is flagged stale (0 = off)
+
+# ------- Transport Configuration ----------------
+TRANSPORTS = ["TCP", "RTU over TCP", "RTU"]  # Modbus TCP, RTU frames through a TCP gateway, RTU on a serial port
+TRANSPORT = "TCP"  # Default transport shown in the GUI
+SLAVE_ID = 1  # Modbus unit / slave id (must match the device on RTU networks)
+SERIAL_PORT = 'COM3'  # Serial port for RTU (e.g. COM3 or /dev/ttyUSB0)
+BAUDRATE = 19200
+PARITY = 'E'  # 'N', 'E' or 'O'
+STOPBITS = 1
+BYTESIZE = 8
+RTU_MAX_FRAME = 256  # Largest RTU frame in bytes accepted by the devices/gateway (lower it for small buffers)
+RTU_TURNAROUND = 0.01  # Seconds a serial slave needs before it answers (used to weigh round trips when planning)
+
+# ------- Modbus Data Areas / Read Planning ----------------
+FC_READ_COILS = 1  # %M  -> Coils (bits)
+FC_READ_DISCRETE_INPUTS = 2  # %I  -> Discrete inputs (bits)
+FC_READ_HOLDING_REGISTERS = 3  # %MW -> Holding registers (words)
+FC_READ_INPUT_REGISTERS = 4  # %IW -> Input registers (words)
+BIT_FUNCTIONS = (FC_READ_COILS, FC_READ_DISCRETE_INPUTS)
+ADDRESS_PREFIXES = [('%MW', FC_READ_HOLDING_REGISTERS), ('%IW', FC_READ_INPUT_REGISTERS),  # Word prefixes must be
+                    ('%M', FC_READ_COILS), ('%I', FC_READ_DISCRETE_INPUTS)]  # checked before bit prefixes
+MAX_BITS_PER_READ = 2000  # Modbus limit for one read_coils/read_discrete_inputs request
+MAX_REGISTERS_PER_READ = 125  # Modbus limit for one register read request
+MAX_BIT_GAP = 256  # Unused bits we accept reading to merge two bit tags into one request
+MAX_REGISTER_GAP = 8  # Unused registers we accept reading to merge two word tags into one request
+PLANNER_TUNING = True  # Learn request overhead and per-register cost from measured round trips and re-plan the gaps
+PLANNER_WINDOW = 200  # Most recent round trips kept per data kind (bits / registers) and request size
+PLANNER_MIN_SAMPLES = 10  # Round trips needed per request size before it is used in the fit
+PLANNER_TUNE_INTERVAL = 60  # Cycles between two re-plan checks
+PLANNER_PROBES = 6  # Extra reads of another size per re-plan check while all requests of the plan have one size
+EXCEPTION_ILLEGAL_ADDRESS = 2  # Modbus exception code of an unmapped address -> the block is split
+
+# ------- Event Capture Configuration ----------------
+FAST_SCAN_INTERVAL = 0.05  # Seconds between reads of the event parameters while a burst is recording (20 Hz)
+EVENT_WINDOW = 10  # Seconds of fast-scan data recorded after a trigger fires
+PRE_TRIGGER_SAMPLES = 120  # Normal-rate samples kept in memory and saved in front of each burst
+EVENT_DIR = "events"  # Folder for the compact (.npz) event files
+
+# ------- Rolling Statistics / Alarm Configuration ----------------
+STATS_WINDOWS = [(60, "1 min"), (900, "15 min"), (3600, "1 h")]  # (seconds, label) of each rolling window
+STATS_LOG_INTERVAL = 60  # Seconds between aggregate rows written to the statistics log
+ALARM_HYSTERESIS = 0.02  # Alarm clears only after returning 2% of the range inside Min/Max
+
+# ------- Write-Ahead Journal Configuration ----------------
+JOURNAL_FILE = "PLC_Data.journal"  # Binary journal of samples not yet safely written to the csv log
+JOURNAL_SYNC_INTERVAL = 1.0  # Seconds between group commits (flush + fsync) of the journal
+CSV_FLUSH_INTERVAL = 30  # Seconds csv rows are buffered in memory before one batched write
+CSV_TIMESTAMP_FORMAT = "local"  # "local" (2025-06-18 10:00:00.123), "iso" (ISO 8601 with UTC offset) or "epoch_ms"
+CSV_LAYOUT = "wide"  # "wide": one row per sample, "long": one row per parameter (Timestamp,Parameter,Value,Quality)
+DEFAULT_DECIMALS = 2  # Decimals logged for parameters without a Decimals column entry (bits: 0)
+JOURNAL_MAGIC = b'PLCJRNL2'
+JOURNAL_HEADER_SIZE = 512  # Magic + length-prefixed csv log path, zero padded
+JOURNAL_RECORD_BODY = struct.Struct('<qHBxd')  # epoch ns, parameter column, quality, value (NaN = no data)
+JOURNAL_RECORD = struct.Struct('<qHBxdI')  # Record body followed by its CRC32 (24 bytes per record)
+
+# ------- Session History Configuration ----------------
+HISTORY_CHUNK_ROWS = 3600  # Rows added to the memory-mapped history files each time they grow (1 h at 1 Hz)
+HISTORY_MAX_PLOT_POINTS = 4000  # History views are strided down to about this many points for drawing
+HISTORY_SPANS = [("15 min", 900), ("1 h", 3600), ("4 h", 14400), ("8 h", 28800), ("12 h", 43200), ("Full session", None)]
+HISTORY_BACKEND = "mmap"  # "mmap": float32 column files, "series": compressed blocks in RAM + <date>_PLC_Series.series log
+
+# ------- Compressed Series Configuration (Gorilla-style: delta-of-delta timestamps, XOR values) ----------------
+SERIES_BLOCK_ROWS = 3600  # Samples per compressed block (1 h at 1 Hz), blocks are decoded as a whole
+SERIES_CACHE_STREAMS = 512  # Decoded column streams kept for panning / redrawing
+SERIES_MAGIC = b'PLCSER01'
+SERIES_BLOCK_HEADER = struct.Struct('<IqqII')  # rows, first ns, last ns, payload bytes, CRC32 of payload
+
+# ------- Setpoint Write Configuration ----------------
+MAX_REGISTERS_PER_WRITE = 123  # Modbus limit for one write_registers request
+MAX_WRITE_BLOCKS_PER_CYCLE = 4  # Write requests allowed between two poll cycles (the rest waits a cycle)
+
+# ------- Dashboard Configuration ----------------
+DASHBOARD_COLUMNS = 2  # Trend panels per row in the dashboard window
+DASHBOARD_PANEL_PARAMS = 4  # Parameters per panel when the csv has no 'Panel' column
+DASHBOARD_DEFAULT_SPAN = 15  # Minutes shown by a panel without 'PanelSpan'
+
+# ------- Acquisition Process Configuration ----------------
+ACQUISITION_PROCESS = False  # True = PLC reading and logging run in their own process, GUI only draws
+SAMPLE_RING_ROWS = 256  # Samples held in the shared-memory ring between acquisition process and GUI
+CONNECTION_STATES = ["Disconnected", "Connected", "Connection Failed", "Connection Lost",
+                     "Reconnecting...", "Manually Disconnected"]  # Status texts shared through the ring header
+
+# ------- Acquisition Pipeline Configuration (stages connected by bounded queues) ----------------
+PIPELINE_ENABLED = True  # True = PLC reads run in their own thread, logging / analysis / GUI are fed through queues
+QUEUE_POLICIES = ("block", "drop-oldest", "coalesce-latest")  # What a full queue does with a new item
+PIPELINE_LOG_QUEUE = 3600  # Samples the csv / journal stage may fall behind (1 h at 1 Hz) before reads would wait
+PIPELINE_ANALYZE_QUEUE = 600  # Samples analysis (events, statistics, rollups) may fall behind, older ones are dropped
+PIPELINE_GUI_QUEUE = MAX_POINTS  # Samples kept for a busy GUI, older ones are dropped (the csv log keeps them)
+PIPELINE_RATE_WINDOW = 5  # Seconds over which stage throughput is measured
+PIPELINE_STATS_INTERVAL = 60  # Seconds between pipeline statistics prints
+
+# ------- MQTT Uplink Configuration (store-and-forward to the plant historian) ----------------
+UPLINK_ENABLED = False  # True = every logged sample is also published in batches to the MQTT broker below
+UPLINK_HOST = '127.0.0.1'
+UPLINK_PORT = 1883
+UPLINK_TOPIC = "plant/plc/samples"  # Batches; the parameter list is published retained on <topic>/schema
+UPLINK_QOS = 1  # A batch counts as sent once the broker acknowledged it
+UPLINK_BATCH_SAMPLES = 60  # Samples per batch (the batch is closed earlier when UPLINK_BATCH_LATENCY is reached)
+UPLINK_BATCH_LATENCY = 5.0  # Seconds the first sample of a batch may wait before the batch is sent
+UPLINK_QUEUE_BATCHES = 32  # Batches waiting in memory for the sender thread
+UPLINK_OVERFLOW_BATCHES = 256  # More closed batches wait in a list behind the queue, the oldest are dropped above
+UPLINK_SPOOL_DIR = "PLC_Uplink_spool"  # One file per batch the broker has not acknowledged, kept across restarts
+UPLINK_SPOOL_MAX_MB = 512  # Oldest spooled batches are dropped above this size (the csv log still has them)
+UPLINK_DRAIN_RATE = 10  # Spooled batches sent per second after an outage, on top of the live batches
+UPLINK_RETRY_INTERVAL = 5  # Seconds between connection attempts to the broker
+UPLINK_PUBLISH_TIMEOUT = 5  # Seconds to wait for the broker to acknowledge one batch
+UPLINK_COMPRESSION_LEVEL = 6  # zlib level of the batch payloads
+UPLINK_MAGIC = b'PLCU'
+UPLINK_HEADER = struct.Struct('<4sBHIq')  # magic, format version, parameters, samples, first sample epoch ms
+
+# ------- Browser Live View Configuration (http://<host>:<port>/, binary deltas over a WebSocket) ----------------
+LIVEVIEW_ENABLED = False  # True = serve a live chart to browsers, no desktop session needed per viewer
+LIVEVIEW_HOST = '127.0.0.1'  # '0.0.0.0' to allow viewers from other computers
+LIVEVIEW_PORT = 8080
+LIVEVIEW_WINDOW = MAX_POINTS  # Samples sent to a new viewer as its initial window
+LIVEVIEW_BACKLOG = 64  # Frames a viewer may fall behind before it gets a fresh window instead
+LIVEVIEW_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "PlcLiveView.html")
+LIVEVIEW_WINDOW_HEADER = struct.Struct('<B3xIIH2x')  # kind 2, sequence of the last row, rows, parameters (16 bytes)
+LIVEVIEW_DELTA_HEADER = struct.Struct('<B3xId')  # kind 1, sequence, epoch ms (16 bytes)
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# ------- Rollup Log Configuration ----------------
+ROLLUP_LEVELS = [(60, "1min"), (3600, "1h")]  # (bucket seconds, file suffix), each level is fed by the one before
+
 # ---------- Global Variables ----------
 df_params = None  # For reading content of input csv file
 parameter_data = {}  # Dictionary to get parameter value
@@ -52,6 +224,36 @@ left_checkboxes = {}  # To get information about active parameters in left Y-axi
 right_checkboxes = {} # To get information about active parameters in right Y-axis (dictionary)
 left_selected_params = []  # List to store how many active parameters in Left Y-axis
 right_selected_params = []  # List to store how many active parameters in Left Y-axis
+read_plan = []  # List of ReadBlock objects (one Modbus request each) built from df_params
+param_index = {}  # Parameter name -> column in df_params order (used for sample vectors)
+formula_evaluator = None  # FormulaEvaluator of the calculated tags (Formula column)
+event_triggers = []  # List of EventTrigger objects built from the optional 'Trigger' column
+pre_trigger_ring = deque(maxlen=PRE_TRIGGER_SAMPLES)  # (int64 sample times, float32 vector of all parameters)
+busy_event_params = set()  # Parameters currently recorded by a fast-scan burst
+busy_event_lock = threading.Lock()  # busy_event_params is updated by the burst threads and read by the poll loop
+tag_statistics = {}  # Parameter name -> TagStatistics (rolling windows + alarm state)
+statistics_lock = threading.Lock()  # Windows are updated by the analyze stage and read by the GUI timer
+stats_log_path = None
+alarm_log_path = None
+last_stats_log_time = None
+stats_label = None  # GUI info panel below the plot
+rollup_levels = []  # RollupLevel objects (1 min, 1 h) updated incrementally from every sample
+history_store = None  # HistoryStore with every sample of the session (memory-mapped files)
+history_live = None  # Tk BooleanVar: True = normal 15-minute live plot, False = browse session history
+history_span = None  # Tk StringVar with a label from HISTORY_SPANS
+history_position = None  # Tk DoubleVar: end of the history view in % of the session
+acquisition_ring = None  # SharedSampleRing filled by the acquisition process (process mode only)
+pending_writes = {}  # Parameter name -> requested value, coalesced until the next gap between poll cycles
+pending_writes_lock = threading.Lock()
+dashboard_window = None  # Toplevel with the multi-panel dashboard (None when closed)
+dashboard_canvas = None
+dashboard_panels = []  # TrendPanel objects, all drawn from history_store
+acquisition_process = None
+acquisition_pipeline = None  # Pipeline of the reader thread (PIPELINE_ENABLED, not in process mode)
+gui_samples = None  # StageQueue of the pipeline drained by update_plot()
+live_view = None  # LiveViewServer streaming samples to browsers (LIVEVIEW_ENABLED)
+uplink = None  # UplinkSink publishing every logged sample to the MQTT broker (UPLINK_ENABLED)
+acquisition_commands = None  # Queue of ('connect', ip, port, transport) / ('disconnect',) / ('stop',) commands
 
 window_start_time = None
 current_point_count = 0
@@ -73,7 +275,21 @@ plc_ip_address = PLC_IP
 plc_port = PORT
 reconnect_thread = None
 stop_reconnect = False
+plc_transport_name = TRANSPORT  # One of TRANSPORTS, selected in the GUI
+plc_transport = None  # ModbusTransport used by the current connection
+read_cost_model = None  # ReadCostModel of the connected device (measured round trip vs request size)
+planner_gaps = {}  # Learned 'register_gap' / 'bit_gap' overriding the transport limits
+plan_breaks = set()  # (function, address) where a block must start, found from illegal-address exceptions
+plan_dirty = False  # Read plan is rebuilt after the current cycle
+planner_cycle = 0  # Cycles since the last re-plan check
+plc_lock = threading.Lock()  # Modbus client is shared by the GUI loop and event burst threads
 log_file_path = None
+sample_journal = None  # SampleJournal protecting the buffered csv rows
+csv_buffer = []  # Formatted rows waiting for the next batched csv write
+csv_schema = None  # CsvSchema of the data log
+stale_last_values = None  # Previous value of every parameter (stale check)
+stale_since_ns = None  # Epoch ns since which every parameter is unchanged
+csv_last_flush = time.monotonic()
 
 COLORS = ['#FF0000', '#00FF00', '#0000FF', '#800080', '#FFA500',
           '#FF69B4', '#00FFFF', '#FFD700', '#32CD32', '#8A2BE2']
@@ -85,32 +301,547 @@ def select_param_csv():   # Extracting path of choosen file
         filetypes=["*.csv"]
     )
 
+# ----- Converting address text (%MW1402, %M10, %I5, %IW20 or FC<code>:<offset>) to (function code, offset) -----
+def parse_address(address):
+    text = str(address).strip().upper()
+    if text.startswith('FC'):  # Explicit function code, e.g. FC1:100 or FC02:7
+        code, _, offset = text[2:].partition(':')
+        if int(code) not in (FC_READ_COILS, FC_READ_DISCRETE_INPUTS,
+                             FC_READ_HOLDING_REGISTERS, FC_READ_INPUT_REGISTERS):
+            raise ValueError(f"Unsupported function code in address '{address}'")
+        return int(code), int(offset)
+    for prefix, code in ADDRESS_PREFIXES:
+        if text.startswith(prefix):
+            return code, int(text[len(prefix):])
+    if text.isdigit():  # Plain number is treated as a holding register like before
+        return FC_READ_HOLDING_REGISTERS, int(text)
+    raise ValueError(f"Unsupported address '{address}'")
+
+# ----- Converting (function code, offset) back to address text for messages -----
+def format_address(function, address):
+    if function == FC_VIRTUAL:
+        return "Formula"
+    for prefix, code in ADDRESS_PREFIXES:
+        if code == function:
+            return f"{prefix}{address}"
+    return f"FC{function}:{address}"
+
 # ----- Reading input csv file to get Parameter information -----
 def load_parameter_info(csv_path):
     try:
-        df = pd.read_csv(csv_path)
-        df['Address'] = df['Address'].str.replace('%MW', '', regex=False).astype(int)
-        df[['Min', 'Max']] = df['Range'].str.split('-', expand=True).astype(float)
+        df = pd.read_csv(csv_path, dtype={'Range': str})  # Stays text even when every Range is empty (bits only)
+        formulas = df['Formula'].fillna('').astype(str).str.strip() if 'Formula' in df else pd.Series('', index=df.index)
+        is_virtual = formulas != ''
+        if df.loc[is_virtual, 'Address'].notna().any():
+            raise ValueError("Parameters with a Formula must leave Address empty")
+        parsed = [(FC_VIRTUAL, 0) if virtual else parse_address(address)
+                  for address, virtual in zip(df['Address'], is_virtual)]
+        df['Function'] = [code for code, _ in parsed]
+        df['Address'] = [offset for _, offset in parsed]
+        df['Formula'] = formulas
+        is_bit = df['Function'].isin(BIT_FUNCTIONS)
+        df.loc[is_bit & df['Range'].isna(), 'Range'] = '0-1'  # Bits do not need a range in the csv
+        df[['Min', 'Max']] = df['Range'].str.extract(RANGE_PATTERN).astype(float)  # Engineering units, may be negative
+        bad_range = df['Min'].isna()  # Also calculated tags: their Range gives quality, alarms and plot limits
+        if bad_range.any():
+            rows = df.loc[bad_range, ['Parameter', 'Range']].fillna('').values
+            raise ValueError("Range must be Min-Max (e.g. 0-100) for " + ", ".join(f"{name} ('{text}')" for name, text in rows))
+        compile_register_map(df, is_bit)
+        FormulaEvaluator(df)  # Syntax, names and cycles are checked when the csv is loaded
         return df
     except Exception as e:
         print(f"[ERROR] Failed to process parameter CSV: {e}")
         return None
 
-# ----- Creating data logging csv file and putting headers -----
+# ----- Filling Type / Scale / Offset / Unit / Registers (engineering value = raw * Scale + Offset) -----
+def compile_register_map(df, is_bit):
+    types = df['Type'] if 'Type' in df else pd.Series(np.nan, index=df.index)
+    df['Type'] = types.fillna(DEFAULT_TYPE).astype(str).str.strip().str.upper()
+    df.loc[is_bit, 'Type'] = BIT_TYPE
+    is_virtual = df['Function'] == FC_VIRTUAL
+    df.loc[is_virtual, 'Type'] = VIRTUAL_TYPE
+    unknown = df.loc[~is_bit & ~is_virtual & ~df['Type'].isin(list(DATA_TYPES)), 'Type']
+    if len(unknown):
+        raise ValueError(f"Unsupported Type '{unknown.iloc[0]}' (use {', '.join(DATA_TYPES)})")
+    df['Scale'] = pd.to_numeric(df['Scale'], errors='raise').fillna(1.0) if 'Scale' in df else 1.0
+    df['Offset'] = pd.to_numeric(df['Offset'], errors='raise').fillna(0.0) if 'Offset' in df else 0.0
+    df.loc[is_bit | is_virtual, ['Scale', 'Offset']] = [1.0, 0.0]  # Bits stay 0/1, formulas give engineering units
+    df['Unit'] = df['Unit'].fillna('').astype(str).str.strip() if 'Unit' in df else ''
+    df['Decimals'] = pd.to_numeric(df['Decimals'], errors='raise').fillna(DEFAULT_DECIMALS).astype(int) \
+        if 'Decimals' in df else DEFAULT_DECIMALS
+    df.loc[is_bit, 'Decimals'] = 0
+    df['Registers'] = [DATA_TYPES[data_type][0] if data_type in DATA_TYPES else int(data_type == BIT_TYPE)
+                       for data_type in df['Type']]  # Bits 1, calculated tags 0
+
+# ----- Calculated tags: formulas parsed once into one generated NumPy function, evaluated in dependency order -----
+# Works on one sample vector or on a (samples x parameters) matrix; inputs are referenced as v[..., column]
+class FormulaEvaluator:
+    def __init__(self, df):
+        names = df['Parameter'].tolist()
+        column = {name: i for i, name in enumerate(names)}
+        formulas = {name: text for name, text in zip(names, df['Formula']) if text}
+        trees, depends = {}, {}
+        for name, text in formulas.items():
+            try:
+                trees[name] = ast.parse(text, mode='eval')
+            except SyntaxError as e:
+                raise ValueError(f"Formula of {name} is not valid: {e.msg}")
+            for node in ast.walk(trees[name]):
+                if not isinstance(node, FORMULA_NODES):
+                    raise ValueError(f"Formula of {name} uses unsupported syntax ({type(node).__name__})")
+                if isinstance(node, ast.Call) and (not isinstance(node.func, ast.Name) or node.keywords
+                                                   or node.func.id not in FORMULA_FUNCTIONS):
+                    raise ValueError(f"Formula of {name}: only {', '.join(FORMULA_FUNCTIONS)} can be called")
+                if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+                    raise ValueError(f"Formula of {name}: only numbers are allowed as constants")
+                if isinstance(node, ast.Compare) and len(node.ops) > 1:  # Not element-wise on the analyzer's matrices
+                    raise ValueError(f"Formula of {name}: write chained comparisons as (A < B) & (B < C)")
+            calls = {id(node.func) for node in ast.walk(trees[name]) if isinstance(node, ast.Call)}
+            used = {node.id for node in ast.walk(trees[name]) if isinstance(node, ast.Name) and id(node) not in calls}
+            unknown = used - set(column)
+            if not used:
+                raise ValueError(f"Formula of {name} does not use any parameter")
+            if unknown:
+                raise ValueError(f"Formula of {name} uses unknown parameter(s) {', '.join(sorted(unknown))}")
+            depends[name] = used
+
+        self.order = []  # Dependency order (inputs before the tags using them)
+        state = {}
+        def visit(name, path):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Formulas depend on each other in a cycle: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for dependency in sorted(depends[name] & set(formulas)):
+                visit(dependency, path + [name])
+            state[name] = 'done'
+            self.order.append(name)
+        for name in formulas:
+            visit(name, [])
+
+        # Measured inputs behind every calculated tag (through other calculated tags) for quality and time stamps
+        sources = {}
+        for name in self.order:
+            sources[name] = sorted(set().union(*[sources.get(d, [column[d]]) for d in depends[name]]))
+        width = max([len(columns) for columns in sources.values()], default=1)
+        self.sources = np.array([columns + [columns[0]] * (width - len(columns)) for columns in
+                                 (sources[name] for name in self.order)], dtype=np.intp).reshape(len(self.order), width)
+        self.names = self.order
+        self.columns = np.array([column[name] for name in self.order], dtype=np.intp)
+        rows = df.set_index('Parameter')
+        self.min_val = rows.loc[self.order, 'Min'].to_numpy(dtype=np.float64)
+        self.max_val = rows.loc[self.order, 'Max'].to_numpy(dtype=np.float64)
+
+        # One generated function: "v[..., 7] = v[..., 0] - v[..., 1]" per tag, names replaced by column references
+        class ToColumns(ast.NodeTransformer):
+            def visit_Call(self, node):
+                node.args = [self.visit(arg) for arg in node.args]
+                node.func = ast.parse(FORMULA_FUNCTIONS[node.func.id], mode='eval').body
+                return node
+            def visit_Name(self, node):
+                return ast.parse(f"v[..., {column[node.id]}]", mode='eval').body
+        lines = ["def evaluate(v):"] + [
+            f"    v[..., {column[name]}] = {ast.unparse(ToColumns().visit(trees[name]).body)}" for name in self.order]
+        namespace = {'np': np, '__builtins__': {}}
+        exec(compile("\n".join(lines) + "\n    return v\n", "<formulas>", "exec"), namespace)
+        self.evaluate = namespace['evaluate']
+        self.source = "\n".join(lines)
+        try:  # Trial run on a 2-row matrix like the log analyzer's, e.g. "&" between two numbers fails here
+            with np.errstate(all='ignore'):
+                self.evaluate(np.ones((2, len(names))))
+        except Exception as e:
+            raise ValueError(f"Formulas cannot be evaluated: {e}")
+
+    # Filling the calculated columns of vector / matrix in place; quality = most severe input code (QUALITY_SEVERITY),
+    # then own Range when all inputs were GOOD (results that are not finite, e.g. division by zero, become NaN /
+    # OUT_OF_RANGE; a NaN from a failed input keeps that input's code)
+    def apply(self, vector, quality, stamps=None):
+        if not len(self.columns):
+            return
+        with np.errstate(all='ignore'):
+            self.evaluate(vector)
+        values = vector[..., self.columns]
+        inputs = quality[..., self.sources]
+        worst = QUALITY_SEVERITY[inputs].argmax(axis=-1)
+        codes = np.take_along_axis(inputs, worst[..., np.newaxis], axis=-1)[..., 0]
+        codes[(codes == QUALITY_GOOD) & ~((values >= self.min_val) & (values <= self.max_val))] = QUALITY_OUT_OF_RANGE
+        values[~np.isfinite(values)] = np.nan
+        vector[..., self.columns] = values
+        quality[..., self.columns] = codes
+        if stamps is not None:
+            stamps[..., self.columns] = stamps[..., self.sources].max(axis=-1)
+
+# ----- Text of a quality code for messages -----
+def quality_name(code):
+    if code & QUALITY_EXCEPTION:
+        return f"EXCEPTION_{code & 0x7F}"
+    return QUALITY_NAMES.get(code, str(code))
+
+# ----- Precompiled csv row format: timestamp style, fixed decimals per parameter, wide or long layout -----
+class CsvSchema:
+    def __init__(self, param_names, decimals, layout=None, timestamp_format=None):
+        self.layout = layout or CSV_LAYOUT  # Configuration read when the schema is built, not when V3 is imported
+        self.timestamp_format = timestamp_format or CSV_TIMESTAMP_FORMAT
+        if self.layout == "long":
+            self.header = "Timestamp,Parameter,Value,Quality\n"
+            self.row_format = "".join(f"%s,{name},%.{d}f,%d\n" for name, d in zip(param_names, decimals))
+        else:
+            self.header = "Timestamp," + ",".join(f"{name},{name}{QUALITY_SUFFIX}" for name in param_names) + "\n"
+            self.row_format = "%s," + ",".join(f"%.{d}f,%d" for d in decimals) + "\n"
+
+    def format_time(self, timestamp_ns):
+        if self.timestamp_format == "epoch_ms":
+            return str(timestamp_ns // 1_000_000)
+        if self.timestamp_format == "iso":
+            return datetime.fromtimestamp(timestamp_ns / 1e9).astimezone().isoformat(timespec='milliseconds')
+        return format_timestamp(timestamp_ns)
+
+    # One sample -> csv text with a single %-format call (NaN values become empty cells)
+    def format_row(self, timestamp_ns, vector, quality):
+        timestamp = self.format_time(timestamp_ns)
+        pairs = zip(vector.tolist(), quality.tolist())
+        if self.layout == "long":
+            text = self.row_format % tuple(cell for value, code in pairs for cell in (timestamp, value, code))
+        else:
+            text = self.row_format % (timestamp, *(cell for pair in pairs for cell in pair))
+        return text.replace(",nan,", ",,") if np.isnan(vector).any() else text
+
+def build_csv_schema(df):
+    return CsvSchema(df['Parameter'].tolist(), df['Decimals'].tolist())
+
+# ----- Creating data logging csv file and putting headers (value and quality column per parameter) -----
+# The header comes from the same schema that formats the rows (layout and Decimals of df_params)
 def create_log_file(file_name, param_names):
+    global csv_schema
+    csv_schema = build_csv_schema(df_params.set_index('Parameter').loc[list(param_names)].reset_index())
     if not os.path.exists(file_name):  
-        columns = ["Timestamp"] + param_names
-        pd.DataFrame(columns=columns).to_csv(file_name, index=False)
+        with open(file_name, 'w', newline='') as f:
+            f.write(csv_schema.header)
         print(f"[INFO] Created CSV: {os.path.abspath(file_name)}")
 
+# ----- One Modbus request covering several parameters of the same data area -----
+class ReadBlock:
+    def __init__(self, function, start):
+        self.function = function
+        self.start = start
+        self.end = start
+        self.param_names = []
+        self.offsets = np.zeros(0, dtype=np.intp)  # Position of each parameter inside the response
+        self.widths = np.zeros(0, dtype=np.intp)  # Registers (or bits) of each parameter
+        self.columns = np.zeros(0, dtype=np.intp)  # Position of each parameter in df_params order
+        self.decoders = []  # (positions, offsets, raw type, registers) per data type present in the block
+        self.scale = np.ones(0)  # Engineering-unit transform of the block: raw * scale + offset
+        self.offset = np.zeros(0)
+        self.min_val = np.zeros(0)  # Range of every parameter for the out-of-range quality
+        self.max_val = np.zeros(0)
+
+    @property
+    def count(self):
+        return self.end - self.start
+
+    @property
+    def is_bit(self):
+        return self.function in BIT_FUNCTIONS
+
+    def add(self, param_name, address, width):
+        self.param_names.append(param_name)
+        self.offsets = np.append(self.offsets, address - self.start)
+        self.widths = np.append(self.widths, width)
+        self.end = max(self.end, address + width)
+
+    # Precomputing the decode groups and transform arrays from the parameter rows of this block
+    def compile(self, rows):
+        types = rows['Type'].to_numpy()
+        self.decoders = []
+        if not self.is_bit:
+            for data_type in np.unique(types):
+                selected = types == data_type
+                registers, raw_type, _ = DATA_TYPES[data_type]
+                self.decoders.append((np.flatnonzero(selected), self.offsets[selected], raw_type, registers))
+        self.scale = rows['Scale'].to_numpy(dtype=np.float64)
+        self.offset = rows['Offset'].to_numpy(dtype=np.float64)
+        self.min_val = rows['Min'].to_numpy(dtype=np.float64)
+        self.max_val = rows['Max'].to_numpy(dtype=np.float64)
+
+# ----- Modbus TCP transport (also the base of the RTU transports) -----
+class ModbusTransport:
+    name = "TCP"
+
+    def __init__(self, address, port):
+        self.address = address
+        self.port = port
+
+    def create_client(self):
+        return ModbusTcpClient(self.address, port=self.port)
+
+    def describe(self):
+        return f"{self.address}:{self.port} ({self.name})"
+
+    # Request size limits and the unused span worth reading to save one request
+    def read_limits(self):
+        return {'max_bits': MAX_BITS_PER_READ, 'max_registers': MAX_REGISTERS_PER_READ,
+                'bit_gap': MAX_BIT_GAP, 'register_gap': MAX_REGISTER_GAP}
+
+# ----- RTU frames tunnelled through a TCP gateway (limited by the RTU frame size) -----
+class RtuOverTcpTransport(ModbusTransport):
+    name = "RTU over TCP"
+
+    def create_client(self):
+        return ModbusTcpClient(self.address, port=self.port, framer=FramerType.RTU)
+
+    def read_limits(self):
+        limits = super().read_limits()
+        payload = RTU_MAX_FRAME - 5  # Response frame = slave id + function + byte count + data + CRC(2)
+        limits['max_registers'] = min(MAX_REGISTERS_PER_READ, payload // 2)
+        limits['max_bits'] = min(MAX_BITS_PER_READ, payload * 8)
+        return limits
+
+# ----- RTU on a serial port (RS-485 / RS-232), round trips are weighed in character times -----
+class SerialRtuTransport(RtuOverTcpTransport):
+    name = "RTU"
+
+    def __init__(self, port_name, baudrate):
+        super().__init__(port_name, int(baudrate))
+        self.char_time = (1 + BYTESIZE + (PARITY != 'N') + STOPBITS) / self.port  # Seconds per character
+        self.frame_gap = 3.5 * self.char_time if self.port <= 19200 else 0.00175  # Silent interval t3.5
+
+    def create_client(self):
+        # pymodbus keeps the t3.5 silent interval between frames on the wire
+        return ModbusSerialClient(self.address, framer=FramerType.RTU, baudrate=self.port,
+                                  bytesize=BYTESIZE, parity=PARITY, stopbits=STOPBITS)
+
+    def describe(self):
+        return f"{self.address} @ {self.port} baud ({self.name})"
+
+    def read_limits(self):
+        limits = super().read_limits()
+        # Fixed cost of one more request: request frame (8) + response overhead (5) + two silent gaps + turnaround
+        request_cost = 13 * self.char_time + 2 * self.frame_gap + RTU_TURNAROUND
+        limits['register_gap'] = max(MAX_REGISTER_GAP, int(request_cost / (2 * self.char_time)))
+        limits['bit_gap'] = max(MAX_BIT_GAP, int(request_cost / (self.char_time / 8)))
+        return limits
+
+def make_transport(name, address, port):
+    if name == "RTU":
+        return SerialRtuTransport(address, port)
+    if name == "RTU over TCP":
+        return RtuOverTcpTransport(address, int(port))
+    return ModbusTransport(address, int(port))
+
+# ----- Grouping parameters into as few Modbus requests as possible (within the transport limits) -----
+# A new block is always started at the (function, address) pairs in breaks (unmapped holes found while reading)
+def build_read_plan(df, limits=None, breaks=None):
+    if limits is None:
+        limits = planner_limits()
+    if breaks is None:
+        breaks = plan_breaks
+    plan = []
+    for function, group in df[df['Function'] != FC_VIRTUAL].groupby('Function', sort=True):
+        is_bit = function in BIT_FUNCTIONS
+        max_count = limits['max_bits'] if is_bit else limits['max_registers']
+        max_gap = limits['bit_gap'] if is_bit else limits['register_gap']
+        block = None
+        for address, param_name, width in sorted(zip(group['Address'], group['Parameter'], group['Registers'])):
+            if (block is None or address - block.end > max_gap
+                    or address + width - block.start > max_count or (function, address) in breaks):
+                block = ReadBlock(int(function), int(address))
+                plan.append(block)
+            block.add(param_name, int(address), int(width))
+    rows = df.set_index('Parameter')
+    for block in plan:
+        block.compile(rows.loc[block.param_names])
+    return plan
+
+# ----- Transport limits with the gaps learned by the cost model -----
+def planner_limits():
+    limits = (plc_transport or ModbusTransport(PLC_IP, PORT)).read_limits()
+    limits.update(planner_gaps)
+    return limits
+
+# ----- Round trip = overhead + cost per register (or bit) * request size, fitted from measured reads -----
+class ReadCostModel:
+    def __init__(self):
+        self.samples = {False: {}, True: {}}  # is_bit -> request size -> recent round trips (s)
+        self.probe_pair = {False: 0, True: 0}  # Neighbouring blocks spanned by the probe (next pair after a failure)
+
+    def add(self, is_bit, count, seconds):
+        self.samples[is_bit].setdefault(count, deque(maxlen=PLANNER_WINDOW)).append(seconds)
+
+    # Median round trip per request size (sizes with enough samples only)
+    def medians(self, is_bit):
+        return {count: float(np.median(times)) for count, times in self.samples[is_bit].items()
+                if len(times) >= PLANNER_MIN_SAMPLES}
+
+    # (overhead s, cost per unit s) or None while fewer than two request sizes were measured
+    def fit(self, is_bit):
+        medians = self.medians(is_bit)
+        if len(medians) < 2:
+            return None
+        slope, intercept = np.polyfit(list(medians), list(medians.values()), 1)
+        return max(float(intercept), 0.0), max(float(slope), 0.0)
+
+    # Unused span worth reading to save one request: gap * cost per unit < overhead
+    def best_gap(self, is_bit, max_count):
+        model = self.fit(is_bit)
+        if model is None:
+            return None
+        overhead, unit_cost = model
+        return max_count if unit_cost == 0 else min(int(overhead / unit_cost), max_count)
+
+# ----- Learned gaps -> new plan when it groups the tags differently (checked every PLANNER_TUNE_INTERVAL cycles) -----
+def tune_read_plan():
+    global planner_gaps
+    limits = planner_limits()
+    gaps = {}
+    for is_bit, key, max_key in [(True, 'bit_gap', 'max_bits'), (False, 'register_gap', 'max_registers')]:
+        gap = read_cost_model.best_gap(is_bit, limits[max_key])
+        if gap is not None:
+            gaps[key] = gap
+    if not gaps or all(planner_gaps.get(key) == gap for key, gap in gaps.items()):
+        return
+    planner_gaps = {**planner_gaps, **gaps}
+    new_plan = build_read_plan(df_params)
+    if [(b.function, b.start, b.end) for b in new_plan] == [(b.function, b.start, b.end) for b in read_plan]:
+        return
+    for is_bit, kind in [(False, "register"), (True, "bit")]:
+        model = read_cost_model.fit(is_bit)
+        if model:
+            print(f"[INFO] Read planner: {kind} requests cost {model[0] * 1e3:.2f} ms + {model[1] * 1e6:.2f} us/{kind}"
+                  f" -> gaps up to {gaps[kind + '_gap']} {kind}s are read through")
+    refresh_read_plan(new_plan)
+
+# ----- One extra read of another size while every request in the plan has the same size (the fit needs two sizes) -----
+# Reads only the first tag of the largest block, or else spans two neighbouring blocks (holes just fail the probe)
+def probe_read_cost():
+    limits = planner_limits()
+    for is_bit, max_key in [(False, 'max_registers'), (True, 'max_bits')]:
+        blocks = [block for block in read_plan if block.is_bit == is_bit]
+        if len({block.count for block in blocks}) != 1:  # No blocks, or the plan itself has several sizes
+            continue
+        largest = max(blocks, key=lambda b: b.count)
+        pairs = [(first, second) for first, second in zip(blocks, blocks[1:]) if first.function == second.function
+                 and second.end - first.start <= limits[max_key]]
+        if largest.widths[0] < largest.count:
+            block, count = largest, int(largest.widths[0])
+        elif pairs:
+            block, second = pairs[read_cost_model.probe_pair[is_bit] % len(pairs)]
+            count = second.end - block.start
+        else:
+            continue
+        probe = ReadBlock(block.function, block.start)
+        probe.add(block.param_names[0], block.start, int(block.widths[0]))
+        probe.end = block.start + count
+        probe.compile(df_params.set_index('Parameter').loc[probe.param_names])
+        if read_block_timed(probe)[0] is None:
+            read_cost_model.probe_pair[is_bit] += 1
+
+# ----- Once per cycle after the reads: apply splits, measure a second request size if needed, re-plan periodically -----
+def update_read_planner():
+    global planner_cycle
+    if plan_dirty:
+        refresh_read_plan()
+    if not PLANNER_TUNING or read_cost_model is None:
+        return
+    if planner_cycle % max(1, PLANNER_TUNE_INTERVAL // PLANNER_PROBES) == 0:  # Probes spread over the interval
+        with plc_lock:
+            probe_read_cost()
+    planner_cycle += 1
+    if planner_cycle >= PLANNER_TUNE_INTERVAL:
+        planner_cycle = 0
+        tune_read_plan()
+
+# ----- Illegal-address exception on a multi-tag block: split in two at the unused gap nearest its middle (or at the
+# middle tag when it has no gaps); repeated exceptions narrow the hole down while the mapped halves stay merged -----
+def split_read_block(block):
+    global plan_dirty
+    covered = np.maximum.accumulate(block.offsets + block.widths)  # End of the span read so far, per tag
+    gap_starts = [int(offset) for offset, end in zip(block.offsets[1:], covered[:-1]) if offset > end]
+    middle = int(block.offsets[len(block.offsets) // 2])
+    split = block.start + (min(gap_starts, key=lambda offset: abs(offset - block.count / 2)) if gap_starts else middle)
+    plan_breaks.add((block.function, split))
+    plan_dirty = True
+    print(f"[WARNING] Illegal data address in {format_address(block.function, block.start)}.."
+          f"{format_address(block.function, block.end - 1)}: splitting the request at {format_address(block.function, split)}")
+
+# ----- Clock of the sampling / logging / plotting path (PlcSoakTest.py swaps in an accelerated virtual clock) -----
+class SystemClock:
+    monotonic = staticmethod(time.monotonic)
+    monotonic_ns = staticmethod(time.monotonic_ns)
+    now = staticmethod(datetime.now)
+
+clock = SystemClock()
+
+# ----- Epoch nanoseconds derived from the monotonic clock (immune to system clock jumps) -----
+def sample_time_ns(monotonic_ns=None):
+    if monotonic_ns is None:
+        monotonic_ns = clock.monotonic_ns()
+    return EPOCH_OFFSET_NS + monotonic_ns
+
+# ----- Formatting an epoch-ns timestamp for the csv sink (millisecond resolution) -----
+def format_timestamp(timestamp_ns):
+    return datetime.fromtimestamp(timestamp_ns / 1e9).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+# ----- Executing one ReadBlock and returning (decoded values, quality codes, epoch ns at the middle of the round trip) -----
+# The round trip feeds the read cost model of the planner; learn=False for reads outside the normal cycle (event bursts,
+# whose blocks and timing under plc_lock contention would skew it)
+def read_block_timed(block, learn=True):
+    request_ns = clock.monotonic_ns()
+    block_values, block_quality = read_block(block)
+    response_ns = clock.monotonic_ns()
+    if learn and read_cost_model is not None and block_values is not None:
+        read_cost_model.add(block.is_bit, block.count, (response_ns - request_ns) / 1e9)
+    return block_values, block_quality, sample_time_ns((request_ns + response_ns) // 2)
+
+# ----- Quality code of a failed response (Modbus exception code when the slave sent one) -----
+def response_quality(result):
+    code = getattr(result, 'exception_code', None)
+    return QUALITY_EXCEPTION | (code & 0x7F) if code else QUALITY_COMM_FAIL
+
+# ----- Executing one ReadBlock and decoding all its parameters at once -> (values or None, uint8 quality codes) -----
+def read_block(block):
+    if block.function == FC_READ_COILS:
+        result = plc_client.read_coils(address=block.start, count=block.count, slave=SLAVE_ID)
+    elif block.function == FC_READ_DISCRETE_INPUTS:
+        result = plc_client.read_discrete_inputs(address=block.start, count=block.count, slave=SLAVE_ID)
+    elif block.function == FC_READ_INPUT_REGISTERS:
+        result = plc_client.read_input_registers(address=block.start, count=block.count, slave=SLAVE_ID)
+    else:
+        result = plc_client.read_holding_registers(address=block.start, count=block.count, slave=SLAVE_ID)
+    if result.isError():
+        return None, np.full(len(block.param_names), response_quality(result), dtype=np.uint8)
+    if block.is_bit:
+        bits = np.asarray(result.bits[:block.count], dtype=np.uint8)  # Response bits padded to a full byte
+        return bits[block.offsets], np.zeros(len(block.param_names), dtype=np.uint8)
+    words = np.asarray(result.registers, dtype=np.uint32)
+    raw = np.empty(len(block.param_names))
+    for positions, offsets, raw_type, registers in block.decoders:
+        if registers == 2:  # First register is the high word, same as struct.pack('>HH', reg1, reg2)
+            raw[positions] = ((words[offsets] << 16) | words[offsets + 1]).astype(np.uint32).view(raw_type)
+        else:
+            raw[positions] = words[offsets].astype(np.uint16).view(raw_type)
+    block_values = raw * block.scale + block.offset  # Engineering units
+    outside = ~((block_values >= block.min_val) & (block_values <= block.max_val))  # Also NaN / Inf Float32 words
+    block_values[~np.isfinite(block_values)] = np.nan  # Same as calculated tags: no value, OUT_OF_RANGE
+    return block_values, np.where(outside, QUALITY_OUT_OF_RANGE, QUALITY_GOOD).astype(np.uint8)
+
 # ----- For tracking status of parameters -----
 class ParameterTracker:
     # Initialization
-    def __init__(self, param_name, min_val, max_val, address):
+    def __init__(self, param_name, min_val, max_val, address, function=FC_READ_HOLDING_REGISTERS,
+                 data_type=DEFAULT_TYPE, scale=1.0, offset=0.0, unit=''):
         self.param_name = param_name
         self.min_val = min_val
         self.max_val = max_val
         self.address = address
+        self.function = function
+        self.is_bit = function in BIT_FUNCTIONS  # Bits are plotted as step traces
+        self.address_label = format_address(function, address)
+        self.data_type = data_type
+        self.scale = scale
+        self.offset = offset
+        self.unit = unit
+        self.display_name = f"{param_name} [{unit}]" if unit else param_name  # Used in legends and checkboxes
         self.segments = []
         self.current_segment = None
         self.is_active = False
@@ -120,7 +851,8 @@ class ParameterTracker:
         self.current_segment = {
             'start_point': current_point,
             'points': [],
-            'values': []
+            'values': [],
+            'flagged': []  # (point, value) of stale / out-of-range samples, drawn as markers
         }
         self.is_active = True
         print(f"[INFO] Started plotting {self.param_name}")
@@ -133,11 +865,17 @@ class ParameterTracker:
         self.is_active = False
         print(f"[INFO] Stopped plotting {self.param_name}")
     
-    # Appending data in plot
-    def add_data_point(self, point_index, value):
+    # Appending data in plot (NaN for failed reads leaves a gap in the trace)
+    def add_data_point(self, point_index, value, quality=QUALITY_GOOD):
         if self.is_active and self.current_segment is not None:
             self.current_segment['points'].append(point_index)
             self.current_segment['values'].append(value)
+            if quality in (QUALITY_STALE, QUALITY_OUT_OF_RANGE):
+                self.current_segment['flagged'].append((point_index, value))
+
+    def get_flagged_points(self):
+        segments = self.segments + ([self.current_segment] if self.current_segment else [])
+        return [point for segment in segments for point in segment['flagged']]
 
     def get_all_plot_data(self):
         all_points = []
@@ -157,36 +895,63 @@ class ParameterTracker:
             self.current_segment = {
                 'start_point': 0,
                 'points': [],
-                'values': []
+                'values': [],
+                'flagged': []
             }
 
 def initialize_parameter_data():
-    global parameter_data
+    global parameter_data, event_triggers, param_index, csv_schema, formula_evaluator
     parameter_data = {}
     for _, row in df_params.iterrows():
         param_name = row['Parameter']
         min_val = row['Min']
         max_val = row['Max']
         address = row['Address']
-        parameter_data[param_name] = ParameterTracker(param_name, min_val, max_val, address)
+        function = row['Function']
+        parameter_data[param_name] = ParameterTracker(param_name, min_val, max_val, address, function,
+                                                      row['Type'], row['Scale'], row['Offset'], row['Unit'])
+    param_index = {name: i for i, name in enumerate(df_params['Parameter'])}
+    csv_schema = build_csv_schema(df_params)
+    formula_evaluator = FormulaEvaluator(df_params)
+    refresh_read_plan()
+    event_triggers = build_event_triggers(df_params)
+
+# ----- (Re)building the read plan for the current transport -----
+def refresh_read_plan(plan=None):
+    global read_plan, plan_dirty
+    read_plan = build_read_plan(df_params) if plan is None else plan
+    plan_dirty = False
+    for block in read_plan:
+        block.columns = np.array([param_index[name] for name in block.param_names], dtype=np.intp)
+    print(f"[INFO] {len(parameter_data)} parameters will be read with {len(read_plan)} Modbus requests per cycle")
 
 # Connecting to PLC
+# (For RTU the address is the serial port and the port is the baud rate)
 def connect_to_plc(ip_address, port):
-    global plc_client, is_connected, connection_status
+    global plc_client, is_connected, connection_status, plc_transport, read_cost_model, planner_gaps, planner_cycle
     try:
         if plc_client:
             plc_client.close()
         
-        plc_client = ModbusTcpClient(ip_address, port=port)
+        transport = make_transport(plc_transport_name, ip_address, port)
+        previous_limits = plc_transport.read_limits() if plc_transport else None
+        new_device = plc_transport is None or transport.describe() != plc_transport.describe()
+        plc_transport = transport
+        if new_device:  # Learned costs and unmapped holes belong to one device
+            read_cost_model, planner_gaps, planner_cycle = ReadCostModel(), {}, 0
+            plan_breaks.clear()
+        if df_params is not None and (new_device or transport.read_limits() != previous_limits):
+            refresh_read_plan()  # Frame limits / gap costs differ per transport
+        plc_client = transport.create_client()
         if plc_client.connect():
             is_connected = True
             connection_status = "Connected"
-            print(f"[INFO] Connected to PLC at {ip_address}:{port}")
+            print(f"[INFO] Connected to PLC at {transport.describe()}")
             return True
         else:
             is_connected = False
             connection_status = "Connection Failed"
-            print(f"[ERROR] Could not connect to PLC at {ip_address}:{port}")
+            print(f"[ERROR] Could not connect to PLC at {transport.describe()}")
             return False
     except Exception as e:
         is_connected = False
@@ -205,18 +970,16 @@ def disconnect_from_plc():
         print("[INFO] Manually disconnected from PLC")
 
 # Check PLC connection status
-def check_connection():
-    """Check if PLC connection is still alive"""
-    global plc_client, is_connected
-    if not plc_client or not is_connected:
-        return False
-    
-    try:
-        # Try a simple read to check connection
-        result = plc_client.read_holding_registers(address=0, count=1)
-        return not result.isError()
-    except Exception:
-        return False
+# No separate health check request: the reads of the cycle are the check. An exception response (e.g. an
+# unmapped address) still means the PLC answered; only a transport failure or timeout means the link is gone.
+def mark_connection_lost():
+    """Flag the connection as lost and start reconnecting"""
+    global is_connected, connection_status
+    if is_connected:
+        print("[WARNING] PLC connection lost. Starting reconnection attempts...")
+    is_connected = False
+    connection_status = "Connection Lost"
+    start_reconnect_thread()
 
 # If disconnected then connect again
 def reconnect_worker():
@@ -251,76 +1014,1941 @@ def start_reconnect_thread():
     reconnect_thread = threading.Thread(target=reconnect_worker, daemon=True)
     reconnect_thread.start()
 
-# Reading register data from PLC
+# ----- Append-only binary journal of fixed-size sample records (group-committed with fsync) -----
+class SampleJournal:
+    def __init__(self, path, csv_path):
+        self.path = path
+        self.last_sync = 0.0
+        self.file = open(path, 'wb')
+        header = JOURNAL_MAGIC + struct.pack('<H', len(csv_path.encode())) + csv_path.encode()
+        self.file.write(header.ljust(JOURNAL_HEADER_SIZE, b'\0'))
+        self.sync(force=True)
+
+    # One record per parameter, written in df_params column order
+    def append(self, stamps, vector, quality):
+        records = bytearray()
+        for column, (timestamp_ns, code, value) in enumerate(zip(stamps.tolist(), quality.tolist(), vector.tolist())):
+            body = JOURNAL_RECORD_BODY.pack(timestamp_ns, column, code, value)
+            records += body + struct.pack('<I', zlib.crc32(body))
+        self.file.write(records)
+        self.sync()
+
+    def sync(self, force=False):
+        now = clock.monotonic()
+        if force or now - self.last_sync >= JOURNAL_SYNC_INTERVAL:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.last_sync = now
+
+    # Everything in the journal is now durable in the csv -> keep only the header
+    def checkpoint(self):
+        self.file.truncate(JOURNAL_HEADER_SIZE)
+        self.file.seek(JOURNAL_HEADER_SIZE)
+        self.sync(force=True)
+
+    def close(self):
+        self.file.close()
+        os.remove(self.path)
+
+# ----- Reading a journal left behind by a crash: returns (csv path, list of (row ns, (value, quality) per column)) -----
+def read_journal(path):
+    with open(path, 'rb') as f:
+        header = f.read(JOURNAL_HEADER_SIZE)
+        data = f.read()
+    if not header.startswith(JOURNAL_MAGIC):
+        raise ValueError(f"{path} is not a sample journal")
+    (path_length,) = struct.unpack_from('<H', header, len(JOURNAL_MAGIC))
+    start = len(JOURNAL_MAGIC) + 2
+    csv_path = header[start:start + path_length].decode()
+    rows = []
+    previous_column = None
+    for offset in range(0, len(data) - JOURNAL_RECORD.size + 1, JOURNAL_RECORD.size):
+        timestamp_ns, column, code, value, crc = JOURNAL_RECORD.unpack_from(data, offset)
+        if zlib.crc32(data[offset:offset + JOURNAL_RECORD_BODY.size]) != crc:
+            print(f"[WARNING] Journal record at byte {JOURNAL_HEADER_SIZE + offset} is damaged, ignoring the rest")
+            break
+        if previous_column is None or column <= previous_column:  # Column order restarts -> new sample row
+            rows.append([timestamp_ns, {}])
+        rows[-1][0] = min(rows[-1][0], timestamp_ns)
+        rows[-1][1][column] = (value, code)
+        previous_column = column
+    return csv_path, rows
+
+# ----- Schema and parameter count of an existing data log (layout from the header, timestamp style from the last row) -----
+def detect_csv_schema(lines):
+    layout = "long" if lines[0] == "Timestamp,Parameter,Value,Quality" else "wide"
+    last_time = lines[-1].split(',')[0] if len(lines) > 1 else ""
+    timestamp_format = ("epoch_ms" if last_time.isdigit() else "iso" if "T" in last_time
+                        else "local" if last_time else CSV_TIMESTAMP_FORMAT)
+    if layout == "wide":
+        param_names = lines[0].split(',')[1::2]
+    else:  # Long logs do not list the parameters in the header -> parameter csv of this start
+        param_names = df_params['Parameter'].tolist() if df_params is not None else []
+    decimals = dict(zip(df_params['Parameter'], df_params['Decimals'])) if df_params is not None else {}
+    schema = CsvSchema(param_names, [decimals.get(name, DEFAULT_DECIMALS) for name in param_names], layout, timestamp_format)
+    return schema, len(param_names)
+
+# ----- Replaying samples of a crashed session into its csv log (run before a new journal is created) -----
+def recover_journal(path=JOURNAL_FILE):
+    if not os.path.exists(path):
+        return
+    try:
+        csv_path, rows = read_journal(path)
+        if rows and os.path.exists(csv_path):
+            with open(csv_path, 'r', newline='') as f:
+                lines = f.read().splitlines()
+            schema, param_count = detect_csv_schema(lines)
+            last_logged = lines[-1].split(',')[0] if len(lines) > 1 else ""
+            replayed = []
+            for row_ns, row_values in rows:
+                if schema.format_time(row_ns) <= last_logged:  # Already written before the crash
+                    continue
+                cells = [row_values.get(i, (np.nan, QUALITY_COMM_FAIL)) for i in range(param_count)]
+                replayed.append(schema.format_row(row_ns, np.array([value for value, _ in cells]),
+                                                  np.array([code for _, code in cells], dtype=np.uint8)))
+            with open(csv_path, 'a', newline='') as f:
+                f.writelines(replayed)
+                f.flush()
+                os.fsync(f.fileno())
+            print(f"[INFO] Recovered {len(replayed)} rows from journal into {csv_path}")
+        os.remove(path)
+    except Exception as e:
+        print(f"[ERROR] Journal recovery failed (journal kept as {path}): {e}")
+
+# ----- Buffering one sample for the data logging csv (formatted here with the precompiled schema, not while reading) -----
+def log_sample(stamps, values, quality):
+    vector = np.array([np.nan if values.get(name) is None else values[name] for name in df_params['Parameter']])
+    if uplink is not None:
+        uplink.append(stamps, vector, quality)  # Only queued here, the network is handled by the uplink thread
+    if not log_file_path:
+        return
+    if sample_journal is not None:
+        try:
+            sample_journal.append(stamps, vector, quality)
+        except Exception as e:
+            print(f"[ERROR] Journal write failed: {e}")
+    csv_buffer.append(csv_schema.format_row(int(stamps.min()), vector, quality))
+    if sample_journal is None or clock.monotonic() - csv_last_flush >= CSV_FLUSH_INTERVAL:
+        flush_csv_buffer()
+
+# ----- Writing buffered rows in one batch, then releasing them from the journal -----
+def flush_csv_buffer():
+    global csv_buffer, csv_last_flush
+    csv_last_flush = clock.monotonic()
+    if not csv_buffer:
+        return
+    try:
+        with open(log_file_path, mode='a', newline='') as f:
+            f.write("".join(csv_buffer))
+            f.flush()
+            os.fsync(f.fileno())
+        csv_buffer = []
+        if sample_journal is not None:
+            sample_journal.checkpoint()
+    except Exception as e:
+        print(f"[ERROR] CSV logging failed: {e}")
+
+# ----- Flagging analog values that stayed bit-identical for STALE_SECONDS (frozen source) -----
+def apply_stale_check(vector, stamps, quality):
+    global stale_last_values, stale_since_ns
+    if not STALE_SECONDS:
+        return
+    if stale_last_values is None or len(stale_last_values) != len(vector):
+        stale_last_values, stale_since_ns = vector.copy(), stamps.copy()
+        return
+    changed = (vector != stale_last_values) | np.isnan(vector)
+    stale_since_ns[changed] = stamps[changed]
+    stale_last_values[:] = vector
+    frozen = ~changed & ~df_params['Function'].isin(BIT_FUNCTIONS + (FC_VIRTUAL,)).to_numpy() & (quality == QUALITY_GOOD)
+    frozen &= stamps - stale_since_ns >= int(STALE_SECONDS * 1e9)
+    quality[frozen] = QUALITY_STALE
+
+# Reading register data from PLC and logging it
+# Returns (values dict, int64 array of epoch-ns sample times, uint8 array of quality codes), both in df_params order
 def read_plc_data():
+    values, stamps, quality = acquire_sample()
+    log_sample(stamps, values, quality)  # Row time = first block read of the cycle
+    return values, stamps, quality
+
+# ----- One read cycle without logging (source stage of the pipeline): read, decode, stale check, calculated tags -----
+def acquire_sample():
     global plc_client, is_connected, connection_status
     values = {}
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    stamps = np.full(len(df_params), sample_time_ns(), dtype=np.int64)
+    quality = np.full(len(df_params), QUALITY_COMM_FAIL, dtype=np.uint8)
+    vector = np.full(len(df_params), np.nan)
     
     # Check connection status first
-    if not is_connected or not check_connection():
-        if is_connected:  # Connection was lost
-            is_connected = False
-            connection_status = "Connection Lost"
-            print("[WARNING] PLC connection lost. Starting reconnection attempts...")
-            start_reconnect_thread()
-        
-        # Log empty data when disconnected
+    if not is_connected or plc_client is None:
+        # Log empty data when disconnected (still logged to CSV with empty values and timestamp)
         print("[WARNING] No PLC connection - logging empty values")
         for param_name in parameter_data.keys():
             values[param_name] = None
-        
-        # Still log to CSV with empty values and timestamp
-        if log_file_path:
-            try:
-                row_data = [timestamp] + [values.get(param, "") for param in df_params['Parameter'].tolist()]
-                with open(log_file_path, mode='a', newline='') as f:
-                    pd.DataFrame([row_data], columns=["Timestamp"] + df_params['Parameter'].tolist()).to_csv(f, index=False, header=False)
-            except Exception as e:
-                print(f"[ERROR] CSV logging failed: {e}")
-        
-        return values
+        return values, stamps, quality
     
-    # Read real PLC data when connected
-    for param_name, tracker in parameter_data.items():
+    # Read real PLC data when connected (one request per ReadBlock), a transport failure ends the cycle
+    for block in read_plan:
+        block_label = f"{format_address(block.function, block.start)}..{format_address(block.function, block.end - 1)}"
         try:
-            result = plc_client.read_holding_registers(address=tracker.address, count=REGISTER_COUNT)
-            if result.isError():
-                print(f"[ERROR] Failed to read {param_name} (%MW{tracker.address})")
-                values[param_name] = None
+            with plc_lock:
+                block_values, block_quality, block_ns = read_block_timed(block)
+            stamps[block.columns] = block_ns
+            quality[block.columns] = block_quality
+            if block_values is None:
+                print(f"[ERROR] Failed to read {len(block.param_names)} parameters ({block_label}): "
+                      f"{quality_name(int(block_quality[0]))}")
+                if block_quality[0] == QUALITY_EXCEPTION | EXCEPTION_ILLEGAL_ADDRESS and len(block.param_names) > 1:
+                    split_read_block(block)  # Read through an unmapped hole -> smaller requests from the next cycle
+                for param_name in block.param_names:
+                    values[param_name] = None
+                if block_quality[0] == QUALITY_COMM_FAIL:  # No answer at all, not an exception response
+                    mark_connection_lost()
+                    break
+                continue
+            vector[block.columns] = block_values
+            if block.is_bit:
+                for param_name, value in zip(block.param_names, block_values.tolist()):
+                    values[param_name] = value
+                print(f"[INFO] Read {len(block.param_names)} bits in one request ({block_label})")
             else:
-                reg1, reg2 = result.registers
-                byte_data = struct.pack('>HH', reg1, reg2)
-                value = struct.unpack('>f', byte_data)[0]
-                values[param_name] = round(value, 2)
-                print(f"[INFO] {param_name} = {value:.2f} (%MW{tracker.address})")
+                for param_name, value in zip(block.param_names, block_values.tolist()):
+                    values[param_name] = None if np.isnan(value) else value  # Logged with the Decimals of the parameter
+                    tracker = parameter_data[param_name]
+                    print(f"[INFO] {param_name} = {value:.2f} {tracker.unit} ({tracker.address_label})")
         except Exception as e:
-            print(f"[ERROR] Error reading {param_name}: {e}")
-            # Connection might have been lost during reading
-            is_connected = False
-            connection_status = "Connection Lost"
-            values[param_name] = None
-            start_reconnect_thread()
+            print(f"[ERROR] Error reading {block_label}: {e}")
+            # Connection lost during reading (connection refused / reset, no response after the retries)
+            mark_connection_lost()
+            break
+    for param_name in parameter_data:
+        values.setdefault(param_name, None)  # Blocks not read after a lost connection
     
-    # Log to CSV
-    if log_file_path:
+    update_read_planner()
+    apply_stale_check(vector, stamps, quality)
+    # Calculated tags from this cycle's vector (quality of the worst input, so stale inputs give stale results)
+    if formula_evaluator is not None and formula_evaluator.names:
+        formula_evaluator.apply(vector, quality, stamps)
+        for param_name, value in zip(formula_evaluator.names, vector[formula_evaluator.columns].tolist()):
+            values[param_name] = None if np.isnan(value) else value
+    return values, stamps, quality
+
+# ----- Engineering value -> register words of the parameter's Type, same word order as read_block() -----
+def encode_setpoint(tracker, value):
+    registers, raw_type, fmt = DATA_TYPES[tracker.data_type]
+    raw = (value - tracker.offset) / tracker.scale
+    if fmt != '>f':  # Integer types: rounded and clamped to the type range
+        limits = np.iinfo(raw_type)
+        raw = int(min(max(round(raw), limits.min), limits.max))
+    return list(struct.unpack(f'>{registers}H', struct.pack(fmt, raw)))
+
+# ----- Register words read back -> engineering value -----
+def decode_setpoint(tracker, words):
+    registers, _, fmt = DATA_TYPES[tracker.data_type]
+    raw = struct.unpack(fmt, struct.pack(f'>{registers}H', *words))[0]
+    return raw * tracker.scale + tracker.offset
+
+# Setpoints can be written to holding registers (%MW) only
+def is_writable(param_name):
+    tracker = parameter_data.get(param_name)
+    return tracker is not None and tracker.function == FC_READ_HOLDING_REGISTERS
+
+# ----- Queueing a setpoint change (later changes of the same parameter replace earlier ones) -----
+def queue_setpoint_write(param_name, value):
+    if not is_writable(param_name):
+        print(f"[ERROR] {param_name} is not a writable holding register")
+        return False
+    with pending_writes_lock:
+        pending_writes[param_name] = float(value)
+    print(f"[INFO] Queued write {param_name} = {value}")
+    return True
+
+# ----- Grouping queued setpoints into contiguous write_registers blocks -----
+def build_write_blocks(writes):
+    blocks = []  # [start address, [words], [(param_name, value)]]
+    for address, param_name, value in sorted((parameter_data[name].address, name, value) for name, value in writes.items()):
+        words = encode_setpoint(parameter_data[param_name], value)
+        block = blocks[-1] if blocks else None
+        if (block is None or address != block[0] + len(block[1])
+                or len(block[1]) + len(words) > MAX_REGISTERS_PER_WRITE):
+            block = [address, [], []]
+            blocks.append(block)
+        block[1].extend(words)
+        block[2].append((param_name, value))
+    return blocks
+
+# ----- Appending write results to the audit log -----
+def log_writes(rows):
+    for row in rows:
+        print(f"[WRITE] {row[1]} ({row[2]}) = {row[3]} -> read back {row[4]} [{row[5]}]")
+    if not log_file_path:
+        return
+    audit_path = log_file_path.replace('_PLC_Data_log.csv', '_PLC_Write_audit.csv')
+    try:
+        new_file = not os.path.exists(audit_path)
+        with open(audit_path, mode='a', newline='') as f:
+            if new_file:
+                f.write("Timestamp,Parameter,Address,Requested,ReadBack,Result\n")
+            f.writelines(",".join(str(cell) for cell in row) + "\n" for row in rows)
+    except Exception as e:
+        print(f"[ERROR] Write audit logging failed: {e}")
+
+# ----- Executing queued setpoints between poll cycles, with read-back verification -----
+def execute_pending_writes():
+    if not pending_writes:
+        return
+    with pending_writes_lock:
+        writes = dict(pending_writes)
+        pending_writes.clear()
+    blocks = build_write_blocks(writes)
+    rows = []
+    for index, (start, words, params) in enumerate(blocks):
+        if index >= MAX_WRITE_BLOCKS_PER_CYCLE or not is_connected:
+            with pending_writes_lock:  # Retry in the next gap, unless a newer value was queued meanwhile
+                for param_name, value in params:
+                    pending_writes.setdefault(param_name, value)
+            continue
+        timestamp = format_timestamp(sample_time_ns())
         try:
-            row_data = [timestamp] + [values.get(param, "") for param in df_params['Parameter'].tolist()]
-            with open(log_file_path, mode='a', newline='') as f:
-                pd.DataFrame([row_data], columns=["Timestamp"] + df_params['Parameter'].tolist()).to_csv(f, index=False, header=False)
+            with plc_lock:
+                result = plc_client.write_registers(address=start, values=words, slave=SLAVE_ID)
+                readback = None if result.isError() else plc_client.read_holding_registers(
+                    address=start, count=len(words), slave=SLAVE_ID)
+            if readback is None or readback.isError():
+                status = "WRITE_FAILED" if readback is None else "VERIFY_FAILED"
+                rows += [[timestamp, name, f"%MW{parameter_data[name].address}", value, "", status] for name, value in params]
+                continue
+            for param_name, value in params:
+                tracker = parameter_data[param_name]
+                first = tracker.address - start
+                last = first + DATA_TYPES[tracker.data_type][0]
+                read_words = readback.registers[first:last]
+                status = "OK" if read_words == words[first:last] else "MISMATCH"
+                rows.append([timestamp, param_name, f"%MW{tracker.address}", value,
+                             round(decode_setpoint(tracker, read_words), 6), status])
         except Exception as e:
-            print(f"[ERROR] CSV logging failed: {e}")
-    
-    return values
+            print(f"[ERROR] Writing %MW{start} failed: {e}")
+            rows += [[timestamp, name, f"%MW{parameter_data[name].address}", value, "", "ERROR"] for name, value in params]
+    log_writes(rows)
 
-def generate_data():
-    values = read_plc_data()
+# ----- Event trigger on one parameter (level, rate-of-change or out of Min/Max range) -----
+class EventTrigger:
+    # Condition text from csv: ">80", "<5", "rate>2.5" (units per second) or "range"
+    def __init__(self, param_name, condition, event_params, min_val, max_val):
+        self.param_name = param_name
+        self.condition = condition.strip().lower()
+        self.event_params = event_params
+        self.min_val = min_val
+        self.max_val = max_val
+        self.threshold = None
+        if self.condition.startswith('rate>'):
+            self.threshold = float(self.condition[5:])
+        elif self.condition[:1] in ('>', '<'):
+            self.threshold = float(self.condition[1:])
+        elif self.condition != 'range':
+            raise ValueError(f"Unsupported trigger '{condition}' for {param_name}")
+        self.armed = True  # Fires once per crossing, re-armed when the condition clears
+        self.last_value = None
+        self.last_time = None
+
+    def is_violated(self, value, now):
+        if self.condition == 'range':
+            return value < self.min_val or value > self.max_val
+        if self.condition.startswith('>'):
+            return value > self.threshold
+        if self.condition.startswith('<'):
+            return value < self.threshold
+        # Rate of change against previous sample
+        if self.last_value is None or now <= self.last_time:
+            return False
+        return abs(value - self.last_value) / (now - self.last_time) > self.threshold
+
+    def check(self, value, now):
+        violated = self.is_violated(value, now)
+        self.last_value, self.last_time = value, now
+        if violated and self.armed:
+            self.armed = False
+            return True
+        if not violated:
+            self.armed = True
+        return False
+
+# ----- Creating triggers from optional 'Trigger' / 'EventTags' columns of input csv -----
+def build_event_triggers(df):
+    triggers = []
+    if 'Trigger' not in df.columns:
+        return triggers
+    for _, row in df.iterrows():
+        if pd.isna(row['Trigger']) or not str(row['Trigger']).strip():
+            continue
+        event_params = [row['Parameter']]
+        if 'EventTags' in df.columns and not pd.isna(row['EventTags']):
+            related = [name.strip() for name in str(row['EventTags']).split(';') if name.strip()]
+            event_params += [name for name in related if name in parameter_data and name not in event_params]
+        for condition in str(row['Trigger']).split(';'):
+            if condition.strip():
+                triggers.append(EventTrigger(row['Parameter'], condition, event_params, row['Min'], row['Max']))
+    print(f"[INFO] {len(triggers)} event triggers configured")
+    return triggers
+
+# ----- Checking triggers on every normal-rate sample and starting bursts -----
+def process_event_triggers(values, stamps, quality):
+    param_names = df_params['Parameter'].tolist()
+    row = np.array([np.nan if values.get(name) is None else values[name] for name in param_names], dtype=np.float32)
+    pre_trigger_ring.append((stamps.copy(), row, quality.copy()))
+    for trigger in event_triggers:
+        value = values.get(trigger.param_name)
+        if value is None:
+            continue
+        timestamp_ns = int(stamps[param_index[trigger.param_name]])
+        if not trigger.check(value, timestamp_ns / 1e9):
+            continue
+        with busy_event_lock:  # Check and claim in one step, a burst may finish meanwhile
+            if busy_event_params.intersection(trigger.event_params):
+                continue
+            busy_event_params.update(trigger.event_params)
+        print(f"[EVENT] {trigger.param_name} = {value} triggered '{trigger.condition}', "
+              f"fast scan of {len(trigger.event_params)} parameters for {EVENT_WINDOW} s")
+        threading.Thread(target=record_event, args=(trigger, value, timestamp_ns, list(pre_trigger_ring)),
+                         daemon=True).start()
+
+# ----- Fast-scan burst of the event parameters, saved as one compressed event file -----
+# Calculated event parameters are evaluated on every burst sample, their measured inputs are read in the burst too
+def record_event(trigger, trigger_value, trigger_ns, pre_rows):
+    columns = [param_index[name] for name in trigger.event_params]
+    read_columns = set(columns)
+    if formula_evaluator is not None:
+        for column, sources in zip(formula_evaluator.columns.tolist(), formula_evaluator.sources.tolist()):
+            if column in read_columns:
+                read_columns.update(sources)
+    burst_plan = build_read_plan(df_params.iloc[sorted(read_columns)])
+    for block in burst_plan:
+        block.columns = np.array([param_index[name] for name in block.param_names], dtype=np.intp)
+    times_ns, rows, qualities = [], [], []
+    try:
+        end_time = time.monotonic() + EVENT_WINDOW
+        while time.monotonic() < end_time and is_connected:
+            cycle_start = time.monotonic()
+            vector = np.full(len(df_params), np.nan)
+            stamps = np.full(len(df_params), sample_time_ns(), dtype=np.int64)
+            quality = np.full(len(df_params), QUALITY_COMM_FAIL, dtype=np.uint8)
+            with plc_lock:
+                for block in burst_plan:
+                    block_values, block_quality, block_ns = read_block_timed(block, learn=False)
+                    stamps[block.columns] = block_ns
+                    quality[block.columns] = block_quality
+                    if block_values is not None:
+                        vector[block.columns] = block_values
+            if formula_evaluator is not None:
+                formula_evaluator.apply(vector, quality, stamps)
+            times_ns.append(stamps[columns])
+            rows.append(vector[columns])
+            qualities.append(quality[columns])
+            time.sleep(max(0.0, FAST_SCAN_INTERVAL - (time.monotonic() - cycle_start)))
+    except Exception as e:
+        print(f"[ERROR] Event burst for {trigger.param_name} stopped early: {e}")
+    finally:
+        with busy_event_lock:
+            busy_event_params.difference_update(trigger.event_params)
+    try:
+        os.makedirs(EVENT_DIR, exist_ok=True)
+        stamp = datetime.fromtimestamp(trigger_ns / 1e9).strftime('%Y-%m-%d_%H-%M-%S')
+        file_name = os.path.join(EVENT_DIR, f"{stamp}_{trigger.param_name}_event.npz")
+        np.savez_compressed(
+            file_name,
+            params=np.array(trigger.event_params),
+            trigger=np.array(f"{trigger.param_name} {trigger.condition} (value {trigger_value})"),
+            trigger_time_ns=np.int64(trigger_ns),
+            pre_time_ns=np.array([stamps[columns] for stamps, _, _ in pre_rows], dtype=np.int64).reshape(-1, len(columns)),
+            pre_values=np.array([row[columns] for _, row, _ in pre_rows], dtype=np.float32).reshape(-1, len(columns)),
+            pre_quality=np.array([quality[columns] for _, _, quality in pre_rows], dtype=np.uint8).reshape(-1, len(columns)),
+            time_ns=np.array(times_ns, dtype=np.int64).reshape(-1, len(columns)),
+            values=np.array(rows, dtype=np.float32).reshape(-1, len(columns)),
+            quality=np.array(qualities, dtype=np.uint8).reshape(-1, len(columns)))
+        print(f"[EVENT] Saved {len(rows)} fast samples + {len(pre_rows)} pre-trigger samples to {file_name}")
+    except Exception as e:
+        print(f"[ERROR] Saving event file failed: {e}")
+
+# ----- Rolling window with O(1) update of mean, min, max, stddev and rate-of-change -----
+class RollingWindow:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.samples = deque()  # (sequence number, time, value) inside the window
+        self.min_queue = deque()  # (sequence number, value), monotonic increasing values -> front is the minimum
+        self.max_queue = deque()  # (sequence number, value), monotonic decreasing values -> front is the maximum
+        self.sequence = 0  # Identifies samples for the min / max queues (timestamps may repeat)
+        self.shift = None  # Sums are kept around the first value for numerical stability
+        self.sum = 0.0
+        self.sum_sq = 0.0
+
+    def add(self, now, value):
+        if math.isfinite(value):  # One NaN / Inf would stay in the sums and break the min / max queues
+            if self.shift is None:
+                self.shift = value
+            self.sequence += 1
+            self.samples.append((self.sequence, now, value))
+            delta = value - self.shift
+            self.sum += delta
+            self.sum_sq += delta * delta
+            while self.min_queue and self.min_queue[-1][1] > value:
+                self.min_queue.pop()
+            self.min_queue.append((self.sequence, value))
+            while self.max_queue and self.max_queue[-1][1] < value:
+                self.max_queue.pop()
+            self.max_queue.append((self.sequence, value))
+        # Drop samples that left the window (also when the new value was skipped)
+        cutoff = now - self.seconds
+        while self.samples and self.samples[0][1] <= cutoff:
+            old_sequence, _, old_value = self.samples.popleft()
+            delta = old_value - self.shift
+            self.sum -= delta
+            self.sum_sq -= delta * delta
+            if self.min_queue[0][0] == old_sequence:
+                self.min_queue.popleft()
+            if self.max_queue[0][0] == old_sequence:
+                self.max_queue.popleft()
+
+    @property
+    def count(self):
+        return len(self.samples)
+
+    def snapshot(self):
+        n = len(self.samples)
+        if n == 0:
+            return None
+        mean_delta = self.sum / n
+        variance = max(0.0, self.sum_sq / n - mean_delta * mean_delta)
+        (_, first_time, first_value), (_, last_time, last_value) = self.samples[0], self.samples[-1]
+        rate = (last_value - first_value) / (last_time - first_time) if last_time > first_time else 0.0
+        return {'mean': self.shift + mean_delta, 'min': self.min_queue[0][1], 'max': self.max_queue[0][1],
+                'std': math.sqrt(variance), 'rate': rate, 'count': n}
+
+# ----- Statistics windows and hysteresis alarm of one parameter -----
+class TagStatistics:
+    def __init__(self, param_name, min_val, max_val):
+        self.param_name = param_name
+        self.min_val = min_val
+        self.max_val = max_val
+        self.deadband = (max_val - min_val) * ALARM_HYSTERESIS
+        self.windows = [RollingWindow(seconds) for seconds, _ in STATS_WINDOWS]
+        self.last_value = None
+        self.alarm = "NORMAL"  # NORMAL, HIGH or LOW
+
+    # Returns the new alarm state when it changed, otherwise None
+    def update(self, now, value):
+        self.last_value = value
+        for window in self.windows:  # Windows skip NaN / Inf but still drop their old samples
+            window.add(now, value)
+        if not math.isfinite(value):  # Shown as "now", but kept out of the alarm state
+            return None
+        if value > self.max_val:  # Straight from LOW to HIGH (and back) without a NORMAL in between
+            new_alarm = "HIGH"
+        elif value < self.min_val:
+            new_alarm = "LOW"
+        elif self.alarm == "HIGH" and value < self.max_val - self.deadband:
+            new_alarm = "NORMAL"
+        elif self.alarm == "LOW" and value > self.min_val + self.deadband:
+            new_alarm = "NORMAL"
+        else:
+            new_alarm = self.alarm
+        if new_alarm != self.alarm:
+            self.alarm = new_alarm
+            return new_alarm
+        return None
+
+def initialize_statistics(log_path):
+    global tag_statistics, stats_log_path, alarm_log_path, last_stats_log_time
+    tag_statistics = {name: TagStatistics(name, tracker.min_val, tracker.max_val)
+                      for name, tracker in parameter_data.items()}
+    last_stats_log_time = sample_time_ns() / 1e9
+    if log_path:
+        stats_log_path = log_path.replace('_PLC_Data_log.csv', '_PLC_Stats_log.csv')
+        alarm_log_path = log_path.replace('_PLC_Data_log.csv', '_PLC_Alarm_log.csv')
+        for path, columns in [(stats_log_path, "Timestamp,Parameter,Window,Mean,Min,Max,StdDev,Rate,Count,Alarm\n"),
+                              (alarm_log_path, "Timestamp,Parameter,Value,Alarm\n")]:
+            if not os.path.exists(path):
+                with open(path, mode='w', newline='') as f:
+                    f.write(columns)
+
+# ----- Feeding every sample into the statistics engine, logging alarms and periodic aggregates -----
+def update_statistics(values, stamps):
+    global last_stats_log_time
+    alarm_rows = []
+    with statistics_lock:
+        for param_name, value in values.items():
+            if value is None:
+                continue
+            stats = tag_statistics[param_name]
+            timestamp_ns = int(stamps[param_index[param_name]])
+            new_alarm = stats.update(timestamp_ns / 1e9, value)
+            if new_alarm is not None:
+                alarm_rows.append((param_name, value, new_alarm, stats, timestamp_ns))
+    for param_name, value, new_alarm, stats, timestamp_ns in alarm_rows:
+        print(f"[ALARM] {param_name} = {value} -> {new_alarm} (range {stats.min_val}-{stats.max_val})")
+    alarm_rows = [f"{format_timestamp(timestamp_ns)},{param_name},{value},{new_alarm}\n"
+                  for param_name, value, new_alarm, _, timestamp_ns in alarm_rows]
+    now = stamps.max() / 1e9
+    try:
+        if alarm_rows and alarm_log_path:
+            with open(alarm_log_path, mode='a', newline='') as f:
+                f.writelines(alarm_rows)
+        if stats_log_path and now - last_stats_log_time >= STATS_LOG_INTERVAL:
+            last_stats_log_time = now
+            timestamp = datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S')
+            rows = []
+            with statistics_lock:
+                for stats in tag_statistics.values():
+                    for window, (_, label) in zip(stats.windows, STATS_WINDOWS):
+                        snap = window.snapshot()
+                        if snap:
+                            rows.append(f"{timestamp},{stats.param_name},{label},{snap['mean']:.4f},{snap['min']:.4f},"
+                                        f"{snap['max']:.4f},{snap['std']:.4f},{snap['rate']:.6f},{snap['count']},"
+                                        f"{stats.alarm}\n")
+            with open(stats_log_path, mode='a', newline='') as f:
+                f.writelines(rows)
+    except Exception as e:
+        print(f"[ERROR] Statistics logging failed: {e}")
+
+# ----- Text for the info panel below the plot (active parameters only) -----
+# Runs in the GUI timer while the analyze stage updates the windows, so both hold statistics_lock
+def format_statistics_text(param_names):
+    with statistics_lock:
+        snapshots = [(name, stats.last_value, stats.alarm, [window.snapshot() for window in stats.windows])
+                     for name, stats in ((name, tag_statistics.get(name)) for name in param_names) if stats]
+    lines = []
+    for param_name, last_value, alarm, snaps in snapshots:
+        if last_value is None:
+            continue
+        parts = [f"{param_name:<24} now {last_value:>9.2f} {parameter_data[param_name].unit}"]
+        for snap, (_, label) in zip(snaps, STATS_WINDOWS):
+            if snap:
+                parts.append(f"{label}: mean {snap['mean']:.2f} min {snap['min']:.2f} max {snap['max']:.2f} "
+                             f"sd {snap['std']:.2f} rate {snap['rate']:+.3f}/s")
+        parts.append(f"ALARM {alarm}" if alarm != "NORMAL" else "OK")
+        lines.append(" | ".join(parts))
+    return "\n".join(lines)
+
+# ----- Start (epoch seconds) of the bucket holding now, aligned on local time like the labels -----
+# (hourly buckets start at local :00 also in zones like UTC+5:30, daily ones at local midnight)
+def local_bucket_start(now, seconds):
+    offset = int(datetime.fromtimestamp(now).astimezone().utcoffset().total_seconds())
+    return int((now + offset) // seconds) * seconds - offset
+
+# ----- One aggregation level (min/max/mean/last/count per parameter per time bucket) -----
+class RollupLevel:
+    def __init__(self, seconds, file_path, param_names, next_level=None):
+        self.seconds = seconds
+        self.file_path = file_path
+        self.next_level = next_level  # Finished buckets are merged into the coarser level
+        self.bucket = None  # Start time (epoch seconds) of the bucket being filled
+        size = len(param_names)
+        self.mins = np.full(size, np.nan)
+        self.maxs = np.full(size, np.nan)
+        self.sums = np.zeros(size)
+        self.lasts = np.full(size, np.nan)
+        self.counts = np.zeros(size, dtype=np.int64)
+        if file_path and not os.path.exists(file_path):
+            columns = ["Timestamp"] + [f"{name}_{stat}" for name in param_names
+                                       for stat in ("min", "max", "mean", "last", "count")]
+            with open(file_path, mode='w', newline='') as f:
+                f.write(",".join(columns) + "\n")
+
+    # Merging a partial aggregate (a single sample is min=max=sum=last=value, count=1)
+    def merge(self, now, mins, maxs, sums, lasts, counts):
+        if self.bucket is None or not self.bucket <= now < self.bucket + self.seconds:
+            bucket = local_bucket_start(now, self.seconds)
+            if self.bucket is not None and bucket != self.bucket:
+                self.flush()
+            self.bucket = bucket
+        self.mins = np.fmin(self.mins, mins)
+        self.maxs = np.fmax(self.maxs, maxs)
+        self.sums += sums
+        self.lasts = np.where(counts > 0, lasts, self.lasts)
+        self.counts += counts
+
+    def flush(self):
+        if self.bucket is None:
+            return
+        if self.file_path:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = self.sums / self.counts
+            cells = []
+            for low, high, mean, last, count in zip(self.mins, self.maxs, means, self.lasts, self.counts.tolist()):
+                cells.extend("" if np.isnan(x) else f"{x:.4f}" for x in (low, high, mean, last))
+                cells.append(str(count))
+            timestamp = datetime.fromtimestamp(self.bucket).strftime('%Y-%m-%d %H:%M:%S')
+            try:
+                with open(self.file_path, mode='a', newline='') as f:
+                    f.write(timestamp + "," + ",".join(cells) + "\n")
+            except Exception as e:
+                print(f"[ERROR] Rollup logging failed ({self.file_path}): {e}")
+        if self.next_level is not None:
+            self.next_level.merge(self.bucket, self.mins, self.maxs, self.sums, self.lasts, self.counts)
+        self.bucket = None
+        self.mins = np.full_like(self.mins, np.nan)
+        self.maxs = np.full_like(self.maxs, np.nan)
+        self.sums = np.zeros_like(self.sums)
+        self.lasts = np.full_like(self.lasts, np.nan)
+        self.counts = np.zeros_like(self.counts)
+
+def initialize_rollups(log_path):
+    global rollup_levels
+    param_names = df_params['Parameter'].tolist()
+    rollup_levels = []
+    next_level = None
+    for seconds, suffix in reversed(ROLLUP_LEVELS):
+        file_path = log_path.replace('_PLC_Data_log.csv', f'_PLC_Rollup_{suffix}.csv') if log_path else None
+        next_level = RollupLevel(seconds, file_path, param_names, next_level)
+        rollup_levels.insert(0, next_level)
+
+# ----- Feeding one sample vector into the finest rollup level -----
+def update_rollups(values, now):
+    if not rollup_levels:
+        return
+    vector = np.array([np.nan if values.get(name) is None else values[name]
+                       for name in df_params['Parameter']], dtype=float)
+    valid = ~np.isnan(vector)
+    rollup_levels[0].merge(now, vector, vector, np.where(valid, vector, 0.0), vector, valid.astype(np.int64))
+
+# ----- Writing partially filled buckets (e.g. on exit) -----
+def flush_rollups():
+    for level in rollup_levels:
+        level.flush()
+
+# ----- Session history in preallocated memory-mapped files (int64 timestamp + float32 value and uint8 quality column per parameter) -----
+class HistoryStore:
+    def __init__(self, directory, param_names):
+        self.directory = directory
+        self.param_names = list(param_names)
+        self.rows = 0
+        self.capacity = 0
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "params.txt"), 'w') as f:
+            f.write("\n".join(self.param_names) + "\n")
+        self.paths = [os.path.join(directory, "timestamp_ns.i8")] + \
+                     [os.path.join(directory, f"col_{i:04d}.f4") for i in range(len(self.param_names))] + \
+                     [os.path.join(directory, f"qual_{i:04d}.u1") for i in range(len(self.param_names))]
+        for path in self.paths:
+            open(path, 'wb').close()
+        self.grow()
+
+    # Extending every column file by one chunk and mapping it again (old views stay valid)
+    def grow(self):
+        self.capacity += HISTORY_CHUNK_ROWS
+        columns = []
+        count = len(self.param_names)
+        for path, dtype in zip(self.paths, [np.int64] + [np.float32] * count + [np.uint8] * count):
+            with open(path, 'r+b') as f:
+                f.truncate(self.capacity * np.dtype(dtype).itemsize)
+            columns.append(np.memmap(path, dtype=dtype, mode='r+', shape=(self.capacity,)))
+        self.timestamps = columns[0]
+        self.columns = dict(zip(self.param_names, columns[1:count + 1]))
+        self.quality = dict(zip(self.param_names, columns[count + 1:]))
+
+    def append(self, timestamp_ns, values, quality):
+        if self.rows == self.capacity:
+            self.grow()
+        self.timestamps[self.rows] = timestamp_ns
+        for (param_name, column), code in zip(self.columns.items(), quality.tolist()):
+            value = values.get(param_name)
+            column[self.rows] = np.nan if value is None else value
+            self.quality[param_name][self.rows] = code
+        self.rows += 1
+
+    # Zero-copy views of [start_ns, end_ns), strided when there are more rows than can be drawn
+    # Returns (timestamps, values per parameter, quality codes per parameter)
+    def slice(self, start_ns, end_ns, param_names, max_points=None):
+        timestamps = self.timestamps[:self.rows]
+        first, last = np.searchsorted(timestamps, [start_ns, end_ns])
+        step = 1 if not max_points else max(1, (last - first) // max_points)
+        return (timestamps[first:last:step], {name: self.columns[name][first:last:step] for name in param_names},
+                {name: self.quality[name][first:last:step] for name in param_names})
+
+    def time_range(self):
+        if self.rows == 0:
+            return None
+        return int(self.timestamps[0]), int(self.timestamps[self.rows - 1])
+
+    def flush(self):
+        self.timestamps.flush()
+        for column in list(self.columns.values()) + list(self.quality.values()):
+            column.flush()
+
+# ----- Bit-level writer / reader for the compressed series streams (most significant bit first) -----
+class BitWriter:
+    def __init__(self):
+        self.data = bytearray()
+        self.acc = 0
+        self.nbits = 0
+
+    def write(self, value, nbits):
+        self.acc = (self.acc << nbits) | value
+        self.nbits += nbits
+        if self.nbits >= 64:  # Move whole bytes out so the accumulator stays small
+            extra = self.nbits & 7
+            self.data += (self.acc >> extra).to_bytes((self.nbits - extra) >> 3, 'big')
+            self.acc &= (1 << extra) - 1
+            self.nbits = extra
+
+    def getvalue(self):
+        if self.nbits:
+            pad = -self.nbits & 7
+            return bytes(self.data + (self.acc << pad).to_bytes((self.nbits + pad) >> 3, 'big'))
+        return bytes(self.data)
+
+class BitReader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def read(self, nbits):
+        start = self.pos >> 3
+        end = (self.pos + nbits + 7) >> 3
+        chunk = int.from_bytes(self.data[start:end], 'big')
+        self.pos += nbits
+        return (chunk >> ((end << 3) - self.pos)) & ((1 << nbits) - 1)
+
+# ----- Timestamps (ms): first value, then delta-of-delta in 0 / 7 / 9 / 12 / 64-bit buckets -----
+def encode_timestamps(timestamps_ms):
+    writer = BitWriter()
+    previous, delta = 0, 0
+    for index, timestamp in enumerate(timestamps_ms):
+        if index == 0:
+            writer.write(timestamp & 0xFFFFFFFFFFFFFFFF, 64)
+        else:
+            dod = (timestamp - previous) - delta
+            delta = timestamp - previous
+            if dod == 0:
+                writer.write(0, 1)
+            elif -63 <= dod <= 64:
+                writer.write((0b10 << 7) | (dod + 63), 9)
+            elif -255 <= dod <= 256:
+                writer.write((0b110 << 9) | (dod + 255), 12)
+            elif -2047 <= dod <= 2048:
+                writer.write((0b1110 << 12) | (dod + 2047), 16)
+            else:
+                writer.write(0b1111, 4)
+                writer.write(dod & 0xFFFFFFFFFFFFFFFF, 64)
+        previous = timestamp
+    return writer.getvalue()
+
+def decode_timestamps(data, count):
+    reader = BitReader(data)
+    timestamps = []
+    previous, delta = 0, 0
+    for index in range(count):
+        if index == 0:
+            timestamp = reader.read(64)
+            timestamp -= (timestamp >> 63) << 64  # Back to signed
+        else:
+            if reader.read(1) == 0:
+                dod = 0
+            elif reader.read(1) == 0:
+                dod = reader.read(7) - 63
+            elif reader.read(1) == 0:
+                dod = reader.read(9) - 255
+            elif reader.read(1) == 0:
+                dod = reader.read(12) - 2047
+            else:
+                dod = reader.read(64)
+                dod -= (dod >> 63) << 64
+            delta += dod
+            timestamp = previous + delta
+        timestamps.append(timestamp)
+        previous = timestamp
+    return timestamps
+
+# ----- Float64 values: XOR with the previous value, '0' same / '10' same bit window / '11' new window -----
+def encode_values(values):
+    writer = BitWriter()
+    previous, leading, trailing = 0, 65, 0  # No bit window yet
+    for index, bits in enumerate(np.asarray(values, dtype=np.float64).view(np.uint64).tolist()):
+        if index == 0:
+            writer.write(bits, 64)
+        else:
+            xor = bits ^ previous
+            if xor == 0:
+                writer.write(0, 1)
+            else:
+                new_leading = min(64 - xor.bit_length(), 31)
+                new_trailing = (xor & -xor).bit_length() - 1
+                if new_leading >= leading and new_trailing >= trailing:
+                    writer.write(0b10, 2)
+                    writer.write(xor >> trailing, 64 - leading - trailing)
+                else:
+                    leading, trailing = new_leading, new_trailing
+                    length = 64 - leading - trailing
+                    writer.write((0b11 << 11) | (leading << 6) | (length - 1), 13)
+                    writer.write(xor >> trailing, length)
+        previous = bits
+    return writer.getvalue()
+
+def decode_values(data, count):
+    reader = BitReader(data)
+    result = []
+    previous, leading, trailing = 0, 0, 0
+    for index in range(count):
+        if index == 0:
+            bits = reader.read(64)
+        elif reader.read(1) == 0:
+            bits = previous
+        else:
+            if reader.read(1) == 1:
+                header = reader.read(11)
+                leading, trailing = header >> 6, 64 - (header >> 6) - ((header & 0x3F) + 1)
+            bits = previous ^ (reader.read(64 - leading - trailing) << trailing)
+        result.append(bits)
+        previous = bits
+    return np.array(result, dtype=np.uint64).view(np.float64)
+
+# ----- Quality codes: '0' same as before, '1' + 8-bit code -----
+def encode_quality(codes):
+    writer = BitWriter()
+    previous = QUALITY_GOOD
+    for code in codes:
+        if code == previous:
+            writer.write(0, 1)
+        else:
+            writer.write(0x100 | code, 9)
+            previous = code
+    return writer.getvalue()
+
+def decode_quality(data, count):
+    reader = BitReader(data)
+    codes = []
+    code = QUALITY_GOOD
+    for _ in range(count):
+        if reader.read(1):
+            code = reader.read(8)
+        codes.append(code)
+    return np.array(codes, dtype=np.uint8)
+
+# ----- One block: [stream count][stream offsets][timestamps][values, quality per column] -----
+# The offset table lets a single column be decoded without touching the others
+def encode_series_block(timestamps_ns, values, quality):
+    streams = [encode_timestamps((np.asarray(timestamps_ns, dtype=np.int64) // 1_000_000).tolist())]
+    for column in range(values.shape[1]):
+        streams.append(encode_values(values[:, column]))
+        streams.append(encode_quality(quality[:, column].tolist()))
+    offsets = np.cumsum([0] + [len(stream) for stream in streams], dtype=np.uint32)
+    return struct.pack('<I', len(streams)) + offsets.tobytes() + b''.join(streams)
+
+def series_stream(payload, index):
+    (count,) = struct.unpack_from('<I', payload)
+    offsets = np.frombuffer(payload, dtype=np.uint32, count=count + 1, offset=4)
+    base = 4 + 4 * (count + 1)
+    return payload[base + int(offsets[index]):base + int(offsets[index + 1])]
+
+# Returns (timestamps ns, {column: values}, {column: quality}) for the requested column numbers
+def decode_series_block(payload, rows, columns):
+    timestamps = np.array(decode_timestamps(series_stream(payload, 0), rows), dtype=np.int64) * 1_000_000
+    values = {column: decode_values(series_stream(payload, 1 + 2 * column), rows) for column in columns}
+    quality = {column: decode_quality(series_stream(payload, 2 + 2 * column), rows) for column in columns}
+    return timestamps, values, quality
+
+# ----- Session history as compressed blocks in RAM, each sealed block also appended to a .series log -----
+# Same slice() / time_range() / flush() interface as HistoryStore
+# Full blocks are compressed by a sealer thread (the bit-level encoder is slow with many tags), the caller only
+# swaps in a fresh open block; until then the raw block stays readable in self.pending
+class SeriesHistoryStore:
+    def __init__(self, path, param_names):
+        self.path = path
+        self.param_names = list(param_names)
+        self.columns = {name: i for i, name in enumerate(self.param_names)}
+        self.blocks = []  # (first ns, last ns, rows, payload)
+        self.pending = []  # (timestamps, values, quality) of full blocks waiting for the sealer thread, oldest first
+        self.lock = threading.Lock()  # blocks / pending are shared with the sealer thread
+        self.rows = 0
+        self.new_open_block()
+        self.cache = {}  # (block number, column or None) -> decoded arrays
+        names = "\n".join(self.param_names).encode()
+        with open(path, 'wb') as f:
+            f.write(SERIES_MAGIC + struct.pack('<I', len(names)) + names)
+        self.seal_queue = queue.Queue()
+        threading.Thread(target=self.sealer_worker, daemon=True).start()
+
+    def new_open_block(self):
+        self.open_times = np.zeros(SERIES_BLOCK_ROWS, dtype=np.int64)  # Block being filled (not compressed yet)
+        self.open_values = np.zeros((SERIES_BLOCK_ROWS, len(self.param_names)))
+        self.open_quality = np.zeros((SERIES_BLOCK_ROWS, len(self.param_names)), dtype=np.uint8)
+        self.open_rows = 0
+
+    def append(self, timestamp_ns, values, quality):
+        row = self.open_rows
+        self.open_times[row] = timestamp_ns
+        self.open_values[row] = [np.nan if values.get(name) is None else values[name] for name in self.param_names]
+        self.open_quality[row] = quality
+        self.open_rows += 1
+        self.rows += 1
+        if self.open_rows == SERIES_BLOCK_ROWS:
+            self.seal()
+
+    # Handing the open block to the sealer thread and starting a new one (no compression on the caller's thread)
+    def seal(self):
+        rows = self.open_rows
+        if rows == 0:
+            return
+        block = (self.open_times[:rows], self.open_values[:rows], self.open_quality[:rows])
+        with self.lock:
+            self.pending.append(block)
+        self.new_open_block()
+        self.seal_queue.put(block)
+
+    # Compressing handed-over blocks in order, keeping them in RAM and appending them to the .series log
+    def sealer_worker(self):
+        while True:
+            times, values, quality = self.seal_queue.get()
+            try:
+                rows = len(times)
+                payload = encode_series_block(times, values, quality)
+                first_ns, last_ns = int(times[0]), int(times[rows - 1])
+                with self.lock:
+                    self.blocks.append((first_ns, last_ns, rows, payload))
+                    self.pending.pop(0)
+                with open(self.path, 'ab') as f:
+                    f.write(SERIES_BLOCK_HEADER.pack(rows, first_ns, last_ns, len(payload), zlib.crc32(payload)) + payload)
+            except Exception as e:
+                print(f"[ERROR] Writing series block failed: {e}")
+            finally:
+                self.seal_queue.task_done()
+
+    def decoded(self, number, column):
+        key = (number, column)
+        if key not in self.cache:
+            _, _, rows, payload = self.blocks[number]
+            if column is None:
+                self.cache[key] = np.array(decode_timestamps(series_stream(payload, 0), rows), dtype=np.int64) * 1_000_000
+            else:
+                self.cache[key] = (decode_values(series_stream(payload, 1 + 2 * column), rows),
+                                   decode_quality(series_stream(payload, 2 + 2 * column), rows))
+            if len(self.cache) > SERIES_CACHE_STREAMS:
+                del self.cache[next(iter(self.cache))]  # Oldest entry
+        return self.cache[key]
+
+    # Decodes only the blocks overlapping [start_ns, end_ns) and only the requested parameters
+    def slice(self, start_ns, end_ns, param_names, max_points=None):
+        parts = []  # (timestamps, {name: values}, {name: quality})
+        with self.lock:
+            blocks, pending = list(self.blocks), list(self.pending)
+        for number, (first_ns, last_ns, _, _) in enumerate(blocks):
+            if last_ns >= start_ns and first_ns < end_ns:
+                decoded = {name: self.decoded(number, self.columns[name]) for name in param_names}
+                parts.append((self.decoded(number, None), {name: values for name, (values, _) in decoded.items()},
+                              {name: quality for name, (_, quality) in decoded.items()}))
+        for times, values, quality in pending:  # Not compressed yet
+            parts.append((times, {name: values[:, self.columns[name]] for name in param_names},
+                          {name: quality[:, self.columns[name]] for name in param_names}))
+        rows = self.open_rows
+        parts.append((self.open_times[:rows], {name: self.open_values[:rows, self.columns[name]] for name in param_names},
+                      {name: self.open_quality[:rows, self.columns[name]] for name in param_names}))
+        timestamps = np.concatenate([part[0] for part in parts])
+        first, last = np.searchsorted(timestamps, [start_ns, end_ns])
+        step = 1 if not max_points else max(1, (last - first) // max_points)
+        return (timestamps[first:last:step],
+                {name: np.concatenate([part[1][name] for part in parts])[first:last:step] for name in param_names},
+                {name: np.concatenate([part[2][name] for part in parts])[first:last:step] for name in param_names})
+
+    def time_range(self):
+        if self.rows == 0:
+            return None
+        with self.lock:
+            first_times = [int(self.blocks[0][0])] if self.blocks else [int(times[0]) for times, _, _ in self.pending]
+            last_times = [int(times[-1]) for times, _, _ in self.pending] or [block[1] for block in self.blocks]
+        first = first_times[0] if first_times else int(self.open_times[0])
+        last = int(self.open_times[self.open_rows - 1]) if self.open_rows else last_times[-1]
+        return first, last
+
+    def compressed_bytes(self):
+        with self.lock:
+            return sum(len(payload) for _, _, _, payload in self.blocks)
+
+    # Partial last block, then waits until the sealer thread wrote everything
+    def flush(self):
+        self.seal()
+        self.seal_queue.join()
+
+# ----- Reading a .series log: returns (parameter names, list of (first ns, last ns, rows, payload)) -----
+def read_series_file(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(SERIES_MAGIC):
+        raise ValueError(f"{path} is not a series log")
+    (names_length,) = struct.unpack_from('<I', data, len(SERIES_MAGIC))
+    offset = len(SERIES_MAGIC) + 4
+    param_names = data[offset:offset + names_length].decode().split("\n")
+    offset += names_length
+    blocks = []
+    while offset + SERIES_BLOCK_HEADER.size <= len(data):
+        rows, first_ns, last_ns, length, crc = SERIES_BLOCK_HEADER.unpack_from(data, offset)
+        payload = data[offset + SERIES_BLOCK_HEADER.size:offset + SERIES_BLOCK_HEADER.size + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            print(f"[WARNING] Series block at byte {offset} is damaged, ignoring the rest")
+            break
+        blocks.append((first_ns, last_ns, rows, payload))
+        offset += SERIES_BLOCK_HEADER.size + length
+    return param_names, blocks
+
+# ----- Uplink batch -> compact binary payload -----
+# Header + zlib(uint32 ms offsets from the first sample, float32 values, uint8 quality codes), values and quality
+# column by column; the float32 values are split into byte planes first, which compresses noisy analog data better
+def encode_uplink_batch(timestamps_ns, values, quality):
+    timestamps_ms = np.asarray(timestamps_ns, dtype=np.int64) // 1_000_000  # Millisecond resolution like the csv
+    rows, width = values.shape
+    offsets = (timestamps_ms - timestamps_ms[0]).astype('<u4')
+    planes = np.ascontiguousarray(values.T, dtype='<f4').view(np.uint8).reshape(-1, 4).T
+    body = offsets.tobytes() + planes.tobytes() + np.ascontiguousarray(quality.T, dtype=np.uint8).tobytes()
+    return (UPLINK_HEADER.pack(UPLINK_MAGIC, 1, width, rows, int(timestamps_ms[0]))
+            + zlib.compress(body, UPLINK_COMPRESSION_LEVEL))
+
+# ----- Payload -> (int64 epoch ns per sample, float32 values matrix, uint8 quality matrix), for consumers and tests -----
+def decode_uplink_batch(payload):
+    magic, version, width, rows, first_ms = UPLINK_HEADER.unpack_from(payload)
+    if magic != UPLINK_MAGIC or version != 1:
+        raise ValueError("Not an uplink batch")
+    body = zlib.decompress(payload[UPLINK_HEADER.size:])
+    timestamps = (first_ms + np.frombuffer(body, '<u4', rows).astype(np.int64)) * 1_000_000
+    planes = np.frombuffer(body, np.uint8, 4 * rows * width, 4 * rows).reshape(4, -1)
+    values = planes.T.copy().view('<f4').reshape(width, rows).T
+    quality = np.frombuffer(body, np.uint8, rows * width, 4 * rows + 4 * rows * width).reshape(width, rows).T
+    return timestamps, values, quality
+
+# ----- MQTT connection of the uplink (paho-mqtt); any object with the same four methods can replace it -----
+class MqttPublisher:
+    def __init__(self, host=UPLINK_HOST, port=UPLINK_PORT):
+        if mqtt is None:
+            raise ImportError("paho-mqtt is not installed (pip install paho-mqtt)")
+        self.host, self.port = host, port
+        client_id = f"plc-reader-{os.getpid()}"
+        if hasattr(mqtt, 'CallbackAPIVersion'):  # paho-mqtt 2.x
+            self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id)
+        else:
+            self.client = mqtt.Client(client_id=client_id)
+        self.started = False
+
+    def connect(self):
+        try:
+            if not self.started:
+                self.client.connect(self.host, self.port, keepalive=30)
+                self.client.loop_start()  # Network thread: acknowledgements, keep-alive and automatic reconnects
+                self.started = True
+        except OSError:
+            return False
+        deadline = time.monotonic() + UPLINK_PUBLISH_TIMEOUT
+        while not self.client.is_connected() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return self.client.is_connected()
+
+    def is_connected(self):
+        return self.client.is_connected()
+
+    # True once the broker acknowledged the message (QoS 1)
+    def publish(self, topic, payload, retain=False):
+        try:
+            info = self.client.publish(topic, payload, qos=UPLINK_QOS, retain=retain)
+            info.wait_for_publish(UPLINK_PUBLISH_TIMEOUT)
+            return info.is_published()
+        except (ValueError, RuntimeError):  # Not connected / paho queue full
+            return False
+
+    def close(self):
+        if self.started:
+            self.client.loop_stop()
+            self.client.disconnect()
+
+# ----- Store-and-forward uplink sink -----
+# The poll loop only adds samples to the open batch; closed batches go through a bounded queue (and a bounded overflow
+# list behind it) to the sender thread, which publishes them, or spools them to disk while the broker is unreachable. After an outage the spool is sent
+# oldest first at UPLINK_DRAIN_RATE batches per second; live batches queue behind it so the historian gets them in order
+class UplinkSink:
+    def __init__(self, param_names, publisher, spool_dir=UPLINK_SPOOL_DIR, topic=UPLINK_TOPIC, units=None):
+        self.param_names = list(param_names)
+        self.publisher = publisher
+        self.topic = topic
+        self.schema = json.dumps({'format': 1, 'parameters': self.param_names,
+                                  'units': list(units) if units is not None else None}).encode()
+        self.spool_dir = spool_dir
+        os.makedirs(spool_dir, exist_ok=True)
+        self.spool_files = deque(sorted(name for name in os.listdir(spool_dir) if name.endswith('.plcu')))
+        self.spool_bytes = sum(os.path.getsize(os.path.join(spool_dir, name)) for name in self.spool_files)
+        self.spool_sequence = 0
+        self.lock = threading.Lock()  # Open batch, overflow and stats; never held during file access or encoding
+        self.spool_lock = threading.Lock()  # Spool list and files (taken before self.lock, never after it)
+        self.rows = []  # (row epoch ns, value vector, quality codes) of the open batch
+        self.batch_started = 0.0
+        self.batches = queue.Queue(maxsize=UPLINK_QUEUE_BATCHES)
+        self.overflow = deque()  # Closed batches that did not fit into the queue yet (newer than the queued ones)
+        self.connected = False
+        self.running = True
+        self.stats = {'samples': 0, 'sent': 0, 'spooled': 0, 'drained': 0, 'dropped': 0,
+                      'raw_bytes': 0, 'payload_bytes': 0, 'errors': 0, 'sender_alive': True}
+        if self.spool_files:
+            print(f"[INFO] Uplink: {len(self.spool_files)} batches left in {spool_dir} from an earlier session")
+        self.thread = threading.Thread(target=self.sender_worker, daemon=True)
+        self.thread.start()
+
+    # Called by the poll loop for every sample; never waits for the network, the disk or a full queue
+    def append(self, stamps, vector, quality):
+        with self.lock:
+            if not self.rows:
+                self.batch_started = clock.monotonic()
+            self.rows.append((int(stamps.min()), vector, quality))
+            if len(self.rows) < UPLINK_BATCH_SAMPLES and clock.monotonic() - self.batch_started < UPLINK_BATCH_LATENCY:
+                return
+            rows, self.rows = self.rows, []
+        self.queue_batch(rows)
+
+    # Closed batch to the sender: into the queue, or behind the batches already waiting in the overflow list
+    def queue_batch(self, rows):
+        with self.lock:
+            if not self.overflow:
+                try:
+                    self.batches.put_nowait(rows)
+                    return
+                except queue.Full:
+                    pass
+            self.overflow.append(rows)
+            if len(self.overflow) > UPLINK_OVERFLOW_BATCHES:  # Sender stuck for long, the csv log still has them
+                self.overflow.popleft()
+                self.stats['dropped'] += 1
+
+    # Called by the sender thread: overflow batches move up as the queue frees (in order)
+    def refill_queue(self):
+        with self.lock:
+            while self.overflow and not self.batches.full():
+                self.batches.put_nowait(self.overflow.popleft())
+
+    # Stats are updated by the poll and the sender thread
+    def count(self, **changes):
+        with self.lock:
+            for key, change in changes.items():
+                self.stats[key] += change
+
+    # Open batch whose latency ran out while no samples arrived (e.g. polling stopped)
+    def take_due_batch(self):
+        with self.lock:
+            if not self.rows or clock.monotonic() - self.batch_started < UPLINK_BATCH_LATENCY:
+                return None
+            rows, self.rows = self.rows, []
+            return rows
+
+    def encode(self, rows):
+        payload = encode_uplink_batch([row[0] for row in rows], np.array([row[1] for row in rows]),
+                                      np.array([row[2] for row in rows]))
+        self.count(samples=len(rows), payload_bytes=len(payload),
+                   raw_bytes=len(rows) * (8 + 9 * len(self.param_names)))  # int64 time, float64 + uint8 per value
+        return payload
+
+    # One file per batch, named by first sample time so the drain keeps the original order
+    def spool(self, payload):
+        with self.spool_lock:
+            self.spool_sequence += 1
+            name = f"{UPLINK_HEADER.unpack_from(payload)[4]:016d}_{self.spool_sequence:06d}.plcu"
+            path = os.path.join(self.spool_dir, name)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(payload)
+            os.replace(path + '.tmp', path)
+            self.spool_files.append(name)
+            if len(self.spool_files) > 1 and self.spool_files[-2] > name:  # close() spooled while the sender still finished
+                self.spool_files = deque(sorted(self.spool_files))
+            self.spool_bytes += len(payload)
+            self.count(spooled=1)
+            while self.spool_bytes > UPLINK_SPOOL_MAX_MB * 2**20 and len(self.spool_files) > 1:
+                oldest = os.path.join(self.spool_dir, self.spool_files.popleft())
+                self.spool_bytes -= os.path.getsize(oldest)
+                os.remove(oldest)
+                self.count(dropped=1)
+
+    def send(self, payload):
+        try:
+            return self.publisher.publish(self.topic, payload)
+        except Exception as e:
+            print(f"[ERROR] Uplink publish failed: {e}")
+            return False
+
+    def try_connect(self):
+        try:
+            self.connected = self.publisher.connect() and self.publisher.publish(self.topic + "/schema", self.schema,
+                                                                                 retain=True)
+        except Exception as e:
+            print(f"[ERROR] Uplink connection failed: {e}")
+            self.connected = False
+        if self.connected:
+            print(f"[INFO] Uplink connected, {len(self.spool_files)} spooled batches to drain "
+                  f"at {UPLINK_DRAIN_RATE} batches/s")
+
+    def lost_connection(self):
+        if self.connected:
+            print(f"[WARNING] Uplink broker unreachable, spooling batches to {self.spool_dir}")
+        self.connected = False
+
+    # Sends the oldest spooled batches allowed by the drain budget; returns the unused budget
+    # close() may spool (and evict the oldest files over the cap) meanwhile, so the head is read under the spool lock
+    # and only released if it is still the head after sending
+    def drain(self, budget):
+        while budget >= 1 and self.spool_files and self.connected:
+            with self.spool_lock:
+                name = self.spool_files[0]
+                path = os.path.join(self.spool_dir, name)
+                with open(path, 'rb') as f:
+                    payload = f.read()
+            if not self.send(payload):
+                self.lost_connection()
+                break
+            with self.spool_lock:
+                if self.spool_files and self.spool_files[0] == name:
+                    self.spool_files.popleft()
+                    self.spool_bytes -= len(payload)
+                    os.remove(path)
+                    self.count(drained=1)
+                else:  # Evicted over the cap while it was being sent, but it did reach the broker
+                    self.count(drained=1, dropped=-1)
+            budget -= 1
+        return budget
+
+    def sender_worker(self):
+        next_connect = 0.0
+        budget, last_refill = 0.0, time.monotonic()
+        try:
+            while self.running or not self.batches.empty() or self.overflow:
+                try:
+                    budget, last_refill, next_connect = self.sender_step(budget, last_refill, next_connect)
+                except Exception as e:  # e.g. spool folder not writable: report it and keep the thread alive
+                    self.count(errors=1)
+                    print(f"[ERROR] Uplink sender failed: {e}")
+                    time.sleep(0.2)
+        finally:
+            with self.lock:
+                self.stats['sender_alive'] = False
+
+    # One pass of the sender thread: next batch out (or into the spool), reconnect when due, drain within budget
+    def sender_step(self, budget, last_refill, next_connect):
+        try:
+            rows = self.batches.get(timeout=0.2)
+        except queue.Empty:
+            rows = self.take_due_batch()
+        now = time.monotonic()
+        if not self.connected and now >= next_connect:
+            self.try_connect()
+            next_connect = now + UPLINK_RETRY_INTERVAL
+        self.refill_queue()
+        if rows:
+            payload = self.encode(rows)
+            if not self.connected or self.spool_files:  # Behind the spooled batches to keep the order
+                self.spool(payload)
+            elif self.send(payload):
+                self.count(sent=1)
+            else:
+                self.lost_connection()
+                self.spool(payload)
+        budget = min(budget + (now - last_refill) * UPLINK_DRAIN_RATE, max(UPLINK_DRAIN_RATE, 1))
+        last_refill = now
+        if self.connected:
+            budget = self.drain(budget)
+        return budget, last_refill, next_connect
+
+    # Open batch and queued batches are sent (or spooled for the next session) before the thread stops
+    def close(self):
+        with self.lock:
+            rows, self.rows = self.rows, []
+        if rows:
+            self.queue_batch(rows)
+        self.running = False
+        self.thread.join(timeout=UPLINK_PUBLISH_TIMEOUT * 2 + 1)
+        self.refill_queue()
+        while not self.batches.empty():
+            self.spool(self.encode(self.batches.get_nowait()))
+            self.refill_queue()
+        self.publisher.close()
+        stats = self.stats
+        print(f"[INFO] Uplink: {stats['samples']} samples, {stats['sent'] + stats['drained']} batches sent "
+              f"({stats['drained']} from the spool), {len(self.spool_files)} left spooled, {stats['dropped']} dropped, "
+              f"payload {stats['payload_bytes'] / max(stats['raw_bytes'], 1) * 100:.0f}% of raw")
+
+def start_uplink(publisher=None):
+    global uplink
+    try:
+        uplink = UplinkSink(df_params['Parameter'], publisher or MqttPublisher(), units=df_params['Unit'])
+        print(f"[INFO] Uplink to {UPLINK_HOST}:{UPLINK_PORT} topic {UPLINK_TOPIC} started")
+    except Exception as e:
+        print(f"[ERROR] Uplink not started: {e}")
+        uplink = None
+
+def stop_uplink():
+    global uplink
+    if uplink is not None:
+        uplink.close()
+        uplink = None
+
+# ----- One server -> browser WebSocket frame (final, unmasked) -----
+def websocket_frame(payload, opcode=0x2):
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+# ----- Browser live view: page + WebSocket per viewer -----
+# Every sample is encoded once into a delta frame (bit mask of the parameters whose value or quality changed, then
+# their float32 values and quality codes) that all viewers share, so adding a viewer only adds one socket write
+# per sample. A new viewer first gets the parameter list (JSON) and the last LIVEVIEW_WINDOW samples in one frame
+class LiveViewServer:
+    def __init__(self, df, host=LIVEVIEW_HOST, port=LIVEVIEW_PORT, window=LIVEVIEW_WINDOW):
+        self.param_names = df['Parameter'].tolist()
+        width = len(self.param_names)
+        self.schema_frame = websocket_frame(json.dumps({
+            'parameters': self.param_names, 'units': df['Unit'].tolist(), 'min': df['Min'].tolist(),
+            'max': df['Max'].tolist(), 'window': window, 'interval_ms': INTERVAL}).encode(), opcode=0x1)
+        self.window = window
+        self.times = np.zeros(window, dtype=np.float64)  # Ring of the last samples (epoch ms)
+        self.values = np.full((window, width), np.nan, dtype=np.float32)
+        self.quality = np.full((window, width), QUALITY_COMM_FAIL, dtype=np.uint8)
+        self.count = 0  # Samples published (sequence number of the last one)
+        self.frames = deque(maxlen=LIVEVIEW_BACKLOG)  # (sequence, delta frame) shared by all viewers
+        self.condition = threading.Condition()
+        self.viewers = 0
+        self.running = True
+        with open(LIVEVIEW_PAGE, 'rb') as f:
+            self.page = f.read()
+        self.httpd = http.server.ThreadingHTTPServer((host, port), LiveViewHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.live_view = self
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    # Called once per sample (GUI side), encodes the delta against the previous sample
+    def publish(self, stamps, values, quality):
+        vector = np.array([np.nan if values.get(name) is None else values[name] for name in self.param_names],
+                          dtype=np.float32)
+        previous = (self.count - 1) % self.window
+        changed = quality != self.quality[previous]
+        changed |= (vector != self.values[previous]) & ~(np.isnan(vector) & np.isnan(self.values[previous]))
+        if not self.count:
+            changed[:] = True
+        timestamp_ms = stamps.min() / 1e6
+        payload = (LIVEVIEW_DELTA_HEADER.pack(1, self.count + 1, timestamp_ms)
+                   + np.packbits(changed, bitorder='little').tobytes()
+                   + vector[changed].tobytes() + quality[changed].astype(np.uint8).tobytes())
+        frame = websocket_frame(payload)
+        with self.condition:
+            row = self.count % self.window
+            self.times[row], self.values[row], self.quality[row] = timestamp_ms, vector, quality
+            self.count += 1
+            self.frames.append((self.count, frame))
+            self.condition.notify_all()
+
+    # Window frame of the samples held in the ring (oldest first) and the sequence it ends with; call with the lock held
+    def window_frame(self):
+        rows = min(self.count, self.window)
+        order = (np.arange(self.count - rows, self.count)) % self.window
+        payload = (LIVEVIEW_WINDOW_HEADER.pack(2, self.count, rows, len(self.param_names)) + self.times[order].tobytes()
+                   + self.values[order].tobytes() + self.quality[order].tobytes())
+        return websocket_frame(payload), self.count
+
+    # Runs in the handler thread of one viewer until the browser goes away
+    def serve_viewer(self, connection, wfile):
+        with self.condition:
+            window, sent = self.window_frame()
+            self.viewers += 1
+        print(f"[INFO] Live view: viewer connected ({self.viewers} watching)")
+        try:
+            wfile.write(self.schema_frame + window)
+            while self.running:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.count > sent or not self.running, timeout=1.0)
+                    if self.frames and self.frames[0][0] > sent + 1:  # Fell behind the backlog -> start over
+                        data, sent = self.window_frame()
+                    else:
+                        pending = [frame for sequence, frame in self.frames if sequence > sent]
+                        data, sent = b"".join(pending), self.count
+                if data:
+                    wfile.write(data)
+                if select.select([connection], [], [], 0)[0]:  # Browsers only send a close frame (opcode 8)
+                    message = connection.recv(4096)
+                    if not message or message[0] & 0x0F == 0x8:
+                        break
+        except OSError:  # Browser closed / network gone
+            pass
+        finally:
+            with self.condition:
+                self.viewers -= 1
+            print(f"[INFO] Live view: viewer disconnected ({self.viewers} watching)")
+
+    def close(self):
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# ----- HTTP side of the live view: the chart page and the WebSocket upgrade on /ws -----
+class LiveViewHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        live = self.server.live_view
+        if self.path == '/ws' and self.headers.get('Upgrade', '').lower() == 'websocket':
+            key = self.headers.get('Sec-WebSocket-Key', '')
+            accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+            self.send_response(101)
+            self.send_header('Upgrade', 'websocket')
+            self.send_header('Connection', 'Upgrade')
+            self.send_header('Sec-WebSocket-Accept', accept)
+            self.end_headers()
+            self.close_connection = True
+            live.serve_viewer(self.connection, self.wfile)
+        elif self.path in ('/', '/index.html'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(live.page)))
+            self.end_headers()
+            self.wfile.write(live.page)
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass  # No access log on the console
+
+def start_live_view():
+    global live_view
+    try:
+        live_view = LiveViewServer(df_params)
+        print(f"[INFO] Live view at http://{LIVEVIEW_HOST}:{LIVEVIEW_PORT}/")
+    except Exception as e:
+        print(f"[ERROR] Live view not started: {e}")
+        live_view = None
+
+def stop_live_view():
+    global live_view
+    if live_view is not None:
+        live_view.close()
+        live_view = None
+
+# ----- Everything that happens with one sample after it was read -----
+def process_sample(values, stamps, quality):
+    analyze_sample(values, stamps, quality)
+    return display_sample(values, stamps, quality)
+
+# Event capture, rolling statistics / alarms and rollups (analysis stage of the pipeline)
+def analyze_sample(values, stamps, quality):
+    if values and event_triggers:
+        process_event_triggers(values, stamps, quality)
+    if values and tag_statistics:
+        update_statistics(values, stamps)
+    if values:
+        update_rollups(values, stamps.min() / 1e9)
+
+# Session history, browser live view and the plot traces (GUI side)
+def display_sample(values, stamps, quality):
+    if values and history_store is not None:
+        history_store.append(int(stamps.min()), values, quality)
+    if values and live_view is not None and acquisition_pipeline is None:  # The pipeline has its own live view stage
+        live_view.publish(stamps, values, quality)
     if values:
         for param_name, value in values.items():
-            if value is not None and parameter_data[param_name].is_active:
-                parameter_data[param_name].add_data_point(current_point_count, value)
+            if parameter_data[param_name].is_active:  # Failed reads are added as NaN -> gap in the trace
+                parameter_data[param_name].add_data_point(current_point_count, np.nan if value is None else value,
+                                                          int(quality[param_index[param_name]]))
     return values
 
+def generate_data():
+    values, stamps, quality = read_plc_data()
+    return process_sample(values, stamps, quality)
+
+# ----- Single-producer/single-consumer ring of samples in shared memory -----
+class SharedSampleRing:
+    # Header (int64): [0] samples written, [1] PLC connected flag, [2] index in CONNECTION_STATES (-1 = error)
+    HEADER_SIZE = 4
+
+    def __init__(self, param_names, name=None, rows=SAMPLE_RING_ROWS):
+        self.param_names = list(param_names)
+        self.rows = rows
+        width = len(self.param_names)
+        size = 8 * (self.HEADER_SIZE + 2 * rows * width) + rows * width
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)  # Only the owner unlinks it
+        self.header = np.ndarray((self.HEADER_SIZE,), dtype=np.int64, buffer=self.shm.buf)
+        self.values = np.ndarray((rows, width), dtype=np.float64, buffer=self.shm.buf, offset=8 * self.HEADER_SIZE)
+        self.stamps = np.ndarray((rows, width), dtype=np.int64, buffer=self.shm.buf,
+                                 offset=8 * self.HEADER_SIZE + self.values.nbytes)
+        self.quality = np.ndarray((rows, width), dtype=np.uint8, buffer=self.shm.buf,
+                                  offset=8 * self.HEADER_SIZE + self.values.nbytes + self.stamps.nbytes)
+        if self.owner:
+            self.header[:] = 0
+        self.read_count = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def push(self, values, stamps, quality, connected, status):
+        row = self.header[0] % self.rows
+        self.values[row] = [np.nan if values.get(name) is None else values[name] for name in self.param_names]
+        self.stamps[row] = stamps
+        self.quality[row] = quality
+        self.header[1] = int(connected)
+        self.header[2] = CONNECTION_STATES.index(status) if status in CONNECTION_STATES else -1
+        self.header[0] += 1  # Publish the row last
+
+    # New samples since the previous call as (values dict, stamps, quality); skips rows already overwritten
+    def read_new(self):
+        written = int(self.header[0])
+        self.read_count = max(self.read_count, written - self.rows)
+        samples = []
+        while self.read_count < written:
+            row = self.read_count % self.rows
+            vector = self.values[row].tolist()
+            values = {name: None if np.isnan(value) else value for name, value in zip(self.param_names, vector)}
+            samples.append((values, self.stamps[row].copy(), self.quality[row].copy()))
+            self.read_count += 1
+        return samples
+
+    def connection_state(self):
+        index = int(self.header[2])
+        return bool(self.header[1]), CONNECTION_STATES[index] if index >= 0 else "Error"
+
+    def close(self):
+        del self.header, self.values, self.stamps, self.quality  # Release views before closing the block
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+# ----- Bounded queue between two pipeline stages -----
+# When full: "block" makes the producer wait (nothing is lost), "drop-oldest" discards the oldest item,
+# "coalesce-latest" keeps only the newest item (displays that only need the current state)
+class StageQueue:
+    def __init__(self, name, size, policy="block"):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}' (use one of {', '.join(QUEUE_POLICIES)})")
+        self.name = name
+        self.policy = policy
+        self.size = 1 if policy == "coalesce-latest" else max(1, size)
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.put_count = 0
+        self.dropped = 0  # Items discarded by drop-oldest / replaced by coalesce-latest
+        self.max_depth = 0
+        self.blocked_seconds = 0.0  # Time producers waited on a full "block" queue (back-pressure)
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) >= self.size:
+                if self.policy == "block":
+                    start = time.monotonic()
+                    self.condition.wait_for(lambda: len(self.items) < self.size or self.closed)
+                    self.blocked_seconds += time.monotonic() - start
+                else:
+                    self.items.popleft()
+                    self.dropped += 1
+            self.items.append(item)
+            self.put_count += 1
+            self.max_depth = max(self.max_depth, len(self.items))
+            self.condition.notify_all()
+
+    # Next item, or None after the timeout / when the queue is closed and empty
+    def get(self, timeout=None):
+        with self.condition:
+            self.condition.wait_for(lambda: self.items or self.closed, timeout)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    # Everything waiting, for consumers outside the pipeline (e.g. the GUI timer)
+    def get_all(self):
+        with self.condition:
+            items = list(self.items)
+            self.items.clear()
+            self.condition.notify_all()
+            return items
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+# ----- One pipeline stage: a thread taking items from its inbox, calling its function and passing results on -----
+# A transform returns the item for the next stages, a sink returns None; every output queue gets the same item
+class PipelineStage:
+    def __init__(self, name, function, inbox=None):
+        self.name = name
+        self.function = function
+        self.inbox = inbox
+        self.outputs = []
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.rate = 0.0  # Items per second over the last PIPELINE_RATE_WINDOW
+        self.rate_mark = (time.monotonic(), 0)
+        self.thread = threading.Thread(target=self.run, name=f"stage-{name}", daemon=True)
+
+    def call(self, *args):
+        start = time.perf_counter()
+        try:
+            result = self.function(*args)
+        except Exception as e:
+            self.errors += 1
+            print(f"[ERROR] Pipeline stage '{self.name}' failed: {e}")
+            return
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+        self.processed += 1
+        if result is not None:
+            for output in self.outputs:
+                output.put(result)
+
+    def run(self):
+        while True:
+            item = self.inbox.get(timeout=0.5)
+            if item is not None:
+                self.call(item)
+            elif self.inbox.closed and not len(self.inbox):
+                break
+
+    def update_rate(self, now):
+        since, count = self.rate_mark
+        if now - since >= PIPELINE_RATE_WINDOW:
+            self.rate = (self.processed - count) / (now - since)
+            self.rate_mark = (now, self.processed)
+
+# ----- Source stage: calls its function every interval (no catching up after an overrun) -----
+# Optional commands queue: commands are handled between cycles as soon as they arrive; on_command returning
+# False stops the source (like the 'stop' command of the acquisition loop)
+class SourceStage(PipelineStage):
+    def __init__(self, name, function, interval, commands=None, on_command=None):
+        super().__init__(name, function)
+        self.interval = interval
+        self.commands = commands
+        self.on_command = on_command
+        self.running = True
+        self.overruns = 0
+
+    def run(self):
+        next_cycle = time.monotonic()
+        while self.running:
+            self.call()
+            next_cycle += self.interval
+            if next_cycle < time.monotonic():  # Cycle overran, do not try to catch up
+                next_cycle = time.monotonic()
+                self.overruns += 1
+            while self.running:
+                delay = next_cycle - time.monotonic()
+                if delay <= 0:
+                    break
+                if self.commands is None:
+                    time.sleep(delay)
+                    break
+                try:
+                    command = self.commands.get(timeout=delay)
+                except queue.Empty:
+                    break
+                if not self.on_command(command):
+                    self.running = False
+
+# ----- Sources, transforms and sinks connected by bounded queues, each stage in its own thread -----
+class Pipeline:
+    def __init__(self):
+        self.stages = {}  # Name -> stage, in the order they were added (parents before children)
+        self.queues = {}  # Name -> StageQueue in front of that stage / external consumer
+        self.monitor_running = False
+
+    def add_source(self, name, function, interval, commands=None, on_command=None):
+        self.stages[name] = SourceStage(name, function, interval, commands, on_command)
+        return self.stages[name]
+
+    def add_stage(self, name, function, after, policy="block", size=PIPELINE_LOG_QUEUE):
+        self.stages[name] = PipelineStage(name, function, self.add_output(name, after, policy, size))
+        return self.stages[name]
+
+    # Queue fed by a stage but drained outside the pipeline (get_all)
+    def add_output(self, name, after, policy="drop-oldest", size=PIPELINE_GUI_QUEUE):
+        self.queues[name] = StageQueue(name, size, policy)
+        self.stages[after].outputs.append(self.queues[name])
+        return self.queues[name]
+
+    def start(self):
+        for stage in self.stages.values():
+            stage.thread.start()
+        self.monitor_running = True
+        threading.Thread(target=self.monitor_worker, daemon=True).start()
+
+    # Blocks until every source stopped by itself (on_command returned False)
+    def wait(self):
+        for stage in self.stages.values():
+            if isinstance(stage, SourceStage):
+                stage.thread.join()
+
+    # Sources stop first, then every stage finishes the items already queued for it
+    def stop(self):
+        for stage in self.stages.values():
+            if isinstance(stage, SourceStage):
+                stage.running = False
+        self.wait()
+        for name, stage in self.stages.items():
+            if stage.inbox is not None:
+                stage.inbox.close()
+                stage.thread.join()
+        for name, output in self.queues.items():
+            if name not in self.stages:
+                output.close()
+        self.monitor_running = False
+        print(f"[INFO] Pipeline stopped: {self.format_stats()}")
+
+    def monitor_worker(self):
+        last_print = time.monotonic()
+        while self.monitor_running:
+            time.sleep(1)
+            now = time.monotonic()
+            for stage in self.stages.values():
+                stage.update_rate(now)
+            if now - last_print >= PIPELINE_STATS_INTERVAL:
+                print(f"[INFO] Pipeline: {self.format_stats()}")
+                last_print = now
+
+    # Per stage: throughput, busy share, queue depth / size, dropped items and back-pressure time
+    def stats(self):
+        rows = []
+        for name, stage in self.stages.items():
+            row = {'name': name, 'rate': stage.rate, 'processed': stage.processed, 'errors': stage.errors,
+                   'busy_ms': stage.busy_seconds * 1000 / max(stage.processed, 1)}
+            if stage.inbox is not None:
+                row.update(depth=len(stage.inbox), size=stage.inbox.size, max_depth=stage.inbox.max_depth,
+                           policy=stage.inbox.policy, dropped=stage.inbox.dropped)
+            row['blocked_s'] = sum(output.blocked_seconds for output in stage.outputs)
+            rows.append(row)
+        for name, output in self.queues.items():
+            if name not in self.stages:
+                rows.append({'name': name, 'rate': None, 'processed': output.put_count, 'depth': len(output),
+                             'size': output.size, 'max_depth': output.max_depth, 'policy': output.policy,
+                             'dropped': output.dropped, 'blocked_s': 0.0})
+        return rows
+
+    def format_stats(self):
+        parts = []
+        for row in self.stats():
+            text = f"{row['name']} {row['processed']}"
+            if row['rate'] is not None:
+                text += f" ({row['rate']:.1f}/s, {row['busy_ms']:.2f} ms)"
+            if 'depth' in row:
+                text += f" q {row['depth']}/{row['size']} {row['policy']}"
+                if row['dropped']:
+                    text += f" dropped {row['dropped']}"
+            if row['blocked_s'] > 0.001:
+                text += f" waited {row['blocked_s']:.1f} s"
+            parts.append(text)
+        return " | ".join(parts)
+
+# ----- Reader thread of the GUI (PIPELINE_ENABLED): read -> csv / journal / uplink, analysis, live view, GUI -----
+def acquire_cycle():
+    sample = acquire_sample()
+    execute_pending_writes()  # Setpoints go out in the gap after the poll, never in front of it
+    return sample
+
+def build_acquisition_pipeline(commands, interval_ms=INTERVAL):
+    pipeline = Pipeline()
+    pipeline.add_source("read", acquire_cycle, interval_ms / 1000, commands, handle_acquisition_command)
+    pipeline.add_stage("log", lambda sample: log_sample(sample[1], sample[0], sample[2]), after="read",
+                       size=PIPELINE_LOG_QUEUE)
+    return pipeline
+
+def start_acquisition_pipeline(interval_ms=INTERVAL):
+    global acquisition_pipeline, acquisition_commands, gui_samples
+    acquisition_commands = queue.Queue()
+    pipeline = build_acquisition_pipeline(acquisition_commands, interval_ms)
+    # Analysis never holds up reads: when it falls PIPELINE_ANALYZE_QUEUE samples behind the oldest are skipped
+    # (the csv log and the journal still keep every sample)
+    pipeline.add_stage("analyze", lambda sample: analyze_sample(*sample), after="read", policy="drop-oldest",
+                       size=PIPELINE_ANALYZE_QUEUE)
+    if live_view is not None:  # A slow viewer network never holds up the rest, only the newest sample matters
+        pipeline.add_stage("live", lambda sample: live_view.publish(sample[1], sample[0], sample[2]) if sample[0]
+                           else None, after="read", policy="coalesce-latest")
+    gui_samples = pipeline.add_output("gui", after="read", size=PIPELINE_GUI_QUEUE)
+    acquisition_pipeline = pipeline
+    pipeline.start()
+    print(f"[INFO] Acquisition pipeline started: {', '.join(list(pipeline.stages) + ['gui'])}")
+
+def stop_acquisition_pipeline():
+    global acquisition_pipeline, acquisition_commands, gui_samples
+    if acquisition_pipeline is None:
+        return
+    acquisition_commands.put(('stop',))
+    acquisition_pipeline.stop()
+    acquisition_pipeline, acquisition_commands, gui_samples = None, None, None
+
+# ----- Commands sent from the GUI to the acquisition loop -----
+def handle_acquisition_command(command):
+    global plc_ip_address, plc_port, stop_reconnect, plc_transport_name
+    if command[0] == 'connect':
+        stop_reconnect = True  # Stop any ongoing reconnection attempts
+        plc_ip_address, plc_port, plc_transport_name = command[1], command[2], command[3]
+        if not connect_to_plc(plc_ip_address, plc_port):
+            start_reconnect_thread()
+    elif command[0] == 'disconnect':
+        disconnect_from_plc()
+    elif command[0] == 'write':
+        queue_setpoint_write(command[1], command[2])
+    elif command[0] == 'stop':
+        return False
+    return True
+
+# ----- Fixed-rate read/log loop feeding the ring (runs in the acquisition process, or a thread) -----
+# Built on the pipeline: reads never wait for the csv / journal writes or the analysis
+def run_acquisition_loop(ring, commands, interval_ms=INTERVAL):
+    pipeline = build_acquisition_pipeline(commands, interval_ms)
+    pipeline.add_stage("process", lambda sample: (process_sample(*sample),
+                                                  ring.push(*sample, is_connected, connection_status)), after="read")
+    pipeline.start()
+    pipeline.wait()  # Until the 'stop' command
+    pipeline.stop()
+    disconnect_from_plc()
+    flush_rollups()
+    flush_csv_buffer()
+    stop_uplink()
+    if sample_journal is not None:
+        sample_journal.close()
+
+# ----- Entry point of the acquisition process (module globals are set up again in the new process) -----
+def acquisition_process_main(csv_path, log_path, ring_name, commands, interval_ms=INTERVAL):
+    global df_params, log_file_path, sample_journal
+    df_params = load_parameter_info(csv_path)
+    log_file_path = log_path
+    initialize_parameter_data()
+    initialize_statistics(log_path)
+    initialize_rollups(log_path)
+    if log_path:
+        sample_journal = SampleJournal(JOURNAL_FILE, log_path)
+    if UPLINK_ENABLED:
+        start_uplink()
+    ring = SharedSampleRing(df_params['Parameter'], name=ring_name)
+    try:
+        run_acquisition_loop(ring, commands, interval_ms)
+    finally:
+        ring.close()
+
+def start_acquisition_process(csv_path, interval_ms=INTERVAL):
+    global acquisition_ring, acquisition_process, acquisition_commands
+    acquisition_ring = SharedSampleRing(df_params['Parameter'])
+    acquisition_commands = mp.Queue()
+    acquisition_process = mp.Process(target=acquisition_process_main, daemon=True,
+                                     args=(csv_path, log_file_path, acquisition_ring.name, acquisition_commands, interval_ms))
+    acquisition_process.start()
+    print(f"[INFO] Acquisition process started (pid {acquisition_process.pid})")
+
+def stop_acquisition_process():
+    global acquisition_ring, acquisition_process
+    if acquisition_process is None:
+        return
+    acquisition_commands.put(('stop',))
+    acquisition_process.join(timeout=10)
+    if acquisition_process.is_alive():
+        acquisition_process.terminate()
+    acquisition_ring.close()
+    acquisition_ring, acquisition_process = None, None
+    print("[INFO] Acquisition process stopped")
+
 def on_left_checkbox_change(param_name):
     global left_selected_params
     checkbox = left_checkboxes[param_name]
@@ -351,10 +2979,10 @@ def on_right_checkbox_change(param_name):
 def setup_time_axis():
     global window_start_time
     if window_start_time is None:
-        window_start_time = datetime.now()
+        window_start_time = clock.now()
     
     # Calculate the actual time difference between start and current point
-    current_time = datetime.now()
+    current_time = clock.now()
     
     # Create time points corresponding to each data point index (0 to MAX_POINTS-1)
     time_points_for_ticks = []
@@ -378,11 +3006,11 @@ def setup_time_axis():
 # After 15 min reset the graph window to plot new upcoming datapoints
 def reset_window():
     global current_point_count, window_start_time
-    print(f"[INFO] Resetting 15-minute window at {datetime.now().strftime('%H:%M:%S')}")
+    print(f"[INFO] Resetting 15-minute window at {clock.now().strftime('%H:%M:%S')}")
     for tracker in parameter_data.values():
         tracker.clear_all_data()
     current_point_count = 0
-    window_start_time = datetime.now()
+    window_start_time = clock.now()
 
 def setup_connection_controls():
     global connection_frame, plc_ip_address, plc_port
@@ -390,23 +3018,48 @@ def setup_connection_controls():
     connection_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)  # Reduced padding
     
     # PLC Connection controls
-    tk.Label(connection_frame, text="PLC IP:", font=LABEL_FONT).pack(side=tk.LEFT, padx=(0, 5))
+    transport_combo = ttk.Combobox(connection_frame, values=TRANSPORTS, state="readonly", width=12)
+    transport_combo.set(plc_transport_name)
+    transport_combo.pack(side=tk.LEFT, padx=(0, 10))
+
+    ip_label = tk.Label(connection_frame, text="PLC IP:", font=LABEL_FONT)
+    ip_label.pack(side=tk.LEFT, padx=(0, 5))
     ip_entry = tk.Entry(connection_frame, width=12, font=("Arial", 10))  # Reduced width
     ip_entry.insert(0, PLC_IP)
     ip_entry.pack(side=tk.LEFT, padx=(0, 10))
     
-    tk.Label(connection_frame, text="Port:", font=LABEL_FONT).pack(side=tk.LEFT, padx=(0, 5))
+    port_label = tk.Label(connection_frame, text="Port:", font=LABEL_FONT)
+    port_label.pack(side=tk.LEFT, padx=(0, 5))
     port_entry = tk.Entry(connection_frame, width=6, font=("Arial", 10))  # Reduced width
     port_entry.insert(0, str(PORT))
     port_entry.pack(side=tk.LEFT, padx=(0, 10))
+
+    # Serial RTU uses the same two fields for serial port and baud rate
+    def change_transport(event=None):
+        serial = transport_combo.get() == "RTU"
+        was_serial = ip_label.cget("text") == "Serial:"
+        ip_label.config(text="Serial:" if serial else "PLC IP:")
+        port_label.config(text="Baud:" if serial else "Port:")
+        if serial != was_serial:
+            ip_entry.delete(0, tk.END)
+            ip_entry.insert(0, SERIAL_PORT if serial else PLC_IP)
+            port_entry.delete(0, tk.END)
+            port_entry.insert(0, str(BAUDRATE if serial else PORT))
+
+    transport_combo.bind("<<ComboboxSelected>>", change_transport)
+    change_transport()
     
     def connect_plc():
-        global plc_ip_address, plc_port, stop_reconnect
+        global plc_ip_address, plc_port, stop_reconnect, plc_transport_name
         stop_reconnect = True  # Stop any ongoing reconnection attempts
+        plc_transport_name = transport_combo.get()
         plc_ip_address = ip_entry.get()
         plc_port = int(port_entry.get())
         
-        if connect_to_plc(plc_ip_address, plc_port):
+        if acquisition_commands is not None:  # Process / pipeline mode: the acquisition loop owns the connection
+            acquisition_commands.put(('connect', plc_ip_address, plc_port, plc_transport_name))
+            messagebox.showinfo("Connecting", f"Connecting to PLC at {plc_ip_address}:{plc_port}")
+        elif connect_to_plc(plc_ip_address, plc_port):
             messagebox.showinfo("Success", f"Connected to PLC at {plc_ip_address}:{plc_port}")
         else:
             messagebox.showerror("Connection Failed", 
@@ -415,13 +3068,18 @@ def setup_connection_controls():
             start_reconnect_thread()
             
     def disconnect_plc():
-        disconnect_from_plc()
+        if acquisition_commands is not None:
+            acquisition_commands.put(('disconnect',))
+        else:
+            disconnect_from_plc()
         messagebox.showinfo("Disconnected", "Manually disconnected from PLC.")
     
     tk.Button(connection_frame, text="Connect", command=connect_plc, 
               bg="green", fg="white", font=BUTTON_FONT, padx=10, pady=3).pack(side=tk.LEFT, padx=5)  # Reduced padding
     tk.Button(connection_frame, text="Disconnect", command=disconnect_plc,
               bg="red", fg="white", font=BUTTON_FONT, padx=10, pady=3).pack(side=tk.LEFT, padx=5)  # Reduced padding
+    tk.Button(connection_frame, text="Dashboard", command=open_dashboard,
+              bg="navy", fg="white", font=BUTTON_FONT, padx=10, pady=3).pack(side=tk.LEFT, padx=5)
     
     # Status indicator
     status_label = tk.Label(connection_frame, text="Status: Disconnected", 
@@ -442,9 +3100,43 @@ def setup_connection_controls():
         window.after(1000, update_status)
     
     update_status()
+    setup_setpoint_controls()
+
+# ----- Setpoint entry: parameter, value and Write button (applied between poll cycles) -----
+def setup_setpoint_controls():
+    writable = [name for name in df_params['Parameter'] if is_writable(name)]
+    if not writable:
+        return
+    setpoint_frame = tk.Frame(window)
+    setpoint_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=(0, 5))
+    tk.Label(setpoint_frame, text="Setpoint:", font=LABEL_FONT).pack(side=tk.LEFT, padx=(0, 5))
+    param_combo = ttk.Combobox(setpoint_frame, values=writable, state="readonly", width=24)
+    param_combo.set(writable[0])
+    param_combo.pack(side=tk.LEFT, padx=(0, 10))
+    value_entry = tk.Entry(setpoint_frame, width=10, font=("Arial", 10))
+    value_entry.pack(side=tk.LEFT, padx=(0, 10))
+
+    def write_setpoint():
+        param_name = param_combo.get()
+        try:
+            value = float(value_entry.get())
+        except ValueError:
+            messagebox.showerror("Invalid Value", f"'{value_entry.get()}' is not a number")
+            return
+        tracker = parameter_data[param_name]
+        if not tracker.min_val <= value <= tracker.max_val and not messagebox.askyesno(
+                "Out of Range", f"{value} is outside {tracker.min_val}-{tracker.max_val}. Write anyway?"):
+            return
+        if acquisition_commands is not None:  # Process / pipeline mode: the acquisition loop performs the write
+            acquisition_commands.put(('write', param_name, value))
+        else:
+            queue_setpoint_write(param_name, value)
+
+    tk.Button(setpoint_frame, text="Write", command=write_setpoint,
+              bg="orange", fg="black", font=BUTTON_FONT, padx=10, pady=1).pack(side=tk.LEFT, padx=5)
 
 def setup_gui():
-    global window, fig, ax_left, ax_right, canvas, left_frame, right_frame
+    global window, fig, ax_left, ax_right, canvas, left_frame, right_frame, stats_label
     window = tk.Tk()
     window.title("PLC Data Reader & Real-Time Plotter")
     window.state('zoomed')
@@ -481,9 +3173,31 @@ def setup_gui():
     ax_left.set_facecolor('white')
     canvas = FigureCanvasTkAgg(fig, master=plot_frame)
     canvas.draw()
+    # Info panel with rolling statistics and alarm state of active parameters
+    stats_label = tk.Label(plot_frame, text="", font=("Courier New", 9), justify=tk.LEFT, anchor='w')
+    stats_label.pack(side=tk.BOTTOM, fill=tk.X)
+    setup_history_controls(plot_frame)
     canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
     create_parameter_checkboxes()
 
+# Live / history switch, span selection and position slider for browsing the whole session
+def setup_history_controls(parent):
+    global history_live, history_span, history_position
+    history_frame = tk.Frame(parent)
+    history_frame.pack(side=tk.BOTTOM, fill=tk.X)
+    history_live = tk.BooleanVar(value=True)
+    history_span = tk.StringVar(value=HISTORY_SPANS[1][0])
+    history_position = tk.DoubleVar(value=100.0)
+    tk.Checkbutton(history_frame, text="Live", variable=history_live, font=CHECKBOX_FONT,
+                   command=plot_current_data).pack(side=tk.LEFT, padx=5)
+    tk.Label(history_frame, text="History span:", font=LABEL_FONT).pack(side=tk.LEFT, padx=(10, 5))
+    span_combo = ttk.Combobox(history_frame, textvariable=history_span, state="readonly", width=12,
+                              values=[label for label, _ in HISTORY_SPANS])
+    span_combo.pack(side=tk.LEFT)
+    span_combo.bind("<<ComboboxSelected>>", lambda event: plot_current_data())
+    tk.Scale(history_frame, variable=history_position, from_=0, to=100, resolution=0.1, orient=tk.HORIZONTAL,
+             showvalue=False, command=lambda value: plot_current_data()).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
+
 def create_parameter_checkboxes():
     global left_checkboxes, right_checkboxes
     param_names = df_params['Parameter'].tolist()
@@ -496,7 +3210,7 @@ def create_parameter_checkboxes():
         var = tk.BooleanVar()
         checkbox = tk.Checkbutton(
             left_frame,
-            text=param_name,
+            text=parameter_data[param_name].display_name,
             variable=var,
             font=CHECKBOX_FONT,
             command=lambda p=param_name: on_left_checkbox_change(p),
@@ -512,7 +3226,7 @@ def create_parameter_checkboxes():
         var = tk.BooleanVar()
         checkbox = tk.Checkbutton(
             right_frame,
-            text=param_name,
+            text=parameter_data[param_name].display_name,
             variable=var,
             font=CHECKBOX_FONT,
             command=lambda p=param_name: on_right_checkbox_change(p),
@@ -525,28 +3239,200 @@ def create_parameter_checkboxes():
         right_checkboxes[param_name] = var
 
 def update_plot(frame):
-    global current_point_count
+    global current_point_count, is_connected, connection_status
     try:
-        # Generate data first
-        values = generate_data()
-        if values:
-            current_point_count += 1
-            
-            # Check if we need to reset after plotting this point
-            if current_point_count >= MAX_POINTS:
-                # Plot this final point first, then reset
-                plot_current_data()
-                reset_window()
-                return
-            
-            # Normal plotting
+        # Generate data first (process mode: take the samples the acquisition process put in the ring,
+        # pipeline mode: the samples the reader thread queued since the last frame, analysis already done there)
+        show_sample = process_sample
+        if acquisition_ring is not None:
+            samples = acquisition_ring.read_new()
+            is_connected, connection_status = acquisition_ring.connection_state()
+        elif acquisition_pipeline is not None:
+            samples = gui_samples.get_all()
+            show_sample = display_sample
+        else:
+            samples = [read_plc_data()]
+            execute_pending_writes()
+        updated_params = set()
+        for values, stamps, quality in samples:
+            if show_sample(values, stamps, quality):
+                updated_params.update(name for name, value in values.items() if value is not None)
+                current_point_count += 1
+                
+                # Check if we need to reset after plotting this point
+                if current_point_count >= MAX_POINTS:
+                    # Plot this final point first, then reset
+                    plot_current_data()
+                    reset_window()
+        
+        # Normal plotting
+        if samples and current_point_count > 0:
             plot_current_data()
+        update_dashboard(updated_params)
         
     except Exception as e:
         print(f"[ERROR] Update failed: {e}")
         traceback.print_exc()
 
+# ----- One trend panel of the dashboard (own parameter set and time span) -----
+class TrendPanel:
+    def __init__(self, ax, param_names, span_minutes):
+        self.ax = ax
+        self.param_names = param_names
+        self.span_minutes = span_minutes
+        self.dirty = True  # Set when one of the panel parameters received a new sample
+        self.background = None  # Axes without traces, restored before each blit
+        self.lines = {}
+        for i, param_name in enumerate(param_names):
+            tracker = parameter_data[param_name]
+            self.lines[param_name], = ax.plot([], [], color=COLORS[i % len(COLORS)], linewidth=2, animated=True,
+                                              drawstyle='steps-post' if tracker.is_bit else 'default', label=tracker.display_name)
+        limits = [v for name in param_names for v in (parameter_data[name].min_val, parameter_data[name].max_val)]
+        margin = (max(limits) - min(limits)) * 0.1
+        ax.set_ylim(min(limits) - margin, max(limits) + margin)
+        ax.set_xlim(-span_minutes, 0)
+        ax.set_xlabel(f"Minutes (0 = now, span {span_minutes:g} min)", fontsize=9)
+        ax.set_ylabel(axis_unit_label(param_names), fontsize=9)
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc='upper left', fontsize=8, framealpha=0.9)
+
+    # Re-drawing only this panel's traces on top of its cached background
+    def redraw(self, canvas, newest_ns):
+        span_ns = int(self.span_minutes * 60e9)
+        timestamps, columns, _ = history_store.slice(newest_ns - span_ns, newest_ns + 1, self.param_names,
+                                                     HISTORY_MAX_PLOT_POINTS)
+        minutes = (timestamps - newest_ns) / 60e9
+        canvas.restore_region(self.background)
+        for param_name, line in self.lines.items():
+            line.set_data(minutes, columns[param_name])
+            self.ax.draw_artist(line)
+        canvas.blit(self.ax.bbox)
+        self.dirty = False
+
+# ----- Panel layout from optional 'Panel' / 'PanelSpan' columns (otherwise DASHBOARD_PANEL_PARAMS per panel) -----
+def build_panel_layout(df):
+    if 'Panel' in df.columns:
+        panels = []
+        for panel, group in df[df['Panel'].notna()].groupby('Panel', sort=True):
+            spans = group['PanelSpan'].dropna() if 'PanelSpan' in df.columns else []
+            panels.append((group['Parameter'].tolist(), float(spans.iloc[0]) if len(spans) else DASHBOARD_DEFAULT_SPAN))
+        return panels
+    names = df['Parameter'].tolist()
+    return [(names[i:i + DASHBOARD_PANEL_PARAMS], DASHBOARD_DEFAULT_SPAN)
+            for i in range(0, len(names), DASHBOARD_PANEL_PARAMS)]
+
+def open_dashboard():
+    global dashboard_window, dashboard_canvas, dashboard_panels
+    if dashboard_window is not None:
+        dashboard_window.lift()
+        return
+    if history_store is None:
+        messagebox.showerror("Dashboard", "Dashboard needs the session history store.")
+        return
+    layout = build_panel_layout(df_params)
+    rows = max(1, -(-len(layout) // DASHBOARD_COLUMNS))
+    dashboard_window = tk.Toplevel(window)
+    dashboard_window.title("PLC Dashboard")
+    dashboard_fig = plt.figure(figsize=(14, 3 * rows))
+    dashboard_fig.subplots_adjust(left=0.05, right=0.98, bottom=0.06, top=0.97, hspace=0.45, wspace=0.15)
+    dashboard_panels = [TrendPanel(dashboard_fig.add_subplot(rows, DASHBOARD_COLUMNS, i + 1), params, span)
+                        for i, (params, span) in enumerate(layout)]
+    dashboard_canvas = FigureCanvasTkAgg(dashboard_fig, master=dashboard_window)
+    dashboard_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    dashboard_canvas.mpl_connect('draw_event', capture_dashboard_backgrounds)  # Also fires after resizing
+    dashboard_canvas.draw()
+
+    def close_dashboard():
+        global dashboard_window, dashboard_canvas, dashboard_panels
+        dashboard_window.destroy()
+        plt.close(dashboard_fig)
+        dashboard_window, dashboard_canvas, dashboard_panels = None, None, []
+    dashboard_window.protocol("WM_DELETE_WINDOW", close_dashboard)
+
+# After a full draw (first show or resize) every panel caches its empty axes and is drawn again
+def capture_dashboard_backgrounds(event):
+    for panel in dashboard_panels:
+        panel.background = dashboard_canvas.copy_from_bbox(panel.ax.bbox)
+        panel.dirty = True
+    dashboard_window.after_idle(lambda: update_dashboard(set()))
+
+# Marking panels with new data dirty and blitting only those
+def update_dashboard(updated_params):
+    if dashboard_canvas is None or history_store is None or history_store.rows == 0:
+        return
+    newest_ns = history_store.time_range()[1]
+    for panel in dashboard_panels:
+        if updated_params.intersection(panel.param_names):
+            panel.dirty = True
+        if panel.dirty and panel.background is not None:
+            panel.redraw(dashboard_canvas, newest_ns)
+
+# Bits (coils / discrete inputs) are drawn as step traces, analog values as lines
+# Y-axis label from the units of the plotted parameters (one unit, or all of them if mixed)
+def axis_unit_label(param_names, title="Value"):
+    units = list(dict.fromkeys(parameter_data[name].unit for name in param_names if parameter_data[name].unit))
+    return f"{title} [{', '.join(units)}]" if units else title
+
+# NaN values (failed reads) are drawn as gaps, flagged (stale / out-of-range) samples as 'x' markers
+def plot_trace(ax, tracker, points, values_list, flagged=(), **kwargs):
+    if tracker.is_bit:
+        ax.step(points, values_list, where='post', **kwargs)
+    else:
+        ax.plot(points, values_list, **kwargs)
+    if len(flagged):
+        flagged_points, flagged_values = zip(*flagged)
+        ax.scatter(flagged_points, flagged_values, marker='x', s=40, color=kwargs.get('color'), zorder=3)
+
+# Drawing a time range of the session history (views into the memory-mapped files)
+def plot_history_data():
+    ax_left.clear()
+    ax_right.clear()
+    time_range = history_store.time_range() if history_store is not None else None
+    if time_range is None:
+        canvas.draw_idle()
+        return
+    first_ns, last_ns = time_range
+    span_seconds = dict(HISTORY_SPANS).get(history_span.get())
+    span_ns = last_ns - first_ns if span_seconds is None else int(span_seconds * 1e9)
+    end_ns = first_ns + span_ns + int((last_ns - first_ns - span_ns) * history_position.get() / 100)
+    end_ns = max(min(end_ns, last_ns), first_ns + span_ns)
+    start_ns = end_ns - span_ns
+    utc_offset_ns = int(datetime.now().astimezone().utcoffset().total_seconds() * 1e9)
+
+    color_idx = 0
+    for ax, params, side, axis_color in [(ax_left, left_selected_params, "L", 'blue'),
+                                         (ax_right, right_selected_params, "R", 'red')]:
+        if not params:
+            continue
+        timestamps, columns, quality = history_store.slice(start_ns, end_ns + 1, params, HISTORY_MAX_PLOT_POINTS)
+        times = (timestamps + utc_offset_ns).astype('datetime64[ns]')  # Local time for the axis
+        for param_name in params:
+            marked = np.flatnonzero(np.isin(quality[param_name], (QUALITY_STALE, QUALITY_OUT_OF_RANGE)))
+            plot_trace(ax, parameter_data[param_name], times, columns[param_name],
+                       list(zip(times[marked], columns[param_name][marked])),
+                       color=COLORS[color_idx % len(COLORS)], linewidth=2,
+                       label=f"{parameter_data[param_name].display_name} ({side})")
+            color_idx += 1
+        limits = [v for name in params for v in (parameter_data[name].min_val, parameter_data[name].max_val)]
+        margin = (max(limits) - min(limits)) * 0.1
+        ax.set_ylim(min(limits) - margin, max(limits) + margin)
+        ax.set_ylabel(axis_unit_label(params), fontsize=AXIS_LABEL_FONT_SIZE, weight='bold', color=axis_color)
+        ax.tick_params(axis='y', labelcolor=axis_color, labelsize=TICK_LABEL_FONT_SIZE)
+        ax.legend(loc='upper left' if side == "L" else 'upper right', fontsize=LEGEND_FONT_SIZE, framealpha=0.9)
+
+    ax_left.set_xlim(np.datetime64(start_ns + utc_offset_ns, 'ns'), np.datetime64(end_ns + utc_offset_ns, 'ns'))
+    ax_left.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
+    ax_left.tick_params(axis='x', labelsize=TICK_LABEL_FONT_SIZE, rotation=45)
+    ax_left.set_xlabel("Time (HH:MM:SS)", fontsize=AXIS_LABEL_FONT_SIZE, weight='bold')
+    ax_left.grid(True, alpha=0.3)
+    ax_left.set_title(f"Session History [{format_timestamp(start_ns)[:19]} → {format_timestamp(end_ns)[11:19]}] "
+                      f"| {history_store.rows} samples recorded", fontsize=PLOT_TITLE_FONT_SIZE, weight='bold', pad=20)
+    canvas.draw_idle()
+
 def plot_current_data():
+    if history_live is not None and not history_live.get():
+        plot_history_data()
+        return
     ax_left.clear()
     ax_right.clear()
     setup_time_axis()
@@ -561,8 +3447,9 @@ def plot_current_data():
             points, values_list = parameter_data[param_name].get_all_plot_data()
             if points and values_list:
                 color = COLORS[color_idx % len(COLORS)]
-                ax_left.plot(points, values_list, color=color, linewidth=3,
-                             label=f"{param_name} (L)")  # Removed markers
+                plot_trace(ax_left, parameter_data[param_name], points, values_list,
+                           parameter_data[param_name].get_flagged_points(), color=color, linewidth=3,
+                           label=f"{parameter_data[param_name].display_name} (L)")  # Removed markers
                 left_values.extend([parameter_data[param_name].min_val, parameter_data[param_name].max_val])
                 color_idx += 1
                 left_plotted = True
@@ -570,7 +3457,7 @@ def plot_current_data():
             margin = (max(left_values) - min(left_values)) * 0.1
             ax_left.set_ylim(min(left_values) - margin, max(left_values) + margin)
             ax_left.yaxis.set_major_locator(plt.MaxNLocator(nbins=15))  # Ensure 15 ticks
-            ax_left.set_ylabel("Left Y-axis", fontsize=AXIS_LABEL_FONT_SIZE, weight='bold', color='blue')
+            ax_left.set_ylabel(axis_unit_label(left_selected_params, "Left Y-axis"), fontsize=AXIS_LABEL_FONT_SIZE, weight='bold', color='blue')
             ax_left.tick_params(axis='y', labelcolor='blue', labelsize=TICK_LABEL_FONT_SIZE)
             ax_left.yaxis.set_label_position("left")
             ax_left.yaxis.set_label_coords(-0.06, 0.5)
@@ -582,8 +3469,9 @@ def plot_current_data():
             points, values_list = parameter_data[param_name].get_all_plot_data()
             if points and values_list:
                 color = COLORS[color_idx % len(COLORS)]
-                ax_right.plot(points, values_list, color=color, linewidth=3,
-                              label=f"{param_name} (R)")  # Removed markers
+                plot_trace(ax_right, parameter_data[param_name], points, values_list,
+                           parameter_data[param_name].get_flagged_points(), color=color, linewidth=3,
+                           label=f"{parameter_data[param_name].display_name} (R)")  # Removed markers
                 right_values.extend([parameter_data[param_name].min_val, parameter_data[param_name].max_val])
                 color_idx += 1
                 right_plotted = True
@@ -591,7 +3479,7 @@ def plot_current_data():
             margin = (max(right_values) - min(right_values)) * 0.1
             ax_right.set_ylim(min(right_values) - margin, max(right_values) + margin)
             ax_right.yaxis.set_major_locator(plt.MaxNLocator(nbins=15))  # Ensure 15 ticks
-            ax_right.set_ylabel("Right Y-axis", fontsize=AXIS_LABEL_FONT_SIZE, weight='bold', color='red')
+            ax_right.set_ylabel(axis_unit_label(right_selected_params, "Right Y-axis"), fontsize=AXIS_LABEL_FONT_SIZE, weight='bold', color='red')
             ax_right.tick_params(axis='y', labelcolor='red', labelsize=TICK_LABEL_FONT_SIZE)
             ax_right.yaxis.set_label_position("right")
             ax_right.yaxis.set_label_coords(1.06, 0.5)
@@ -605,6 +3493,12 @@ def plot_current_data():
     elif right_plotted:
         ax_right.legend(loc='upper right', fontsize=LEGEND_FONT_SIZE, framealpha=0.9)
 
+    if stats_label is not None:
+        text = format_statistics_text(list(dict.fromkeys(left_selected_params + right_selected_params)))
+        if acquisition_pipeline is not None:
+            text += f"\nPipeline: {acquisition_pipeline.format_stats()}"
+        stats_label.config(text=text)
+
     progress = (current_point_count / MAX_POINTS) * 100
     active_params = len(set(left_selected_params + right_selected_params))
     status = "Connected" if is_connected else connection_status
@@ -615,7 +3509,17 @@ def plot_current_data():
 def on_window_close():
     global stop_reconnect
     stop_reconnect = True
+    stop_acquisition_process()
+    stop_acquisition_pipeline()
+    stop_live_view()
     disconnect_from_plc()
+    flush_rollups()
+    flush_csv_buffer()
+    stop_uplink()
+    if sample_journal is not None:
+        sample_journal.close()
+    if history_store is not None:
+        history_store.flush()
     window.destroy()
 
 if __name__ == "__main__":
@@ -632,7 +3536,10 @@ if __name__ == "__main__":
     
     print(f"[INFO] Loaded {len(df_params)} parameters:")
     for _, row in df_params.iterrows():
-        print(f"  → {row['Parameter']}: %MW{row['Address']}, Range {row['Min']}-{row['Max']}")
+        print(f"  → {row['Parameter']}: {format_address(row['Function'], row['Address'])}, Range {row['Min']}-{row['Max']}")
+    
+    # Replay samples of a previous session that ended without flushing its csv buffer
+    recover_journal()
     
     # Create log file
     current_time = datetime.now().strftime('%Y-%m-%d_%H-%M')
@@ -640,7 +3547,26 @@ if __name__ == "__main__":
     create_log_file(log_file_path, df_params['Parameter'].tolist())
     
     initialize_parameter_data()
+    if ACQUISITION_PROCESS:
+        event_triggers = []  # Event bursts, logs and rollups are handled by the acquisition process
+        initialize_statistics(None)  # Statistics for the info panel only
+        start_acquisition_process(csv_path)
+    else:
+        sample_journal = SampleJournal(JOURNAL_FILE, log_file_path)
+        initialize_statistics(log_file_path)
+        initialize_rollups(log_file_path)
+        if UPLINK_ENABLED:
+            start_uplink()
+    if HISTORY_BACKEND == "series":
+        history_store = SeriesHistoryStore(log_file_path.replace('_PLC_Data_log.csv', '_PLC_Series.series'),
+                                           df_params['Parameter'])
+    else:
+        history_store = HistoryStore(log_file_path.replace('_PLC_Data_log.csv', '_PLC_History'), df_params['Parameter'])
     
+    if LIVEVIEW_ENABLED:
+        start_live_view()
+    if PIPELINE_ENABLED and not ACQUISITION_PROCESS:
+        start_acquisition_pipeline()
     setup_gui()
     window_start_time = datetime.now()
     ani = FuncAnimation(fig, update_plot, interval=INTERVAL, blit=False)